@@ -1,3 +1,6 @@
 from pypvt.element_fluid_description import ElementFluidDescription
 from pypvt.field_fluid_description import FieldFluidDescription
 from pypvt.bopvt import BoPVT
+from pypvt.depth_profile import DepthProfile
+from pypvt.case_cache import CaseCache
+from pypvt.consistency_report import ConsistencyReport
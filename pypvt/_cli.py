@@ -1,6 +1,24 @@
 import argparse
 import pathlib
-from pypvt import FieldFluidDescription
+from typing import List
+from pypvt import FieldFluidDescription, CaseCache
+from pypvt.ensemble import evaluate_ensemble
+
+
+def _eqlnum_list(text: str) -> List[int]:
+    """
+    Parses a comma separated list of equil region numbers, eg. 3,7
+    """
+    try:
+        eqlnums = [int(eqlnum) for eqlnum in text.split(",") if eqlnum.strip()]
+    except ValueError as err:
+        raise argparse.ArgumentTypeError(
+            f"Invalid list of equil regions: {text}"
+        ) from err
+    if not eqlnums:
+        raise argparse.ArgumentTypeError(f"Invalid list of equil regions: {text}")
+
+    return eqlnums
 
 
 def pvt_consistency_check(args: argparse.Namespace) -> None:
@@ -14,16 +32,18 @@ def pvt_consistency_check(args: argparse.Namespace) -> None:
         Nothing
     """
 
-    fluid_description = FieldFluidDescription(ecl_case=args.ecl_case, kwfile_dict={})
+    fluid_description = FieldFluidDescription(
+        ecl_case=args.ecl_case,
+        kwfile_dict={},
+        cache=None if args.no_cache else CaseCache(),
+        eqlnums=args.eqlnum,
+    )
     fluid_description.validate_description()
 
-    # fnr = 0
-    for fluid in fluid_description.fluid_descriptions:
-        fluid.calc_fluid_prop_vs_depth(no_nodes=args.nodes)
-        fluid.inplace_report()
-        fluid.pvt_gradient_check()
-        # fnr += 1
+    fluid_description.evaluate(no_nodes=args.nodes, workers=args.jobs)
     fluid_description.create_consistency_report()
+    if args.report:
+        fluid_description.write_consistency_report(args.report)
 
 
 def pvt_consistency_adjustment(args: argparse.Namespace) -> None:
@@ -54,7 +74,9 @@ def pvt_consistency_adjustment(args: argparse.Namespace) -> None:
     if args.pvt_file:
         kwfile_dict["PVT"] = args.pvt_file
     fluid_description = FieldFluidDescription(
-        ecl_case=args.ecl_case, kwfile_dict=kwfile_dict
+        ecl_case=args.ecl_case,
+        kwfile_dict=kwfile_dict,
+        cache=None if args.no_cache else CaseCache(),
     )
 
     print(fluid_description.validate_description())
@@ -69,6 +91,29 @@ def pvt_consistency_adjustment(args: argparse.Namespace) -> None:
     # fluid_description.create_consistency_report()
 
 
+def pvt_ensemble_check(args: argparse.Namespace) -> None:
+    """
+    Entrypoint for running pypvt consistency checks on an ensemble,
+    ie many realisations of keyword overrides sharing one eclipse case.
+
+    Args:
+        args: input namespace from argparse
+
+    Returns:
+        Nothing
+    """
+
+    df = evaluate_ensemble(
+        ecl_case=args.ecl_case,
+        realisations=args.realisations,
+        no_nodes=args.nodes,
+        workers=args.jobs,
+        cache=None if args.no_cache else CaseCache(),
+    )
+    df.to_csv(args.output, index=False)
+    print(f"Ensemble report of {len(args.realisations)} realisations: {args.output}")
+
+
 def main() -> None:
     """
     Main functionality run when the 'pypvt' command-line tool is called.
@@ -101,6 +146,35 @@ def main() -> None:
         default=20,
     )
 
+    parser_checks.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of parallel processes used to evaluate equil regions. "
+        "(default = 1)",
+        default=1,
+    )
+
+    parser_checks.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the on-disk cache of data parsed from ecl_case.",
+    )
+
+    parser_checks.add_argument(
+        "--eqlnum",
+        type=_eqlnum_list,
+        help="Comma separated list of equil regions to check, eg. 3,7. "
+        "(default = all active regions)",
+    )
+
+    parser_checks.add_argument(
+        "--report",
+        type=pathlib.Path,
+        help="Write the consistency report to file, as JSON lines, "
+        "or as Parquet if the name ends with .parquet.",
+    )
+
     parser_checks.set_defaults(func=pvt_consistency_check)
 
     parser_adjust = subparsers.add_parser(
@@ -160,8 +234,67 @@ def main() -> None:
         help="Name of consistent output table",
     )
 
+    parser_adjust.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the on-disk cache of data parsed from ecl_case.",
+    )
+
     parser_adjust.set_defaults(func=pvt_consistency_adjustment)
 
+    parser_ensemble = subparsers.add_parser(
+        "ensemble",
+        help="Run check and consistency algorithms on an ensemble of realisations "
+        "sharing one simulation case.",
+    )
+
+    parser_ensemble.add_argument(
+        "--ecl_case",
+        required=True,
+        type=pathlib.Path,
+        help="""Path to eclipse deck shared by the realisations, read once.""",
+    )
+
+    parser_ensemble.add_argument(
+        "realisations",
+        nargs="+",
+        type=pathlib.Path,
+        help="""Realisation directories with files overriding kws of ecl_case,
+        named by the kw, eg. rsvd.inc, rvvd.inc, equil.inc or pvt.inc.""",
+    )
+
+    parser_ensemble.add_argument(
+        "-n",
+        "--nodes",
+        type=int,
+        help="Number of depth nodes to be used in the calculation. (default = 20)",
+        default=20,
+    )
+
+    parser_ensemble.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of parallel processes used to evaluate realisations. "
+        "(default = 1)",
+        default=1,
+    )
+
+    parser_ensemble.add_argument(
+        "--output",
+        required=True,
+        type=pathlib.Path,
+        help="Name of output csv table, one row per realisation and equil region",
+    )
+
+    parser_ensemble.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the on-disk cache of data parsed from ecl_case.",
+    )
+
+    parser_ensemble.set_defaults(func=pvt_ensemble_check)
+
     args = parser.parse_args()
     args.func(args)
 
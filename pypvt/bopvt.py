@@ -2,7 +2,14 @@
 
 import numpy as np
 
-from scipy.interpolate import interp1d
+from pypvt.pvt_index import (
+    bracket,
+    build_pvtg_index,
+    build_pvto_index,
+    outlier,
+    segment_interp,
+    to_output,
+)
 
 # pylint: disable=invalid-name
 # pylint: disable=too-many-arguments
@@ -14,6 +21,46 @@ from scipy.interpolate import interp1d
 
 # =============================================================================
 
+# Columns of the PVT keywords in the ecl2df PVT dataframe, as used by BoPVT
+PVT_COLUMNS = {
+    "PVTO": ["RS", "PRESSURE", "VOLUMEFACTOR", "VISCOSITY"],
+    "PVTG": ["PRESSURE", "OGR", "VOLUMEFACTOR", "VISCOSITY"],
+    "PVTW": [
+        "PRESSURE",
+        "VOLUMEFACTOR",
+        "COMPRESSIBILITY",
+        "VISCOSITY",
+        "VISCOSIBILITY",
+    ],
+    "DENSITY": ["OILDENSITY", "GASDENSITY", "WATERDENSITY"],
+}
+
+
+def partition_pvt(pvt_df):
+    """
+    Partitions an ecl2df PVT dataframe into one contiguous float array per
+    keyword and PVTNUM, with the PVT_COLUMNS of the keyword, keeping table
+    order. The dataframe is grouped once, and each keyword's columns are
+    converted to an array once.
+
+    Returns dict of arrays keyed on (keyword, pvtnum)
+    """
+
+    tables = {}
+    if pvt_df.empty:
+        return tables
+
+    groups = pvt_df.groupby(["KEYWORD", "PVTNUM"], sort=False).indices
+    blocks = {}
+    for (keyword, pvtnum), rows in groups.items():
+        if keyword not in PVT_COLUMNS:
+            continue
+        if keyword not in blocks:
+            blocks[keyword] = pvt_df[PVT_COLUMNS[keyword]].to_numpy(dtype=float)
+        tables[(keyword, int(pvtnum))] = blocks[keyword][rows]
+
+    return tables
+
 
 class BoPVT:
     """
@@ -29,6 +76,10 @@ class BoPVT:
 
     PRINT_WARNING = False  # Prints warnings input is outside PVT table range
 
+    # Undersaturated PVTO interpolation between Rs nodes, either at constant
+    # "pressure" or at constant pressure "offset" above the bubble-points
+    USAT_INTERPOLATION = "pressure"
+
     # -|-----------------------------------------------------------------------
     def __init__(
         self,
@@ -49,15 +100,67 @@ class BoPVT:
         self.sdeng = sdeng
         self.sdenw = sdenw
 
-        # E100-PVT tables (2D numpy arrays)
-        self.pvto = pvto_arr  # PVTO table containing RS, pres, Bo and Viso )
-        self.pvtg = pvtg_arr  # PVTG table containing pres, rv, Bg and Visg )
+        # E100-PVT tables (2D numpy arrays): PVTO containing RS, pres, Bo and
+        # Viso, and PVTG containing pres, rv, Bg and Visg, kept with their
+        # search index as (table, index) keyed on keyword
+        self._tables = {}
+        self._set_table("PVTO", pvto_arr)
+        self._set_table("PVTG", pvtg_arr)
         self.pvtw = pvtw_arr  # PVTW table containing pref, Bwref, Cw visw_ref and Cv
 
         self.pvt_logger = pvt_logger
         self.calc_rs_warning = False
         self.calc_pbub_warning = False
 
+    # ------------------------------------------------------------------------
+    @property
+    def pvto(self):
+        """PVTO table (2D numpy array) containing RS, pres, Bo and Viso"""
+        return self._tables["PVTO"][0]
+
+    @pvto.setter
+    def pvto(self, pvto_arr):
+        """Sets the PVTO table and (re)builds the saturated PVTO index"""
+        self._set_table("PVTO", pvto_arr)
+
+    @property
+    def _pvto_index(self):
+        """Saturated PVTO index, see build_pvto_index"""
+        return self._tables["PVTO"][1]
+
+    # ------------------------------------------------------------------------
+    @property
+    def pvtg(self):
+        """PVTG table (2D numpy array) containing pres, rv, Bg and Visg"""
+        return self._tables["PVTG"][0]
+
+    @pvtg.setter
+    def pvtg(self, pvtg_arr):
+        """Sets the PVTG table and (re)builds the PVTG index"""
+        self._set_table("PVTG", pvtg_arr)
+
+    @property
+    def _pvtg_index(self):
+        """PVTG index, see build_pvtg_index"""
+        return self._tables["PVTG"][1]
+
+    def _set_table(self, keyword, table):
+        """Sets the PVTO or PVTG table and (re)builds its index"""
+        build_index = {"PVTO": build_pvto_index, "PVTG": build_pvtg_index}[keyword]
+        index = None if table is None else build_index(table)
+        self._tables[keyword] = (table, index)
+
+    # ------------------------------------------------------------------------
+    @property
+    def rs_nodes(self):
+        """Rs nodes (ascending) of the saturated PVTO table, see calc_pbub"""
+        return None if self._pvto_index is None else self._pvto_index.rs
+
+    @property
+    def rv_nodes(self):
+        """rv nodes (ascending) of the saturated PVTG table, see calc_pdew"""
+        return None if self._pvtg_index is None else self._pvtg_index.rv_sorted
+
     # ------------------------------------------------------------------------
     def set_PRINT_WARNING(self, print_warning=True):
 
@@ -67,6 +170,19 @@ class BoPVT:
         """
         self.PRINT_WARNING = print_warning
 
+    # ------------------------------------------------------------------------
+    def set_USAT_INTERPOLATION(self, usat_interpolation="pressure"):
+
+        """
+        Set undersaturated PVTO interpolation option ("pressure" or "offset")
+
+        """
+        if usat_interpolation not in ("pressure", "offset"):
+            raise ValueError(
+                "Unrecognized undersaturated interpolation " + usat_interpolation
+            )
+        self.USAT_INTERPOLATION = usat_interpolation
+
     # ------------------------------------------------------------------------
     def set_pvtnum(self, pvtnum):
 
@@ -83,50 +199,32 @@ class BoPVT:
         """
 
         if not df_dict["PVT"].empty:
-            pvt_df = df_dict["PVT"]
+            self.init_from_tables(partition_pvt(df_dict["PVT"]))
 
-            if "PVTO" in pvt_df["KEYWORD"].unique():
-                self.set_pvto_from_df(
-                    pvt_df[pvt_df["KEYWORD"] == "PVTO"][
-                        ["RS", "PRESSURE", "VOLUMEFACTOR", "VISCOSITY", "PVTNUM"]
-                    ]
-                )
-            else:
-                raise ValueError("PVTO not found in PVT dataframe")
-
-            if "PVTG" in pvt_df["KEYWORD"].unique():
-                self.set_pvtg_from_df(
-                    pvt_df[pvt_df["KEYWORD"] == "PVTG"][
-                        ["PRESSURE", "OGR", "VOLUMEFACTOR", "VISCOSITY", "PVTNUM"]
-                    ]
-                )
-            else:
-                raise ValueError("PVTG not found in PVT dataframe")
-
-            if "PVTW" in pvt_df["KEYWORD"].unique():
-                self.set_pvtw_from_df(
-                    pvt_df[pvt_df["KEYWORD"] == "PVTW"][
-                        [
-                            "PRESSURE",
-                            "VOLUMEFACTOR",
-                            "COMPRESSIBILITY",
-                            "VISCOSITY",
-                            "VISCOSIBILITY",
-                            "PVTNUM",
-                        ]
-                    ]
-                )
-            else:
-                raise ValueError("PVTW not found in PVT dataframe")
-
-            if "DENSITY" in pvt_df["KEYWORD"].unique():
-                self.set_densities_from_df(
-                    pvt_df[pvt_df["KEYWORD"] == "DENSITY"][
-                        ["OILDENSITY", "GASDENSITY", "WATERDENSITY", "PVTNUM"]
-                    ]
+    # ------------------------------------------------------------------------
+    def init_from_tables(self, tables):
+
+        """
+        Initialize the BoPVT instance from PVT tables partitioned on keyword
+        and PVTNUM, see partition_pvt
+        """
+
+        if self.pvtnum is None:
+            raise ValueError("ERROR: PVTNUM not set")
+
+        keywords = {keyword for keyword, _ in tables}
+        for keyword in PVT_COLUMNS:
+            if keyword not in keywords:
+                raise ValueError(keyword + " not found in PVT dataframe")
+            if (keyword, self.pvtnum) not in tables:
+                raise ValueError(
+                    "PVTNUM not found in " + keyword + " dataframe " + str(self.pvtnum)
                 )
-            else:
-                raise ValueError("DENSITY not found in PVT dataframe")
+
+        self._set_table("PVTO", tables[("PVTO", self.pvtnum)])
+        self._set_table("PVTG", tables[("PVTG", self.pvtnum)])
+        self.pvtw = tables[("PVTW", self.pvtnum)]
+        self.sdeno, self.sdeng, self.sdenw = tables[("DENSITY", self.pvtnum)][0]
 
     # ------------------------------------------------------------------------
     def set_densities_from_df(self, eql_df):
@@ -164,7 +262,7 @@ class BoPVT:
         except ValueError:
             print("Required dataframe columns headers are: " + str(required_cols))
 
-        self.pvtg = df.to_numpy()
+        self._set_table("PVTG", df.to_numpy())
 
     # ------------------------------------------------------------------------
     def set_pvto_from_df(self, eql_df):
@@ -185,7 +283,7 @@ class BoPVT:
         except ValueError:
             print("Required dataframe columns headers are: " + str(required_cols))
 
-        self.pvto = df.to_numpy()
+        self._set_table("PVTO", df.to_numpy())
 
     # ------------------------------------------------------------------------
     def set_pvtw_from_df(self, eql_df):
@@ -231,64 +329,70 @@ class BoPVT:
     # -------------------------------------------------------------------------
     def calc_rs(self, pbub):
         """
-        Returns Rs (solution gas-oil-ratio) for given bubble-point pressure
+        Returns Rs (solution gas-oil-ratio) for given bubble-point pressure(s)
 
         Based on linear interpolation in PVTO table.
 
         NB: Does not allow extrapolation outside table ranges
 
         """
-        pvto = self.pvto
-
-        rs_tab = np.unique(pvto[:, 0], axis=0)
+        pbub = np.asarray(pbub, dtype=float)
 
-        pb_tab = []
-        for rs in rs_tab:
-            pressures = [r[1] for r in pvto if r[0] == rs]
-            pb_tab.append(pressures[0])
+        rs_tab = self._pvto_index.rs
+        pb_tab = self._pvto_index.pbub
 
-        if pbub > max(pb_tab) or pbub < min(pb_tab):
+        if np.any((pbub > pb_tab.max()) | (pbub < pb_tab.min())):
 
             msg = "{} of {:6.1f} outside PVT table interval [{:6.1f} , {:6.1f}]".format(
-                "Pbub", pbub, min(pb_tab), max(pb_tab)
+                "Pbub", outlier(pbub, pb_tab), pb_tab.min(), pb_tab.max()
             )
             if not self.calc_rs_warning:
-                self.pvt_logger.warning(msg, extra={"pvtnum": self.pvtnum})
+                self.pvt_logger.warning(
+                    msg,
+                    extra={
+                        "pvtnum": self.pvtnum,
+                        "check": "PBUB_OUTSIDE_TABLE",
+                        "values": {"pbub": float(outlier(pbub, pb_tab))},
+                    },
+                )
                 self.calc_rs_warning = True
                 print("\nERROR:", msg)
             raise ValueError("Pbub outside PVTO table interval")
 
         rs = np.interp(pbub, pb_tab, rs_tab)
 
-        return rs
+        return to_output(rs)
 
     # -------------------------------------------------------------------------
     def calc_pbub(self, rs):
         """
-        Returns bubble-point for given solution oil-gas-ratio
+        Returns bubble-point(s) for given solution oil-gas-ratio(s)
 
         Based on linear interpolation in PVTO table.
 
         NB: Does not allow extrapolation outside PVTO range
 
         """
-        pvto = self.pvto
+        rs = np.asarray(rs, dtype=float)
 
-        rs_tab = np.unique(pvto[:, 0], axis=0)
+        rs_tab = self._pvto_index.rs
+        pb_tab = self._pvto_index.pbub
 
-        pb_tab = []
-        for rst in rs_tab:
-            pressures = [r[1] for r in pvto if r[0] == rst]
-            pb_tab.append(pressures[0])
-
-        if rs > max(rs_tab) or rs < min(rs_tab):
+        if np.any((rs > rs_tab.max()) | (rs < rs_tab.min())):
 
             msg = "{} of {:6.2f} outside PVT table interval [{:6.2f} , {:6.2f}]".format(
-                "RS", rs, min(rs_tab), max(rs_tab)
+                "RS", outlier(rs, rs_tab), rs_tab.min(), rs_tab.max()
             )
 
             if not self.calc_pbub_warning:
-                self.pvt_logger.warning(msg, extra={"pvtnum": self.pvtnum})
+                self.pvt_logger.warning(
+                    msg,
+                    extra={
+                        "pvtnum": self.pvtnum,
+                        "check": "RS_OUTSIDE_TABLE",
+                        "values": {"rs": float(outlier(rs, rs_tab))},
+                    },
+                )
                 self.calc_pbub_warning = True
                 print("\nWARNING:", msg)
 
@@ -296,213 +400,188 @@ class BoPVT:
 
         pbub = np.interp(rs, rs_tab, pb_tab)
 
-        return pbub
+        return to_output(pbub)
 
     # -------------------------------------------------------------------------
-    def calc_bo(self, pres, **kwargs):
+    def _oil_state(self, pres, kwargs, func_name):
         """
-        Returns Bo for given pressure (and optionally rs OR pbub)
-
-        If only pressure is given, the saturated Bo is returned
+        Returns (pres, rs, usat) arrays for a PVTO property call, where usat
+        masks the undersaturated entries (bubble-point below pressure).
 
-        NB: Does not allow extrapolation outside PVTO table range
+        rs is only set for the undersaturated entries.
         """
 
         if len(kwargs) > 1:
-            raise ValueError("Too many arguments in function call to calc_bo")
+            raise ValueError("Too many arguments in function call to " + func_name)
 
-        pvto = self.pvto
+        pres = np.asarray(pres, dtype=float)
 
-        # ---------------------------------------------------------------------
-        # Return saturated BO
-        # ---------------------------------------------------------------------
         if len(kwargs) == 0:
+            return pres, np.full(pres.shape, np.nan), np.zeros(pres.shape, dtype=bool)
 
-            rs_tab = np.unique(pvto[:, 0], axis=0)
-
-            pb_tab = []
-            sat_bo_tab = []
-
-            for rst in rs_tab:
-                pressures = [r[1] for r in pvto if r[0] == rst]
-                pb_tab.append(pressures[0])
+        arg_name = list(kwargs.keys())[0]
 
-                bos = [r[2] for r in pvto if r[0] == rst]
-                sat_bo_tab.append(bos[0])
+        if arg_name == "rs":
+            rs = np.asarray(kwargs[arg_name], dtype=float)
+            pbub = np.asarray(self.calc_pbub(rs))
 
-            if pres < min(pb_tab) or pres > max(pb_tab):
-                raise ValueError("Saturation pressure outside PVTO table range")
+        elif arg_name == "pbub":
+            rs = None
+            pbub = np.asarray(kwargs[arg_name], dtype=float)
 
-            bo = np.interp(pres, pb_tab, sat_bo_tab)
-
-        # ---------------------------------------------------------------------
-        # Return undersaturated BO
-        # ---------------------------------------------------------------------
         else:
+            raise ValueError("Unrecognized argument " + arg_name)
 
-            arg_name = list(kwargs.keys())[0]
-
-            if arg_name == "rs":
-                rs = kwargs[arg_name]
-                pbub = self.calc_pbub(rs)
-
-                if pbub > pres:
-                    print("RS = ", rs, "PBUB =", pbub)
-                    raise ValueError("Rs gives pbub higher than reservoir pressure")
-
-            elif arg_name == "pbub":
-                pbub = kwargs[arg_name]
-
-                if pbub > pres:
-                    raise ValueError("Bubble-point higher than reservoir pressure")
+        shape = np.broadcast(pres, pbub).shape
+        pres = np.broadcast_to(pres, shape)
+        pbub = np.broadcast_to(pbub, shape)
 
-                rs = self.calc_rs(pbub)
+        usat = pbub < pres
 
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
-
-            # NOTE: If speed is an issue - the following interpolation
-            # should be done smarter
-
-            rs_tab = np.unique(pvto[:, 0], axis=0)
-
-            bo_tab = []
-
-            # Interpolate for all undersaturated pressures entries
-            for rst in rs_tab:
-                pressures = [r[1] for r in pvto if r[0] == rst]
-                bos = [r[2] for r in pvto if r[0] == rst]
-
-                bo = np.interp(pres, pressures, bos)
-                bo_tab.append(bo)
-
-            bo = np.interp(rs, rs_tab, bo_tab)
+        if rs is None:
+            rs = np.full(shape, np.nan)
+            rs[usat] = self.calc_rs(pbub[usat])
+        else:
+            rs = np.broadcast_to(rs, shape)
 
-        return bo
+        return pres, rs, usat
 
     # -------------------------------------------------------------------------
-    def calc_viso(self, pres, **kwargs):
+    def _sat_oil_prop(self, pres, prop_tab):
         """
-        Returns Viso for given pressure (and optionally rs OR pbub)
+        Returns saturated PVTO property at given pressures
 
-        If only pressure is given, the saturated Viso is returned
-
-        NB: Uses constant extraplation outside table ranges - This should
-        be updated
+        NB: Does not allow extrapolation outside PVTO table range
         """
 
-        if len(kwargs) > 1:
-            raise ValueError("Too many arguments in function call to calc_bo")
+        pb_tab = self._pvto_index.pbub
 
-        pvto = self.pvto
+        if np.any((pres < pb_tab.min()) | (pres > pb_tab.max())):
+            raise ValueError("Saturation pressure outside PVTO table range")
 
-        # ---------------------------------------------------------------------
-        # Return saturated viso
-        # ---------------------------------------------------------------------
-        if len(kwargs) == 0:
+        return np.interp(pres, pb_tab, prop_tab)
 
-            rs_tab = np.unique(pvto[:, 0], axis=0)
+    # -------------------------------------------------------------------------
+    def _usat_oil_prop(self, pres, rs, prop_tab):
+        """
+        Returns undersaturated PVTO property at given pressures and rs
 
-            pb_tab = []
-            sat_viso_tab = []
+        Bilinear interpolation: only the undersaturated branches of the two
+        Rs nodes bracketing rs are interpolated in pressure, before
+        interpolating linearly in rs between them.
 
-            for rst in rs_tab:
-                pressures = [r[1] for r in pvto if r[0] == rst]
-                pb_tab.append(pressures[0])
+        With USAT_INTERPOLATION = "offset", the two branches are evaluated at
+        the same pressure offset above their own bubble-points (Eclipse-style
+        shifted branches), rather than at the same pressure.
+        """
 
-                visos = [r[3] for r in pvto if r[0] == rst]
-                sat_viso_tab.append(visos[0])
+        pvto_index = self._pvto_index
 
-            if pres < min(pb_tab) or pres > max(pb_tab):
-                raise ValueError("Saturation pressure outside PVTO table range")
+        lower, upper, weight = bracket(rs, pvto_index.rs)
 
-            viso = np.interp(pres, pb_tab, sat_viso_tab)
+        pres_lower = pres
+        pres_upper = pres
 
-        # ---------------------------------------------------------------------
-        # Return undersaturated viso
-        # ---------------------------------------------------------------------
-        else:
+        if self.USAT_INTERPOLATION == "offset":
+            dp = pres - np.interp(rs, pvto_index.rs, pvto_index.pbub)
+            pres_lower = pvto_index.pbub[lower] + dp
+            pres_upper = pvto_index.pbub[upper] + dp
 
-            arg_name = list(kwargs.keys())[0]
+        elif self.USAT_INTERPOLATION != "pressure":
+            raise ValueError(
+                "Unrecognized undersaturated interpolation " + self.USAT_INTERPOLATION
+            )
 
-            if arg_name == "rs":
-                rs = kwargs[arg_name]
-                pbub = self.calc_pbub(rs)
+        prop_lower = segment_interp(
+            pres_lower,
+            lower,
+            prop_tab,
+            offsets=pvto_index.offsets,
+            x_tab=pvto_index.pres_tab,
+            segment_key=pvto_index.pres_key,
+        )
+        prop_upper = segment_interp(
+            pres_upper,
+            upper,
+            prop_tab,
+            offsets=pvto_index.offsets,
+            x_tab=pvto_index.pres_tab,
+            segment_key=pvto_index.pres_key,
+        )
+
+        return (1.0 - weight) * prop_lower + weight * prop_upper
 
-                if pbub > pres:
-                    print("RS = ", rs, "PBUB =", pbub)
-                    raise ValueError("Rs gives pbub higher than reservoir pressure")
+    # -------------------------------------------------------------------------
+    def calc_bo(self, pres, **kwargs):
+        """
+        Returns Bo for given pressure(s) (and optionally rs OR pbub)
 
-            elif arg_name == "pbub":
-                pbub = kwargs[arg_name]
+        If only pressure is given, the saturated Bo is returned. Entries where
+        the given rs/pbub gives a bubble-point at or above the pressure are
+        returned as saturated at that pressure.
 
-                if pbub > pres:
-                    raise ValueError("Bubble-point higher than reservoir pressure")
+        NB: Does not allow extrapolation outside PVTO table range
+        """
 
-                rs = self.calc_rs(pbub)
+        pres, rs, usat = self._oil_state(pres, kwargs, "calc_bo")
 
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
+        bo = np.empty(pres.shape)
+        bo[~usat] = self._sat_oil_prop(pres[~usat], self._pvto_index.bo)
+        bo[usat] = self._usat_oil_prop(pres[usat], rs[usat], self._pvto_index.bo_tab)
 
-            # NOTE: If speed is an issue - the following interpolation
-            # should be done smarter
+        return to_output(bo)
 
-            rs_tab = np.unique(pvto[:, 0], axis=0)
+    # -------------------------------------------------------------------------
+    def calc_viso(self, pres, **kwargs):
+        """
+        Returns Viso for given pressure(s) (and optionally rs OR pbub)
 
-            viso_tab = []
+        If only pressure is given, the saturated Viso is returned. Entries
+        where the given rs/pbub gives a bubble-point at or above the pressure
+        are returned as saturated at that pressure.
 
-            # Interpolate for all undersaturated pressures entries
-            for rst in rs_tab:
-                pressures = [r[1] for r in pvto if r[0] == rst]
-                visos = [r[3] for r in pvto if r[0] == rst]
+        NB: Uses constant extraplation outside table ranges - This should
+        be updated
+        """
 
-                viso = np.interp(pres, pressures, visos)
-                viso_tab.append(viso)
+        pres, rs, usat = self._oil_state(pres, kwargs, "calc_viso")
 
-            viso = np.interp(rs, rs_tab, viso_tab)
+        viso = np.empty(pres.shape)
+        viso[~usat] = self._sat_oil_prop(pres[~usat], self._pvto_index.viso)
+        viso[usat] = self._usat_oil_prop(
+            pres[usat], rs[usat], self._pvto_index.viso_tab
+        )
 
-        return viso
+        return to_output(viso)
 
     # -------------------------------------------------------------------------
     def calc_deno(self, pres, **kwargs):
         """
-        Returns reservoir oil density for given pressure (and optionally rs OR pbub)
+        Returns reservoir oil density for given pressure(s) (and optionally
+        rs OR pbub)
 
         If only pressure is given, the saturated density is returned
 
         """
 
-        # Calculate rs
-        if len(kwargs) == 0:
-
-            rs = self.calc_rs(pres)
-
-        else:
-
-            arg_name = list(kwargs.keys())[0]
+        pres, rs, usat = self._oil_state(pres, kwargs, "calc_deno")
 
-            if arg_name == "rs":
+        rs_eff = np.empty(pres.shape)
+        rs_eff[~usat] = self.calc_rs(pres[~usat])
+        rs_eff[usat] = rs[usat]
 
-                rs = kwargs[arg_name]
+        bo = np.empty(pres.shape)
+        bo[~usat] = self._sat_oil_prop(pres[~usat], self._pvto_index.bo)
+        bo[usat] = self._usat_oil_prop(pres[usat], rs[usat], self._pvto_index.bo_tab)
 
-            elif arg_name == "pbub":
+        deno = (self.sdeno + rs_eff * self.sdeng) / bo
 
-                pbub = kwargs[arg_name]
-                rs = self.calc_rs(pbub)
-
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
-
-        bo = self.calc_bo(pres, **kwargs)
-
-        deno = (self.sdeno + rs * self.sdeng) / bo
-
-        return deno
+        return to_output(deno)
 
     # -------------------------------------------------------------------------
     def calc_rv(self, pdew):
         """
-        Returns rv (solution oil-gas-ratio) for given dew-point pressure
+        Returns rv (solution oil-gas-ratio) for given dew-point pressure(s)
 
         Based on linear interpolation in PVTG table.
 
@@ -510,22 +589,12 @@ class BoPVT:
 
         """
 
-        pvtg = self.pvtg
-
-        pd_tab = []
-        rv_tab = []
+        pdew = np.asarray(pdew, dtype=float)
 
-        p_prev = -1.0
-        for row in pvtg:
-            p = row[0]
-            rvx = row[1]
-            if p != p_prev and rvx not in rv_tab:
-                pd_tab.append(p)
-                rv_tab.append(rvx)
+        pd_tab = self._pvtg_index.pdew
+        rv_tab = self._pvtg_index.rv
 
-            p_prev = p
-
-        if pdew > max(pd_tab) or pdew < min(pd_tab):
+        if np.any((pdew > pd_tab.max()) | (pdew < pd_tab.min())):
 
             # print(
             #    "\nWARNING: %s of %10.3e outside PVT table interval [%10.3e , %10.3e]"
@@ -535,12 +604,12 @@ class BoPVT:
 
         rv = np.interp(pdew, pd_tab, rv_tab)
 
-        return rv
+        return to_output(rv)
 
     # -------------------------------------------------------------------------
     def calc_pdew(self, rv):
         """
-        Returns pdew for given solution oil-gas ratio
+        Returns pdew for given solution oil-gas ratio(s)
 
         Based on linear interpolation in PVTG table.
 
@@ -548,288 +617,213 @@ class BoPVT:
 
         """
 
-        pvtg = self.pvtg
-
-        pd_tab = []
-        rv_tab = []
-
-        p_prev = -1.0
-        for row in pvtg:
-            p = row[0]
-            rvx = row[1]
-            if p != p_prev and rvx not in rv_tab:
-                pd_tab.append(p)
-                rv_tab.append(rvx)
-
-            p_prev = p
-
-        if rv > max(rv_tab) or rv < min(rv_tab):
+        rv = np.asarray(rv, dtype=float)
 
-            # print(
-            #    "\nWARNING: %s of %10.3e outside PVT table interval [%10.3e , %10.3e]"
-            #    % ("Rv", rv, min(rv_tab), max(rv_tab))
-            # )
+        pd_tab = self._pvtg_index.pdew_sorted
+        rv_tab = self._pvtg_index.rv_sorted
 
-            print("UNCOMMENT?")
-            if rv > max(rv_tab):
-                rv = max(rv_tab)
-            if rv < min(rv_tab):
-                rv = min(rv_tab)
+        # NB: rv outside the table range is clamped to the table end points
+        # (np.interp uses constant extrapolation)
 
-            # raise ValueError("Rv outside PVTG table range")
+        # if np.any((rv > rv_tab.max()) | (rv < rv_tab.min())):
+        #    print(
+        #       "\nWARNING: %s of %10.3e outside PVT table interval [%10.3e , %10.3e]"
+        #       % ("Rv", rv, min(rv_tab), max(rv_tab))
+        #    )
+        #    raise ValueError("Rv outside PVTG table range")
 
-        f = interp1d(rv_tab, pd_tab)
-        pdew = f(rv)
+        pdew = np.interp(rv, rv_tab, pd_tab)
 
-        return pdew
+        return to_output(pdew)
 
     # -------------------------------------------------------------------------
-    def calc_bg(self, pres, **kwargs):
+    def _gas_state(self, pres, kwargs, func_name):
         """
-        Returns Bg for given pressure (and optionally rv OR pdew)
-
-        If only pressure is given, the saturated Bg is returned
-
-        NB: Does not allow for extrapolation
+        Returns (pres, rv, usat) arrays for a PVTG property call, where usat
+        masks the undersaturated entries (dew-point below pressure).
 
+        rv is only set for the undersaturated entries.
         """
 
         if len(kwargs) > 1:
-            raise ValueError("Too many arguments in function call to calc_bg")
+            raise ValueError("Too many arguments in function call to " + func_name)
 
-        pvtg = self.pvtg
+        pres = np.asarray(pres, dtype=float)
 
-        # ---------------------------------------------------------------------
-        # Return saturated Bg (note E100 interpolates 1/Bg)
-        # ---------------------------------------------------------------------
         if len(kwargs) == 0:
+            return pres, np.full(pres.shape, np.nan), np.zeros(pres.shape, dtype=bool)
 
-            pd_tab = []
-            rv_tab = []
-            inv_bg_tab = []
-
-            p_prev = -1.0
-            for row in pvtg:
-                p = row[0]
-                rvx = row[1]
-                bg = row[2]
-                if p != p_prev and rvx not in rv_tab:
-                    pd_tab.append(p)
-                    rv_tab.append(rvx)
-                    inv_bg_tab.append(1.0 / bg)
+        arg_name = list(kwargs.keys())[0]
 
-                p_prev = p
+        if arg_name == "rv":
+            rv = np.asarray(kwargs[arg_name], dtype=float)
+            pdew = np.asarray(self.calc_pdew(rv))
 
-            if pres > max(pd_tab) or pres < min(pd_tab):
-                raise ValueError("Pdew outside PVTG table range")
+        elif arg_name == "pdew":
+            rv = None
+            pdew = np.asarray(kwargs[arg_name], dtype=float)
 
-            inv_bg = np.interp(pres, pd_tab, inv_bg_tab)
-            bg = 1.0 / inv_bg
-
-        # ---------------------------------------------------------------------
-        # Return undersaturated Bg
-        # ---------------------------------------------------------------------
         else:
+            raise ValueError("Unrecognized argument " + arg_name)
 
-            arg_name = list(kwargs.keys())[0]
-
-            if arg_name == "rv":
-                rv = kwargs[arg_name]
-                pdew = self.calc_pdew(rv)
-
-                if pdew > pres:
-                    print("Rv = ", rv, "PDEW =", pdew)
-                    raise ValueError("Rv gives pdew higher than reservoir pressure")
-
-            elif arg_name == "pdew":
-                pdew = kwargs[arg_name]
-
-                if pdew > pres:
-                    raise ValueError("Dew-point higher than reservoir pressure")
-
-                rv = self.calc_rv(pdew)
-
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
+        shape = np.broadcast(pres, pdew).shape
+        pres = np.broadcast_to(pres, shape)
+        pdew = np.broadcast_to(pdew, shape)
 
-            # NOTE: If speed is an issue - the following interpolation
-            # should be done smarter
+        usat = pdew < pres
 
-            p_tab = np.unique(pvtg[:, 0], axis=0)  # include all pressure entries
-
-            inv_bg_tab = []
-
-            # Interpolate for all rv
-            for p in p_tab:
-                rvt = [
-                    r[1] for r in pvtg if r[0] == p
-                ]  # pick up all rvs for given pressure
-                inv_bgt = [1.0 / r[2] for r in pvtg if r[0] == p]
-
-                if len(rvt) <= 1:
-                    inv_bg = inv_bgt[0]
-
-                else:
-                    f = interp1d(rvt, inv_bgt)
-                    x = max(min(rvt), rv)
-                    x = min(max(rvt), x)
-                    inv_bg = f(x)
-
-                inv_bg_tab.append(inv_bg)
-
-            inv_bg = np.interp(pres, p_tab, inv_bg_tab)
-            bg = 1.0 / inv_bg
+        if rv is None:
+            rv = np.full(shape, np.nan)
+            rv[usat] = self.calc_rv(pdew[usat])
+        else:
+            rv = np.broadcast_to(rv, shape)
 
-        return bg
+        return pres, rv, usat
 
     # -------------------------------------------------------------------------
-    def calc_deng(self, pres, **kwargs):
+    def _sat_gas_inv_prop(self, pres, inv_prop_tab):
         """
-        Returns reservoir gas density for given pressure (and optionally rv OR pdew)
+        Returns saturated inverse PVTG property (1/Bg or 1/(Bg*Visg)) at given
+        pressures
 
-        If only pressure is given, the saturated density is returned
+        NB: Does not allow for extrapolation
         """
 
-        # Calculate rv
-        if len(kwargs) == 0:
-
-            rv = self.calc_rv(pres)
-
-        else:
-
-            arg_name = list(kwargs.keys())[0]
+        pd_tab = self._pvtg_index.pdew
 
-            if arg_name == "rv":
+        if np.any((pres > pd_tab.max()) | (pres < pd_tab.min())):
+            raise ValueError("Pdew outside PVTG table range")
 
-                rv = kwargs[arg_name]
+        return np.interp(pres, pd_tab, inv_prop_tab)
 
-            elif arg_name == "pdew":
+    # -------------------------------------------------------------------------
+    def _usat_gas_inv_prop(self, pres, rv, inv_prop_tab):
+        """
+        Returns undersaturated inverse PVTG property at given pressures and rv,
+        where inv_prop_tab is the inverse property column of the wet-gas
+        branches in the PVTG index
 
-                pdew = kwargs[arg_name]
-                rv = self.calc_rv(pdew)
+        Only the branches of the two pressure nodes bracketing each pressure
+        are interpolated in rv (clamped to the branch rv range, and constant
+        for single-row branches), before interpolating in pressure.
+        """
 
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
+        pvtg_index = self._pvtg_index
 
-        bg = self.calc_bg(pres, **kwargs)
+        lower, upper, weight = bracket(pres, pvtg_index.p_nodes)
 
-        deng = (self.sdeng + rv * self.sdeno) / bg
+        inv_prop_lower = segment_interp(
+            rv,
+            lower,
+            inv_prop_tab,
+            offsets=pvtg_index.offsets,
+            x_tab=pvtg_index.rv_tab,
+            segment_key=pvtg_index.rv_key,
+        )
+        inv_prop_upper = segment_interp(
+            rv,
+            upper,
+            inv_prop_tab,
+            offsets=pvtg_index.offsets,
+            x_tab=pvtg_index.rv_tab,
+            segment_key=pvtg_index.rv_key,
+        )
 
-        return deng
+        return (1.0 - weight) * inv_prop_lower + weight * inv_prop_upper
 
     # -------------------------------------------------------------------------
-    def calc_visg(self, pres, **kwargs):
+    def calc_bg(self, pres, **kwargs):
         """
+        Returns Bg for given pressure(s) (and optionally rv OR pdew)
 
-        Returns reservoir gas viscosity for given pressure (and optionally rv OR pdew)
+        If only pressure is given, the saturated Bg is returned. Entries where
+        the given rv/pdew gives a dew-point at or above the pressure are
+        returned as saturated at that pressure.
 
-        If only pressure is given, the saturated viscosity is returned
+        NB: Does not allow for extrapolation
 
-        Note: E100 Interpolates as 1/(Bg*visg)
         """
 
-        if len(kwargs) > 1:
-            raise ValueError("Too many arguments in function call to calc_visg")
-
-        pvtg = self.pvtg
-
-        # ---------------------------------------------------------------------
-        # Return saturated Visg (note E100 interpolates 1/(Bg*Visg)
-        # ---------------------------------------------------------------------
-        if len(kwargs) == 0:
-
-            pd_tab = []
-            rv_tab = []
-            inv_bv_tab = []
-
-            p_prev = -1.0
-            for row in pvtg:
-                p = row[0]
-                rvx = row[1]
-                b = row[2]
-                v = row[3]
-                if p != p_prev and rvx not in rv_tab:
-                    pd_tab.append(p)
-                    rv_tab.append(rvx)
-                    inv_bv_tab.append(1.0 / (b * v))
+        pres, rv, usat = self._gas_state(pres, kwargs, "calc_bg")
 
-                p_prev = p
+        return to_output(1.0 / self._inv_bg(pres, rv, usat))
 
-            if pres > max(pd_tab) or pres < min(pd_tab):
-                raise ValueError("Pdew outside PVTG table range")
-
-            inv_bv = np.interp(pres, pd_tab, inv_bv_tab)
-
-            bg = self.calc_bg(pres, **kwargs)
+    # -------------------------------------------------------------------------
+    def _inv_bg(self, pres, rv, usat):
+        """
+        Returns 1/Bg for a given gas state (note E100 interpolates 1/Bg)
+        """
 
-            visg = 1.0 / (inv_bv * bg)
+        pvtg_index = self._pvtg_index
 
-        # ---------------------------------------------------------------------
-        # Return undersaturated Visg
-        # ---------------------------------------------------------------------
-        else:
+        inv_bg = np.empty(pres.shape)
+        inv_bg[~usat] = self._sat_gas_inv_prop(pres[~usat], pvtg_index.inv_bg)
+        inv_bg[usat] = self._usat_gas_inv_prop(
+            pres[usat], rv[usat], pvtg_index.inv_bg_tab
+        )
 
-            arg_name = list(kwargs.keys())[0]
+        return inv_bg
 
-            if arg_name == "rv":
-                rv = kwargs[arg_name]
-                pdew = self.calc_pdew(rv)
+    # -------------------------------------------------------------------------
+    def calc_deng(self, pres, **kwargs):
+        """
+        Returns reservoir gas density for given pressure(s) (and optionally
+        rv OR pdew)
 
-                if pdew > pres:
-                    print("Rv = ", rv, "PDEW =", pdew)
-                    raise ValueError("Rv gives pdew higher than reservoir pressure")
+        If only pressure is given, the saturated density is returned
+        """
 
-            elif arg_name == "pdew":
-                pdew = kwargs[arg_name]
+        pres, rv, usat = self._gas_state(pres, kwargs, "calc_deng")
 
-                if pdew > pres:
-                    raise ValueError("Dew-point higher than reservoir pressure")
+        rv_eff = np.empty(pres.shape)
+        rv_eff[~usat] = self.calc_rv(pres[~usat])
+        rv_eff[usat] = rv[usat]
 
-                rv = self.calc_rv(pdew)
+        inv_bg = self._inv_bg(pres, rv, usat)
 
-            else:
-                raise ValueError("Unrecognized argument " + arg_name)
+        deng = (self.sdeng + rv_eff * self.sdeno) * inv_bg
 
-            # NOTE: If speed is an issue - the following interpolation
-            # should be done smarter
+        return to_output(deng)
 
-            pd_tab = np.unique(pvtg[:, 0], axis=0)
+    # -------------------------------------------------------------------------
+    def calc_visg(self, pres, **kwargs):
+        """
 
-            inv_bv_tab = []
+        Returns reservoir gas viscosity for given pressure(s) (and optionally
+        rv OR pdew)
 
-            # Interpolate for rv, all pressures
-            for p in pd_tab:
-                rvt = [r[1] for r in pvtg if r[0] == p]
-                inv_bvt = [1.0 / (r[2] * r[3]) for r in pvtg if r[0] == p]
+        If only pressure is given, the saturated viscosity is returned
 
-                if len(rvt) <= 1:
-                    inv_bv = inv_bvt[0]
+        Note: E100 Interpolates as 1/(Bg*visg)
+        """
 
-                else:
-                    f = interp1d(rvt, inv_bvt)
-                    x = max(min(rvt), rv)
-                    x = min(max(rvt), x)
-                    inv_bv = f(x)
+        pres, rv, usat = self._gas_state(pres, kwargs, "calc_visg")
 
-                inv_bv_tab.append(inv_bv)
+        pvtg_index = self._pvtg_index
 
-            inv_bv = np.interp(pres, pd_tab, inv_bv_tab)
+        inv_bv = np.empty(pres.shape)
+        inv_bv[~usat] = self._sat_gas_inv_prop(pres[~usat], pvtg_index.inv_bv)
+        inv_bv[usat] = self._usat_gas_inv_prop(
+            pres[usat], rv[usat], pvtg_index.inv_bv_tab
+        )
 
-            bg = self.calc_bg(pres, **kwargs)
+        inv_bg = self._inv_bg(pres, rv, usat)
 
-            visg = 1.0 / (inv_bv * bg)
+        visg = inv_bg / inv_bv
 
-        return visg
+        return to_output(visg)
 
     # -------------------------------------------------------------------------
     def calc_bw(self, pres):
         """
 
-        Returns reservoir water Bw for given pressure
+        Returns reservoir water Bw for given pressure(s)
 
         Uses E100 method for calculating Bw
         """
 
+        pres = np.asarray(pres, dtype=float)
+
         p_ref = self.pvtw[0, 0]
         bw_ref = self.pvtw[0, 1]
         cw = self.pvtw[0, 2]
@@ -838,13 +832,13 @@ class BoPVT:
 
         bw = bw_ref / (1.0 + x + (x * x / 2.0))
 
-        return bw
+        return to_output(bw)
 
     # -------------------------------------------------------------------------
     def calc_denw(self, pres):
         """
 
-        Returns reservoir water density for given pressure
+        Returns reservoir water density for given pressure(s)
 
         Uses E100 method for calculating Bw
         """
@@ -853,17 +847,19 @@ class BoPVT:
 
         denw = self.sdenw / bw
 
-        return denw
+        return to_output(denw)
 
     # -------------------------------------------------------------------------
     def calc_visw(self, pres):
         """
 
-        Returns reservoir water viscosity for given pressure
+        Returns reservoir water viscosity for given pressure(s)
 
         Uses E100 method for calculating visw (check PVTW keyword in ECL manual)
         """
 
+        pres = np.asarray(pres, dtype=float)
+
         p_ref = self.pvtw[0, 0]
         bw_ref = self.pvtw[0, 1]
         cw = self.pvtw[0, 2]
@@ -878,4 +874,4 @@ class BoPVT:
 
         visw = bw_visw / bw
 
-        return visw
+        return to_output(visw)
@@ -0,0 +1,233 @@
+"""case_cache module"""
+
+import hashlib
+import mmap
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# Bump when the cached content or layout changes
+CACHE_VERSION = 3
+
+_INCLUDE_RE = re.compile(
+    rb"^[ \t]*INCLUDE\b[^\n]*\n(?:[ \t]*(?:--[^\n]*)?\r?\n)*"
+    rb"[ \t]*(?:'([^'\n]*)'|([^\s/']+))",
+    re.MULTILINE,
+)
+_PATHS_RE = re.compile(
+    rb"^[ \t]*PATHS\b[^\n]*\n(.*?)^[ \t]*/", re.MULTILINE | re.DOTALL
+)
+_ALIAS_RE = re.compile(rb"'([^'\n]*)'\s+'([^'\n]*)'\s*/")
+
+
+def _scan_file(path, root, aliases):
+    """
+    returns: list of include file paths found in an eclipse deck file,
+    relative to the root directory. PATHS aliases found in the file are
+    added to aliases.
+    """
+
+    if not path.is_file() or path.stat().st_size == 0:
+        return []
+
+    with open(path, "rb") as fileh:
+        with mmap.mmap(fileh.fileno(), 0, access=mmap.ACCESS_READ) as text:
+            for paths in _PATHS_RE.finditer(text):
+                for alias, alias_path in _ALIAS_RE.findall(paths.group(1)):
+                    aliases[alias.decode()] = alias_path.decode()
+
+            includes = [
+                (quoted or unquoted).decode()
+                for quoted, unquoted in _INCLUDE_RE.findall(text)
+            ]
+
+    resolved = []
+    for include in includes:
+        for alias, alias_path in aliases.items():
+            include = include.replace("$" + alias, alias_path)
+        resolved.append((root / include).resolve())
+
+    return resolved
+
+
+def case_files(ecl_case):
+    """
+    returns: list of the files an eclipse case is read from, ie the DATA
+    file, all (recursively) included files, and the EGRID and INIT files
+
+    Include paths are resolved relative to the directory of the DATA file,
+    after substitution of PATHS aliases.
+    """
+
+    data_file = pathlib.Path(ecl_case)
+    if data_file.suffix != ".DATA":
+        data_file = pathlib.Path(str(ecl_case).rstrip(".") + ".DATA")
+    data_file = data_file.resolve()
+    eclbase = data_file.with_suffix("")
+
+    files = [data_file]
+    aliases = {}
+    i = 0
+    while i < len(files):
+        for include in _scan_file(files[i], data_file.parent, aliases):
+            if include not in files:
+                files.append(include)
+        i += 1
+
+    return files + [eclbase.with_suffix(".EGRID"), eclbase.with_suffix(".INIT")]
+
+
+def case_key(ecl_case, **options):
+    """
+    returns: cache key (hex digest) for an eclipse case, from the path, size
+    and modification time of all its files, see case_files, and any options
+    affecting the cached content
+    """
+
+    digest = hashlib.sha256()
+    digest.update(str(CACHE_VERSION).encode())
+    for name in sorted(options):
+        digest.update(f"{name}={options[name]}".encode())
+
+    for path in case_files(ecl_case):
+        if path.is_file():
+            stat = path.stat()
+            signature = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            signature = f"{path}:missing"
+        digest.update(signature.encode())
+
+    return digest.hexdigest()
+
+
+def _save_df(filename, df):
+    """
+    Saves a DataFrame as a .npz file with one array per column. Non numeric
+    columns are stored as strings.
+    """
+
+    arrays = {
+        "__columns__": np.array([str(col) for col in df.columns], dtype=str),
+        "__index__": df.index.to_numpy(),
+    }
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype.kind not in "biuf":
+            values = df[col].astype(object).where(df[col].notna(), "")
+            values = values.to_numpy().astype(str)
+        arrays[f"c{i}"] = values
+
+    np.savez(filename, **arrays)
+
+
+def _load_df(filename):
+    """
+    returns: DataFrame saved by _save_df
+    """
+
+    with np.load(filename, allow_pickle=False) as arrays:
+        columns = list(arrays["__columns__"])
+        data = {col: arrays[f"c{i}"] for i, col in enumerate(columns)}
+        return pd.DataFrame(data, index=arrays["__index__"], columns=columns)
+
+
+class CaseCache:
+
+    """On-disk cache of the tables parsed from an eclipse case
+
+    Each entry is a directory, named by the case key, with a .npz file per
+    table (GRID, PVT, EQUIL, ...). Entries are evicted least recently used
+    first when the cache exceeds max_size bytes.
+    """
+
+    def __init__(self, cache_dir=None, max_size=2 * 1024**3):
+        if cache_dir is None:
+            cache_dir = os.environ.get(
+                "PYPVT_CACHE_DIR", pathlib.Path.home() / ".cache" / "pypvt"
+            )
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+
+    def get(self, key):
+        """
+        returns: dict of DataFrames per table for the key, or None if not cached
+        """
+
+        entry = self.cache_dir / key
+        if not entry.is_dir():
+            return None
+
+        try:
+            df_dict = {
+                filename.stem: _load_df(filename)
+                for filename in sorted(entry.glob("*.npz"))
+            }
+        except (OSError, ValueError, KeyError):
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+
+        # Mark as recently used
+        os.utime(entry)
+
+        return df_dict
+
+    def put(self, key, df_dict):
+        """
+        Stores a dict of DataFrames per table under the key, and evicts least
+        recently used entries if the cache is too large
+        """
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry = self.cache_dir / key
+
+        tmp_entry = pathlib.Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp"))
+        for name, df in df_dict.items():
+            _save_df(tmp_entry / (name + ".npz"), df)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.replace(tmp_entry, entry)
+        except OSError:
+            # Stored concurrently by another process
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+
+        self.evict(keep=key)
+
+    def size(self, key):
+        """
+        returns: size in bytes of a cache entry
+        """
+        return sum(
+            filename.stat().st_size for filename in (self.cache_dir / key).glob("*")
+        )
+
+    def evict(self, keep=None):
+        """
+        Removes least recently used entries, except keep, until the cache is
+        within max_size
+        """
+
+        if not self.cache_dir.is_dir():
+            return
+
+        entries = [
+            entry
+            for entry in self.cache_dir.iterdir()
+            if entry.is_dir() and not entry.name.startswith(".")
+        ]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+
+        total = sum(self.size(entry.name) for entry in entries)
+        for entry in entries:
+            if total <= self.max_size:
+                break
+            if entry.name == keep:
+                continue
+            total -= self.size(entry.name)
+            shutil.rmtree(entry, ignore_errors=True)
@@ -0,0 +1,148 @@
+"""consistency_report module"""
+
+import json
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+# Check codes of the consistency checks
+CHECKS = {
+    "GOC_DENSITY": "Oil density not above gas density at GOC",
+    "GOC_PSAT_ABOVE_PRES": "Saturation pressure above pressure at GOC",
+    "GOC_UNDERSATURATED": "Saturation pressure below pressure at GOC",
+    "DEWPOINT_NON_MONOTONIC": "Dew-point decreasing with depth above GOC",
+    "BUBBLEPOINT_NON_MONOTONIC": "Bubble-point increasing with depth below GOC",
+    "PSAT_ABOVE_PRES": "Saturation pressure above pressure",
+    "PSAT_GRADIENT": "High saturation pressure gradient",
+    "PBUB_OUTSIDE_TABLE": "Bubble-point outside PVTO table",
+    "RS_OUTSIDE_TABLE": "RS outside PVTO table",
+    "CELL_PSAT_ABOVE_PRES": "Grid cells with saturation pressure above pressure",
+}
+
+REPORT_COLUMNS = [
+    "PVTNUM",
+    "EQLNUM",
+    "LEVEL",
+    "CHECK",
+    "DEPTH_TOP",
+    "DEPTH_BOTTOM",
+    "VALUES",
+    "MESSAGE",
+]
+
+
+class ConsistencyReport(logging.Handler):
+
+    """Structured records of the consistency checks
+
+    A logging handler collecting the log records of the checks as report
+    entries, indexed by (pvtnum, eqlnum, level) as they are emitted. The
+    checks log with extra={"pvtnum": ..., "eqlnum": ..., "check": <check
+    code>, "depth": (top, bottom), "values": {...}}, items not given are
+    None. eqlnum is None for checks of the pvt tables only.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.entries = []
+        self._index = defaultdict(list)
+
+    def emit(self, record):
+        depth = getattr(record, "depth", None) or (None, None)
+        entry = {
+            "PVTNUM": getattr(record, "pvtnum", None),
+            "EQLNUM": getattr(record, "eqlnum", None),
+            "LEVEL": record.levelname,
+            "CHECK": getattr(record, "check", None),
+            "DEPTH_TOP": depth[0],
+            "DEPTH_BOTTOM": depth[1],
+            "VALUES": getattr(record, "values", None) or {},
+            "MESSAGE": record.getMessage(),
+        }
+        key = (entry["PVTNUM"], entry["EQLNUM"], entry["LEVEL"])
+        self._index[key].append(len(self.entries))
+        self.entries.append(entry)
+
+    def select(self, pvtnum, eqlnum, level):
+        """
+        returns: list of entries of one pvtnum, eqlnum and level
+        """
+        return [self.entries[i] for i in self._index.get((pvtnum, eqlnum, level), [])]
+
+    def region_entries(self, pvtnum, eqlnum, level):
+        """
+        returns: list of entries of an equil region, ie the entries of the
+        region and of its pvt tables
+        """
+        return self.select(pvtnum, None, level) + self.select(pvtnum, eqlnum, level)
+
+    def to_df(self):
+        """
+        returns: pandas.DataFrame with one row per entry, the VALUES as
+        JSON strings
+        """
+        df = pd.DataFrame(self.entries, columns=REPORT_COLUMNS)
+        df["VALUES"] = [json.dumps(values) for values in df["VALUES"]]
+        for column in ["PVTNUM", "EQLNUM"]:
+            df[column] = df[column].astype("Int64")
+        for column in ["DEPTH_TOP", "DEPTH_BOTTOM"]:
+            df[column] = df[column].astype(float)
+
+        return df
+
+    def to_jsonl(self, filename):
+        """
+        Writes the entries as JSON lines, one object per entry
+        """
+        with open(filename, "w", encoding="utf-8") as fileh:
+            for entry in self.entries:
+                fileh.write(json.dumps(entry) + "\n")
+
+    def to_parquet(self, filename):
+        """
+        Writes the entries as a Parquet table, see to_df. Needs pyarrow.
+        """
+        self.to_df().to_parquet(filename, index=False)
+
+    def write(self, filename):
+        """
+        Writes the entries as Parquet if the filename ends with .parquet,
+        otherwise as JSON lines
+        """
+        if str(filename).endswith(".parquet"):
+            self.to_parquet(filename)
+        else:
+            self.to_jsonl(filename)
+
+    def render(self, regions, no_inactive=0):
+        """
+        Prints the human-readable report of the equil regions, a list of
+        (eqlnum, pvtnum)
+        """
+
+        print("***********************************************************")
+        print("*****             PVT consistency report               ****")
+        print("*****                                                  ****")
+        print()
+        print(
+            "This model has ",
+            len(regions),
+            " active equli regions and ",
+            no_inactive,
+            " inactive",
+        )
+        print()
+        for eqlnum, pvtnum in regions:
+            print("***********************************************************")
+            print("EQUIL nr: ", eqlnum, " PVTNUM:", pvtnum)
+
+            warnings = self.region_entries(pvtnum, eqlnum, "WARNING")
+            print("WARNINGS: ", len(warnings))
+            for entry in warnings:
+                print("  ", entry["MESSAGE"])
+
+            errors = self.region_entries(pvtnum, eqlnum, "ERROR")
+            print("ERRORS: ", len(errors))
+            for entry in errors:
+                print("  ", entry["MESSAGE"])
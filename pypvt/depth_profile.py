@@ -0,0 +1,90 @@
+"""depth_profile module"""
+
+import numpy as np
+import pandas as pd
+
+
+class DepthProfile:
+
+    """Fluid properties vs. depth for a fluid system (one equil number)
+
+    Stored column-wise as one preallocated float64 array with a row per
+    property (struct-of-arrays), plus a categorical fluid type per depth
+    node. Columns are available as attributes, ie profile.depth, profile.pres,
+    ..., and profile.fluid_type.
+
+    A subset of the columns may be given, eg CELL_COLUMNS for profiles over
+    grid cells rather than depth nodes.
+    """
+
+    COLUMNS = [
+        "DEPTH",
+        "PRES",
+        "PSAT",
+        "PBUB",
+        "PDEW",
+        "DEN",
+        "DENG",
+        "DENO",
+        "DENW",
+        "GOR",
+        "RS",
+        "RV",
+        "BO",
+        "BG",
+        "BW",
+        "VISO",
+        "VISG",
+        "VISW",
+    ]
+
+    CELL_COLUMNS = ["DEPTH", "PRES", "PSAT", "PBUB", "PDEW", "DEN", "RS", "RV"]
+
+    FLUID_TYPES = ["gas", "oil", "wat"]
+
+    def __init__(self, no_nodes, columns=None):
+        self.columns = list(self.COLUMNS if columns is None else columns)
+        self._column_index = {col.lower(): i for i, col in enumerate(self.columns)}
+        self.values = np.full((len(self.columns), no_nodes), np.nan)
+        self.fluid_codes = np.zeros(no_nodes, dtype=np.int8)
+
+    def __len__(self):
+        return self.values.shape[1]
+
+    def __getattr__(self, name):
+        column_index = self.__dict__.get("_column_index", {})
+        if name not in column_index:
+            raise AttributeError(name)
+        return self.values[column_index[name]]
+
+    def __getitem__(self, column):
+        return self.values[self.columns.index(column)]
+
+    def __setitem__(self, column, values):
+        self.values[self.columns.index(column)] = values
+
+    @property
+    def fluid_type(self):
+        """Fluid type ("gas", "oil" or "wat") per depth node"""
+        return np.array(self.FLUID_TYPES)[self.fluid_codes]
+
+    def set_fluid_type(self, gas, wat):
+        """
+        Set fluid type from gas and water masks, other nodes are oil
+        """
+        self.fluid_codes[:] = np.where(gas, 0, np.where(wat, 2, 1))
+
+    def to_df(self):
+        """
+        returns: pandas.DataFrame with a column per property, sharing memory
+        with the profile, and a categorical FLUID_TYPE column
+        """
+
+        df = pd.DataFrame(self.values.T, columns=self.columns, copy=False)
+        df.insert(
+            1,
+            "FLUID_TYPE",
+            pd.Categorical.from_codes(self.fluid_codes, categories=self.FLUID_TYPES),
+        )
+
+        return df
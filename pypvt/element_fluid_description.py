@@ -1,11 +1,14 @@
 """element_fluid_description module"""
 import os
 import copy
+import logging
 
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 
+from pypvt.depth_profile import DepthProfile
+
 
 # pylint: disable=too-many-instance-attributes
 # pylint: disable=too-many-public-methods
@@ -19,6 +22,161 @@ import matplotlib.pyplot as plt
 # pylint: disable=consider-using-f-string
 
 
+def _integrate_zone(depth, values, top, bottom, method):
+    """
+    Returns the integral of values vs. depth over the zone [top, bottom],
+    summed over the last axis
+
+    With method "trapezoid" values are linear between the depth nodes. With
+    "simpson" each interval uses the quadratic through its nodes and the next
+    (or else previous) node within the zone, exact for quadratic values and
+    Simpson's rule for uniform nodes. Intervals partly within the zone, and
+    intervals without a third node in the zone, are linear. Intervals of zero
+    length contribute nothing.
+    """
+
+    x_0 = depth[..., :-1]
+    x_1 = depth[..., 1:]
+    f_0 = values[..., :-1]
+    f_1 = values[..., 1:]
+    h = x_1 - x_0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (f_1 - f_0) / h
+
+    # Linear, over the part of the interval within the zone
+    lower = np.clip(top, x_0, x_1)
+    upper = np.clip(bottom, x_0, x_1)
+    part = upper - lower
+    integral = np.where(
+        part > 0.0,
+        part * (f_0 + slope * (lower - x_0) + f_0 + slope * (upper - x_0)) / 2.0,
+        0.0,
+    )
+
+    if method == "simpson":
+        pad = np.full(depth.shape[:-1] + (1,), np.nan)
+        x_next = np.concatenate([depth[..., 2:], pad], axis=-1)
+        f_next = np.concatenate([values[..., 2:], pad], axis=-1)
+        x_prev = np.concatenate([pad, depth[..., :-2]], axis=-1)
+        f_prev = np.concatenate([pad, values[..., :-2]], axis=-1)
+
+        use_next = (x_next > x_1) & (x_next <= bottom)
+        x_2 = np.where(use_next, x_next, x_prev)
+        f_2 = np.where(use_next, f_next, f_prev)
+        quadratic = (part == h) & (h > 0.0) & (use_next | (x_2 < x_0) & (x_2 >= top))
+
+        # Newton form through (x_0, x_1, x_2), integrated over [x_0, x_1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            curvature = ((f_2 - f_1) / (x_2 - x_1) - slope) / (x_2 - x_0)
+            integral = np.where(
+                quadratic,
+                f_0 * h + slope * h**2 / 2.0 - curvature * h**3 / 6.0,
+                integral,
+            )
+
+    return np.sum(integral, axis=-1)
+
+
+def _breakpoints(xt, yt, y_nodes):
+    """
+    Returns (x, y), the breakpoints of the piecewise linear yt(xt), and of
+    any piecewise linear function of y with nodes y_nodes, ie the table
+    entries plus the points where yt(x) crosses a node
+
+    Repeated xt (steps) are kept as is, with no crossings inserted.
+    """
+
+    xt = np.asarray(xt, dtype=float)
+    yt = np.asarray(yt, dtype=float)
+    y_nodes = np.asarray(y_nodes, dtype=float)
+
+    y_0 = yt[:-1, np.newaxis]
+    d_y = np.diff(yt)[:, np.newaxis]
+    d_x = np.diff(xt)[:, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = (y_nodes - y_0) / d_y
+    inside = (frac > 0.0) & (frac < 1.0) & (d_x > 0.0)
+
+    x = np.concatenate([xt, (xt[:-1, np.newaxis] + frac * d_x)[inside]])
+    y = np.concatenate([yt, np.broadcast_to(y_nodes, frac.shape)[inside]])
+    order = np.argsort(x, kind="stable")
+
+    return x[order], y[order]
+
+
+def _interp_rows(x, xp, fp):
+    """
+    Returns fp linearly interpolated at x, for each row of xp and fp
+
+    xp is ascending along the last axis, and may have leading dimensions
+    (rows), interpolated with one np.searchsorted over all rows. x is shared
+    by all rows. Values outside a row are constant extrapolated.
+    """
+
+    xp = np.asarray(xp, dtype=float)
+    fp = np.broadcast_to(np.asarray(fp, dtype=float), xp.shape)
+    x = np.asarray(x, dtype=float)
+
+    n = xp.shape[-1]
+    rows = xp.reshape(-1, n)
+    values = fp.reshape(-1, n)
+
+    # Offset the rows to sort after each other
+    low = min(rows.min(), x.min())
+    span = max(rows.max(), x.max()) - low + 1.0
+    offset = span * np.arange(len(rows))[:, np.newaxis]
+    keys = (rows - low + offset).ravel()
+    targets = np.clip(x - low, 0.0, span - 1.0) + offset
+
+    i = np.searchsorted(keys, targets, side="right")
+    i = np.clip(i - np.arange(len(rows))[:, np.newaxis] * n, 1, n - 1)
+
+    row = np.arange(len(rows))[:, np.newaxis]
+    x_0 = rows[row, i - 1]
+    x_1 = rows[row, i]
+    f_0 = values[row, i - 1]
+    f_1 = values[row, i]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.clip((x - x_0) / (x_1 - x_0), 0.0, 1.0)
+    weight = np.where(x_1 > x_0, weight, 1.0)
+
+    return (f_0 + weight * (f_1 - f_0)).reshape(xp.shape[:-1] + x.shape)
+
+
+def partition_equil(df_dict):
+    """
+    Partitions the ecl2df EQUIL, RSVD, RVVD, PBVD and PDVD dataframes on
+    EQLNUM, grouping each dataframe once
+
+    Returns dict keyed on (keyword, eqlnum), with the EQUIL record of the
+    region as a dict, and the (values, depth) arrays of the depth tables,
+    without rows missing the value. Empty or missing dataframes give no
+    entries.
+    """
+
+    tables = {}
+
+    equil_df = df_dict.get("EQUIL")
+    if equil_df is not None and not equil_df.empty:
+        for record in equil_df.drop_duplicates("EQLNUM").to_dict("records"):
+            tables[("EQUIL", int(record["EQLNUM"]))] = record
+
+    for keyword, (column, _, _) in ElementFluidDescription.VD_TABLES.items():
+        vd_df = df_dict.get(keyword)
+        if vd_df is None or vd_df.empty:
+            continue
+
+        vd_df = vd_df[vd_df[column].notnull()]
+        values = vd_df[column].to_numpy(dtype=float)
+        depth = vd_df["Z"].to_numpy(dtype=float)
+        for eqlnum, rows in vd_df.groupby("EQLNUM", sort=False).indices.items():
+            tables[(keyword, int(eqlnum))] = (values[rows], depth[rows])
+
+    return tables
+
+
 class ElementFluidDescription:
 
     """A representation of black oil pvt and fluid contacts
@@ -26,6 +184,33 @@ class ElementFluidDescription:
     in an eclipse simulation deck.
     """
 
+    # Consistency checks of pvt_gradient_check, at the GOC and per depth
+    # interval, and their severity
+    GOC_CHECKS = ["GOC_DENSITY", "GOC_PSAT_ABOVE_PRES", "GOC_UNDERSATURATED"]
+    INTERVAL_CHECKS = [
+        "DEWPOINT_NON_MONOTONIC",
+        "BUBBLEPOINT_NON_MONOTONIC",
+        "PSAT_ABOVE_PRES",
+        "PSAT_GRADIENT",
+    ]
+    CHECK_SEVERITY = {
+        "GOC_DENSITY": "FATAL",
+        "GOC_PSAT_ABOVE_PRES": "ERROR",
+        "GOC_UNDERSATURATED": "WARNING",
+        "DEWPOINT_NON_MONOTONIC": "FATAL",
+        "BUBBLEPOINT_NON_MONOTONIC": "FATAL",
+        "PSAT_ABOVE_PRES": "ERROR",
+        "PSAT_GRADIENT": "WARNING",
+    }
+
+    # Value column and (values, depth) attributes of the depth tables
+    VD_TABLES = {
+        "RSVD": ("RS", "rsvd_rs", "rsvd_depth"),
+        "RVVD": ("RV", "rvvd_rv", "rvvd_depth"),
+        "PBVD": ("PB", "pbvd_pb", "pbvd_depth"),
+        "PDVD": ("PD", "pdvd_pd", "pdvd_depth"),
+    }
+
     def __init__(
         self,
         eqlnum=0,
@@ -66,47 +251,98 @@ class ElementFluidDescription:
 
         self.pvt_model = pvt_model
 
-        self.res_depth = []
-        self.res_fluid_type = []
-        self.res_pres = []
-        self.res_psat = []
-        self.res_pbub = []
-        self.res_pdew = []
-        self.res_den = []
-        self.res_deng = []
-        self.res_deno = []
-        self.res_denw = []
-        self.res_gor = []
-        self.res_rs = []
-        self.res_rv = []
-        self.res_bo = []
-        self.res_bg = []
-        self.res_bw = []
-        self.res_viso = []
-        self.res_visg = []
-        self.res_visw = []
+        self.depth_profile = None
+
+        # (inputs, curves) of psat_curves
+        self._psat_curves = None
 
     @staticmethod
-    def intpol(x, xt, yt, extpol_opt="const", order="ascending"):
+    def interp_bracket(x, xt, extpol_opt="const", order="ascending"):
         """
-        Under construction!
-        Should potentially figure out extrapolation, and x-table
-        monotonicity stuff
+        Returns (i, w), the interval i of the x-table xt holding each x, and
+        the weight w of x in the interval, found with one np.searchsorted.
+        A y-table is interpolated as yt[i] + w * (yt[i + 1] - yt[i]), see
+        intpol, so the bracket may be shared by all y-tables on xt.
+
+        extpol_opt: "const" (end values), "linear" (end intervals extended)
+        or "error" (ValueError for x outside the table)
+        order: "ascending" or "descending" xt
+        """
+
+        if extpol_opt not in ("const", "linear", "error"):
+            raise ValueError("Unknown extpol_opt: " + str(extpol_opt))
+
+        if order not in ("ascending", "descending"):
+            raise ValueError("Unknown order: " + str(order))
+
+        x = np.asarray(x, dtype=float)
+        xt = np.asarray(xt, dtype=float)
+        if xt.size == 0:
+            raise ValueError("Empty x-table")
+        if order == "descending":
+            xt = xt[::-1]
+
+        if extpol_opt == "error" and np.any((x < xt[0]) | (x > xt[-1])):
+            raise ValueError(f"x outside table interval [{xt[0]}, {xt[-1]}]")
+
+        no_intervals = max(len(xt) - 1, 1)
+        i = np.clip(np.searchsorted(xt, x, side="right") - 1, 0, no_intervals - 1)
+        x_0 = xt[i]
+        d_x = xt[np.minimum(i + 1, len(xt) - 1)] - x_0
+
+        # Zero length intervals (repeated x) take the value at their end
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w = np.where(d_x > 0.0, (x - x_0) / d_x, (x >= x_0).astype(float))
+        if extpol_opt != "linear" or len(xt) == 1:
+            w = np.clip(w, 0.0, 1.0)
 
-        Linear interpolation
+        if order == "descending":
+            # Interval i of the reversed table, from its upper end
+            i = max(len(xt) - 2, 0) - i
+            w = 1.0 - w if len(xt) > 1 else w
 
+        return i, w
+
+    @staticmethod
+    def intpol(x, xt, yt, extpol_opt="const", order="ascending", *, bracket=None):
         """
+        Linear interpolation of the table yt(xt) at x, see interp_bracket for
+        extpol_opt and order
 
-        if extpol_opt != "const":
-            raise ValueError("extpol_opt not implemented")
+        yt may hold several y-tables on xt as rows, interpolated with one
+        shared bracket, giving one row per y-table. A bracket from
+        interp_bracket may be given, to share it between calls.
+        """
 
-        if order != "ascending":
-            raise ValueError("order not implemented")
+        if bracket is None:
+            bracket = ElementFluidDescription.interp_bracket(
+                x, xt, extpol_opt=extpol_opt, order=order
+            )
+        i, w = bracket
 
-        # A quick and dirty version for now
-        y = np.interp(x, xt, yt)
+        yt = np.asarray(yt, dtype=float)
+        y_0 = yt[..., i]
+        y_1 = yt[..., np.minimum(i + 1, yt.shape[-1] - 1)]
 
-        return y
+        return (y_0 + w * (y_1 - y_0))[()]
+
+    def rs_rv_at_depth(self, depth):
+        """
+        Returns (rs, rv) at depth(s), interpolated in the RSVD and RVVD
+        tables. Tables on the same depths share one bracket.
+        """
+
+        if np.array_equal(self.rsvd_depth, self.rvvd_depth):
+            return tuple(
+                self.intpol(
+                    depth, self.rsvd_depth, np.vstack([self.rsvd_rs, self.rvvd_rv])
+                )
+            )
+
+        return (
+            self.intpol(depth, self.rsvd_depth, self.rsvd_rs),
+            self.intpol(depth, self.rvvd_depth, self.rvvd_rv),
+        )
 
     # pylint: disable=attribute-defined-outside-init
     def init_equil_from_df(self, eql_df):
@@ -180,20 +416,38 @@ class ElementFluidDescription:
         """
         Initialize the equil tables
         """
-        if not df_dict["EQUIL"].empty:
-            self.init_equil_from_df(df_dict["EQUIL"])
-
-        if not df_dict["RSVD"].empty:
-            self.init_rsvd_from_df(df_dict["RSVD"])
-
-        if not df_dict["RVVD"].empty:
-            self.init_rvvd_from_df(df_dict["RVVD"])
+        self.init_from_tables(partition_equil(df_dict))
 
-        if not df_dict["PBVD"].empty:
-            self.init_pbvd_from_df(df_dict["PBVD"])
+    def init_from_tables(self, tables):
+        """
+        Initialize the equil tables from tables partitioned on keyword and
+        EQLNUM, see partition_equil. Depth tables of keywords without this
+        equil region are set empty.
+        """
 
-        if not df_dict["PDVD"].empty:
-            self.init_pdvd_from_df(df_dict["PDVD"])
+        keywords = {keyword for keyword, _ in tables}
+
+        if "EQUIL" in keywords:
+            if ("EQUIL", self.eqlnum) not in tables:
+                raise ValueError("EQLNUM not found in EQUIL dataframe")
+
+            record = tables[("EQUIL", self.eqlnum)]
+            self.owc = record["OWC"]
+            self.goc = record["GOC"]
+            self.pcowc = record["PCOWC"]
+            self.pcgoc = record["PCGOC"]
+            self.initrs = record["INITRS"]
+            self.initrv = record["INITRV"]
+            self.ref_depth = record["Z"]
+            self.ref_press = record["PRESSURE"]
+
+        for keyword, (_, values_attr, depth_attr) in self.VD_TABLES.items():
+            if keyword in keywords:
+                values, depth = tables.get(
+                    (keyword, self.eqlnum), (np.empty(0), np.empty(0))
+                )
+                setattr(self, values_attr, values)
+                setattr(self, depth_attr, depth)
 
     def validate_description(self):
         # pylint: disable=too-many-return-statements
@@ -298,15 +552,60 @@ class ElementFluidDescription:
         raise NotImplementedError
 
     def set_owc(self, owc):
-        new_self = copy.deepcopy(self)
+        """
+        returns: a copy of the fluid description with a new OWC
+
+        Copy-on-write: the pvt model and the xxVD tables are shared with the
+        original, only the contact and the (now stale) results are new.
+        """
+        new_self = copy.copy(self)
         new_self.owc = owc
+        new_self.depth_profile = None
         return new_self
 
     def set_goc(self, goc):
-        new_self = copy.deepcopy(self)
+        """
+        returns: a copy of the fluid description with a new GOC, see set_owc
+        """
+        new_self = copy.copy(self)
         new_self.goc = goc
+        new_self.depth_profile = None
         return new_self
 
+    def equil_record(self):
+        """
+        returns: dict with the EQUIL keyword record, as in get_df("EQUIL")
+        """
+
+        return {
+            "KEYWORD": "EQUIL",
+            "EQLNUM": self.eqlnum,
+            "OWC": self.owc,
+            "PCOWC": getattr(self, "pcowc", None),
+            "GOC": self.goc,
+            "PCGOC": getattr(self, "pcgoc", None),
+            "Z": self.ref_depth,
+            "PRESSURE": self.ref_press,
+            "INITRS": getattr(self, "initrs", None),
+            "INITRV": getattr(self, "initrv", None),
+            # "ACCURACY": self.accuracy,
+        }
+
+    def vd_table(self, keyword):
+        """
+        returns: (values, depth) arrays of the RSVD, RVVD, PBVD or PDVD
+        table, empty if the table is not set
+        """
+
+        _, values_attr, depth_attr = self.VD_TABLES[keyword]
+        values = getattr(self, values_attr)
+        depth = getattr(self, depth_attr)
+
+        if values is None or depth is None:
+            return np.empty(0), np.empty(0)
+
+        return np.asarray(values, dtype=float), np.asarray(depth, dtype=float)
+
     def get_df(self, keyword):
         """
         returns: pandas.Dataframe for specified keyword
@@ -315,334 +614,540 @@ class ElementFluidDescription:
         df = None
 
         if keyword == "EQUIL":
+            df = pd.DataFrame([self.equil_record()])
 
+        elif keyword in self.VD_TABLES:
+            values, depth = self.vd_table(keyword)
             df = pd.DataFrame(
-                columns=[
-                    "KEYWORD",
-                    "EQLNUM",
-                    "OWC",
-                    "PCOWC",
-                    "GOC",
-                    "PCGOC",
-                    "Z",
-                    "PRESSURE",
-                    "INITRS",
-                    "INITRV",
-                    # "ACCURACY",
-                ]
-            )
-
-            df = df.append(
                 {
-                    "KEYWORD": "EQUIL",
-                    "EQLNUM": self.eqlnum,
-                    "OWC": self.owc,
-                    "PCOWC": self.pcowc,
-                    "GOC": self.goc,
-                    "PCGOC": self.pcgoc,
-                    "Z": self.ref_depth,
-                    "PRESSURE": self.ref_press,
-                    "INITRS": self.initrs,
-                    "INITRV": self.initrv,
-                    # "ACCURACY": self.accuracy,
-                },
-                ignore_index=True,
+                    "KEYWORD": keyword,
+                    "EQLNUM": np.full(len(values), self.eqlnum),
+                    self.VD_TABLES[keyword][0]: values,
+                    "Z": depth,
+                }
             )
 
-        elif keyword == "RSVD":
-            df = pd.DataFrame(columns=["KEYWORD", "EQLNUM", "RS", "Z"])
-
-            for (rsvd, depth) in zip(self.rsvd_rs, self.rsvd_depth):
-                df = df.append(
-                    {
-                        "KEYWORD": "RSVD",
-                        "EQLNUM": self.eqlnum,
-                        "RS": rsvd,
-                        "Z": depth,
-                    },
-                    ignore_index=True,
-                )
-
-        elif keyword == "RVVD":
-            df = pd.DataFrame(columns=["KEYWORD", "EQLNUM", "RV", "Z"])
-
-            for (rvvd, depth) in zip(self.rvvd_rv, self.rvvd_depth):
-                df = df.append(
-                    {
-                        "KEYWORD": "RVVD",
-                        "EQLNUM": self.eqlnum,
-                        "RV": rvvd,
-                        "Z": depth,
-                    },
-                    ignore_index=True,
-                )
-
-        elif keyword == "PBVD":
-            df = pd.DataFrame(columns=["KEYWORD", "EQLNUM", "PB", "Z"])
-
-            for (pbvd, depth) in zip(self.pbvd_pb, self.pbvd_depth):
-                df = df.append(
-                    {
-                        "KEYWORD": "PBVD",
-                        "EQLNUM": self.eqlnum,
-                        "PB": pbvd,
-                        "Z": depth,
-                    },
-                    ignore_index=True,
-                )
-
-        elif keyword == "PDVD":
-            df = pd.DataFrame(columns=["KEYWORD", "EQLNUM", "PD", "Z"])
-
-            for (pdvd, depth) in zip(self.pdvd_pd, self.pdvd_depth):
-                df = df.append(
-                    {
-                        "KEYWORD": "PDVD",
-                        "EQLNUM": self.eqlnum,
-                        "PD": pdvd,
-                        "Z": depth,
-                    },
-                    ignore_index=True,
-                )
         else:
             print("No supprt for keyword:", keyword)
 
         return df
 
     # -----------------------------------------------------------------------------
-    def calc_fluid_prop_vs_depth(self, no_nodes=20):
-        """Calculates fluid properties vs. depth"""
-
-        # ---------------------------------------------------------------------
-        # Calculate properties from REFERENCE depth to TOP reservoir
-        # ---------------------------------------------------------------------
-
-        #  [m]*[kg/m3] -> [bar]
-        GD = 0.0981 / 1000.0
+    def depth_nodes(self, no_nodes=20, top=None, bottom=None):
+        """
+        Returns the depth nodes used for calculating fluid properties vs. depth
+
+        Nodes are stepped from the REFERENCE depth to TOP and BOTTOM reservoir,
+        snapping to the GOC and OWC when within one step of them. top and
+        bottom default to top_struct and bottom_struct. Stepping upwards,
+        only contacts above the current node are snapped to: a node at a
+        contact is never snapped to the same contact again, which with
+        rounding could otherwise repeat forever for fine grids. Otherwise
+        the nodes are as with stepping node by node.
+
+        Returns (depth, i_ref, upward), where depth is ascending, i_ref is the
+        index of the reference depth node and upward masks the nodes from
+        the reference depth and upwards.
+        """
 
         goc = self.goc
         woc = self.owc
 
-        top = self.top_struct
-        bottom = self.bottom_struct
+        top = self.top_struct if top is None else top
+        bottom = self.bottom_struct if bottom is None else bottom
         delta_d = (bottom - top) / no_nodes
 
-        d = self.ref_depth
-        p = self.ref_press
+        # From REFERENCE depth to TOP reservoir
+        nodes_up = []
 
+        d = self.ref_depth
         while d > top - delta_d:
+            nodes_up.append(d)
 
-            # Calculate fluid properties at current node
-            rs = self.intpol(d, self.rsvd_depth, self.rsvd_rs)
-            rv = self.intpol(d, self.rvvd_depth, self.rvvd_rv)
+            d_next = d - delta_d
 
-            pbub = self.pvt_model.calc_pbub(rs)
+            # Only snap to contacts above the current node, as rounding may
+            # otherwise snap a node at a contact to the same contact again
+            if abs(d_next - goc) < delta_d and goc < d:
+                d_next = goc
 
-            if pbub < p:
-                bo = self.pvt_model.calc_bo(p, rs=rs)
-                deno = self.pvt_model.calc_deno(p, rs=rs)
-                viso = self.pvt_model.calc_viso(p, rs=rs)
+            elif abs(d_next - woc) < delta_d and woc < d:
+                d_next = woc
 
-            else:
-                bo = self.pvt_model.calc_bo(p)
-                deno = self.pvt_model.calc_deno(p)
-                viso = self.pvt_model.calc_viso(p)
+            d = d_next
 
-            pdew = self.pvt_model.calc_pdew(rv)
+        # From REFERENCE depth to BOTTOM reservoir
+        nodes_down = []
 
-            if pdew < p:
-                bg = self.pvt_model.calc_bg(p, rv=rv)
-                deng = self.pvt_model.calc_deng(p, rv=rv)
-                visg = self.pvt_model.calc_visg(p, rv=rv)
+        d = self.ref_depth + delta_d
 
-            else:
-                bg = self.pvt_model.calc_bg(p)
-                deng = self.pvt_model.calc_deng(p)
-                visg = self.pvt_model.calc_visg(p)
-
-            bw = self.pvt_model.calc_bw(p)
-            denw = self.pvt_model.calc_denw(p)
-            visw = self.pvt_model.calc_visw(p)
-
-            # Determine correct phase
-            if d <= goc:
-                fluid_type = "gas"
-                psat = pdew
-                gor = 1.0 / rv
-                den = deng
-
-            elif d > woc:
-                fluid_type = "wat"
-                psat = pbub
-                den = denw
-                gor = rs
+        if abs(d - goc) < delta_d:
+            d = goc
 
-            else:
-                fluid_type = "oil"
-                psat = pbub
-                den = deno
-                gor = rs
-
-            # Set depth node fluid properties
-
-            self.res_depth.append(d)
-            self.res_fluid_type.append(fluid_type)
-            self.res_pres.append(p)
-            self.res_psat.append(psat)
-            self.res_pbub.append(pbub)
-            self.res_pdew.append(pdew)
-            self.res_den.append(den)
-            self.res_deng.append(deng)
-            self.res_deno.append(deno)
-            self.res_denw.append(denw)
-            self.res_gor.append(gor)
-            self.res_rs.append(rs)
-            self.res_rv.append(rv)
-            self.res_bo.append(bo)
-            self.res_bg.append(bg)
-            self.res_bw.append(bw)
-            self.res_viso.append(viso)
-            self.res_visg.append(visg)
-            self.res_visw.append(visw)
-
-            # Update node depth
-            d_next = d - delta_d
+        elif abs(d - woc) < delta_d:
+            d = woc
 
-            if abs(d_next - goc) < delta_d:
+        while d < bottom + delta_d:
+            nodes_down.append(d)
+
+            d_next = d + delta_d
+
+            if abs(d_next - goc) < delta_d * 0.9:
                 d_next = goc
 
-            elif abs(d_next - woc) < delta_d:
+            elif abs(d_next - woc) < delta_d * 0.9:
                 d_next = woc
 
-            # Update new node pressure
-            p = p + GD * den * (d_next - d)
-
             d = d_next
 
-        # ---------------------------------------------------------------------
-        # Calculate properties from REFERENCE depth to BOTTOM reservoir
-        # ---------------------------------------------------------------------
-
-        # Reverse depth lists, so top node is first element
-        self.res_depth.reverse()
-        self.res_fluid_type.reverse()
-        self.res_pres.reverse()
-        self.res_psat.reverse()
-        self.res_pbub.reverse()
-        self.res_pdew.reverse()
-        self.res_den.reverse()
-        self.res_deng.reverse()
-        self.res_deno.reverse()
-        self.res_denw.reverse()
-        self.res_gor.reverse()
-        self.res_rs.reverse()
-        self.res_rv.reverse()
-        self.res_bo.reverse()
-        self.res_bg.reverse()
-        self.res_bw.reverse()
-        self.res_viso.reverse()
-        self.res_visg.reverse()
-        self.res_visw.reverse()
+        depth = np.array(nodes_up[::-1] + nodes_down, dtype=float)
+        i_ref = len(nodes_up) - 1
+        upward = np.arange(len(depth)) <= i_ref
 
-        d = self.ref_depth
-        d_next = d + delta_d
+        return depth, i_ref, upward
 
-        if abs(d_next - goc) < delta_d:
-            d_next = goc
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def hydrostatic_pressure(depth, i_ref, ref_press, den):
+        """
+        Returns pressure at the depth nodes, integrating the hydrostatic
+        gradient away from the reference node i_ref
 
-        elif abs(d_next - woc) < delta_d:
-            d_next = woc
+        Each depth interval uses the density of the node nearest the reference
+        depth. depth and den may have leading dimensions (eg. one row per
+        case), with the depth nodes along the last axis, and i_ref and
+        ref_press one value per row.
+        """
 
-        p = self.ref_press + GD * self.res_den[-1] * (d_next - d)
-        d = d_next
+        #  [m]*[kg/m3] -> [bar]
+        GD = 0.0981 / 1000.0
 
-        while d < bottom + delta_d:
+        depth = np.asarray(depth, dtype=float)
+        den = np.asarray(den, dtype=float)
+        i_ref = np.asarray(i_ref)[..., np.newaxis]
+        ref_press = np.asarray(ref_press, dtype=float)[..., np.newaxis]
 
-            # Calculate fluid properties at current node
-            rs = self.intpol(d, self.rsvd_depth, self.rsvd_rs)
-            rv = self.intpol(d, self.rvvd_depth, self.rvvd_rv)
+        dz = np.diff(depth, axis=-1)
+        above = np.arange(dz.shape[-1]) < i_ref
+        dp = GD * np.where(above, den[..., 1:], den[..., :-1]) * dz
 
-            pbub = self.pvt_model.calc_pbub(rs)
+        shape = np.broadcast(dp, i_ref).shape[:-1]
+        dp = np.broadcast_to(dp, shape + dp.shape[-1:])
+        i_ref = np.broadcast_to(i_ref, shape + (1,))
 
-            if pbub < p:
-                bo = self.pvt_model.calc_bo(p, rs=rs)
-                deno = self.pvt_model.calc_deno(p, rs=rs)
-                viso = self.pvt_model.calc_viso(p, rs=rs)
+        # Pressure increments summed from the top node, relative to the
+        # reference node
+        cum_dp = np.zeros(shape + (dp.shape[-1] + 1,))
+        np.cumsum(dp, axis=-1, out=cum_dp[..., 1:])
 
-            else:
-                bo = self.pvt_model.calc_bo(p)
-                deno = self.pvt_model.calc_deno(p)
-                viso = self.pvt_model.calc_viso(p)
+        return ref_press + cum_dp - np.take_along_axis(cum_dp, i_ref, axis=-1)
 
-            pdew = self.pvt_model.calc_pdew(rv)
+    # -----------------------------------------------------------------------------
+    def phases(self, depth, upward, goc=None, owc=None):
+        """
+        Returns (gas, wat) masks for the given depths, other depths are in
+        the oil zone. Depths at the contacts belong to the zone on the
+        reference depth side of the contact, upward masks the depths at and
+        above the reference depth. goc and owc default to the contacts of
+        the fluid description.
+        """
 
-            if pdew < p:
-                bg = self.pvt_model.calc_bg(p, rv=rv)
-                deng = self.pvt_model.calc_deng(p, rv=rv)
-                visg = self.pvt_model.calc_visg(p, rv=rv)
+        goc = self.goc if goc is None else goc
+        owc = self.owc if owc is None else owc
 
-            else:
-                bg = self.pvt_model.calc_bg(p)
-                deng = self.pvt_model.calc_deng(p)
-                visg = self.pvt_model.calc_visg(p)
-
-            bw = self.pvt_model.calc_bw(p)
-            denw = self.pvt_model.calc_denw(p)
-            visw = self.pvt_model.calc_visw(p)
-
-            # Determine correct phase
-            if d < goc:
-                fluid_type = "gas"
-                psat = pdew
-                gor = 1.0 / rv
-                den = deng
-
-            elif d >= woc:
-                fluid_type = "wat"
-                psat = pbub
-                den = denw
-                gor = rs
+        gas = np.where(upward, depth <= goc, depth < goc)
+        wat = ~gas & np.where(upward, depth > owc, depth >= owc)
 
-            else:
-                fluid_type = "oil"
-                psat = pbub
-                den = deno
-                gor = rs
-
-            # Set depth node fluid properties
-            self.res_depth.append(d)
-            self.res_fluid_type.append(fluid_type)
-            self.res_pres.append(p)
-            self.res_psat.append(psat)
-            self.res_pbub.append(pbub)
-            self.res_pdew.append(pdew)
-            self.res_den.append(den)
-            self.res_deng.append(deng)
-            self.res_deno.append(deno)
-            self.res_denw.append(denw)
-            self.res_gor.append(gor)
-            self.res_rs.append(rs)
-            self.res_rv.append(rv)
-            self.res_bo.append(bo)
-            self.res_bg.append(bg)
-            self.res_bw.append(bw)
-            self.res_viso.append(viso)
-            self.res_visg.append(visg)
-            self.res_visw.append(visw)
-
-            # Update node depth
-            d_next = d + delta_d
+        return gas, wat
 
-            if abs(d_next - goc) < delta_d * 0.9:
-                d_next = goc
+    # -----------------------------------------------------------------------------
+    def node_pressure(self, depth, i_ref, gas, wat, *, rs, rv):
+        """
+        Returns hydrostatic pressure at the depth nodes
 
-            elif abs(d_next - woc) < delta_d * 0.9:
-                d_next = woc
+        The node pressures are found by fixed-point iteration, evaluating
+        phase densities at the current pressures until the pressures converge
+        (at most one iteration per node). Only the density of the phase
+        present is evaluated at each node.
+        """
 
-            # Update new node pressure
-            p = p + GD * den * (d_next - d)
+        tol_pres = 1.0e-6  # Pressure convergence tolerance, bar
 
-            d = d_next
+        oil = ~(gas | wat)
+        rs = np.broadcast_to(rs, depth.shape)
+        rv = np.broadcast_to(rv, depth.shape)
+
+        pres = np.full(depth.shape, self.ref_press, dtype=float)
+        den = np.empty(depth.shape)
+
+        for _ in range(depth.shape[-1]):
+            den[gas] = self.pvt_model.calc_deng(pres[gas], rv=rv[gas])
+            den[wat] = self.pvt_model.calc_denw(pres[wat])
+            den[oil] = self.pvt_model.calc_deno(pres[oil], rs=rs[oil])
+
+            pres_next = self.hydrostatic_pressure(depth, i_ref, self.ref_press, den)
+            converged = np.max(np.abs(pres_next - pres)) < tol_pres
+            pres = pres_next
+
+            if converged:
+                break
+
+        return pres
+
+    # -----------------------------------------------------------------------------
+    def psat_curves(self):
+        """
+        Returns (pbub_depth, pbub, pdew_depth, pdew), the bubble- and
+        dew-point vs. depth as piecewise linear curves, see psat_at_depth
+
+        The breakpoints are the RSVD/RVVD depths and the depths where Rs/rv
+        crosses a node of the saturated PVTO/PVTG table, so the curves are
+        exactly calc_pbub/calc_pdew of the interpolated Rs/rv. The curves are
+        memoised, and rebuilt when the RSVD or RVVD arrays, the pvt model or
+        its PVTO or PVTG table are replaced (not when modified in place).
+        """
+
+        inputs = (
+            self.rsvd_depth,
+            self.rsvd_rs,
+            self.rvvd_depth,
+            self.rvvd_rv,
+            self.pvt_model,
+            self.pvt_model.rs_nodes,
+            self.pvt_model.rv_nodes,
+        )
+        if self._psat_curves is not None and all(
+            new is old for new, old in zip(inputs, self._psat_curves[0])
+        ):
+            return self._psat_curves[1]
+
+        pbub_depth, rs = _breakpoints(
+            self.rsvd_depth, self.rsvd_rs, self.pvt_model.rs_nodes
+        )
+        pdew_depth, rv = _breakpoints(
+            self.rvvd_depth, self.rvvd_rv, self.pvt_model.rv_nodes
+        )
+        curves = (
+            pbub_depth,
+            np.ravel(self.pvt_model.calc_pbub(rs)),
+            pdew_depth,
+            np.ravel(self.pvt_model.calc_pdew(rv)),
+        )
+        self._psat_curves = (inputs, curves)
+
+        return curves
+
+    def psat_at_depth(self, depth):
+        """
+        Returns (pbub, pdew), the bubble- and dew-point at depth(s),
+        interpolated in the memoised curves of psat_curves
+        """
+        pbub_depth, pbub, pdew_depth, pdew = self.psat_curves()
+
+        return np.interp(depth, pbub_depth, pbub), np.interp(depth, pdew_depth, pdew)
+
+    # -----------------------------------------------------------------------------
+    def calc_fluid_prop_vs_depth(self, no_nodes=20):
+        """
+        Calculates fluid properties vs. depth, returned as a DepthProfile
+        (also kept as self.depth_profile)
+
+        All depth nodes are evaluated at once, see node_pressure.
+        """
+
+        depth, i_ref, upward = self.depth_nodes(no_nodes)
+
+        rs, rv = self.rs_rv_at_depth(depth)
+
+        pbub, pdew = self.psat_at_depth(depth)
+
+        # Determine correct phase
+        gas, wat = self.phases(depth, upward)
+
+        pres = self.node_pressure(depth, i_ref, gas, wat, rs=rs, rv=rv)
+
+        # Fluid properties at the converged node pressures
+        bo = self.pvt_model.calc_bo(pres, rs=rs)
+        deno = self.pvt_model.calc_deno(pres, rs=rs)
+        viso = self.pvt_model.calc_viso(pres, rs=rs)
+
+        bg = self.pvt_model.calc_bg(pres, rv=rv)
+        deng = self.pvt_model.calc_deng(pres, rv=rv)
+        visg = self.pvt_model.calc_visg(pres, rv=rv)
+
+        bw = self.pvt_model.calc_bw(pres)
+        denw = self.pvt_model.calc_denw(pres)
+        visw = self.pvt_model.calc_visw(pres)
+
+        with np.errstate(divide="ignore"):
+            gor = np.where(gas, 1.0 / rv, rs)
+
+        # Set depth node fluid properties
+        profile = DepthProfile(len(depth))
+        profile.set_fluid_type(gas, wat)
+
+        for column, values in (
+            ("DEPTH", depth),
+            ("PRES", pres),
+            ("PSAT", np.where(gas, pdew, pbub)),
+            ("PBUB", pbub),
+            ("PDEW", pdew),
+            ("DEN", np.where(gas, deng, np.where(wat, denw, deno))),
+            ("DENG", deng),
+            ("DENO", deno),
+            ("DENW", denw),
+            ("GOR", gor),
+            ("RS", rs),
+            ("RV", rv),
+            ("BO", bo),
+            ("BG", bg),
+            ("BW", bw),
+            ("VISO", viso),
+            ("VISG", visg),
+            ("VISW", visw),
+        ):
+            profile[column] = values
+
+        self.depth_profile = profile
+
+        return profile
+
+    # -----------------------------------------------------------------------------
+    def calc_fluid_prop_at_depth(self, depth, no_nodes=100):
+        """
+        Calculates initial pressure, rs, rv, saturation pressures and phase
+        density at arbitrary depths, eg. the grid cell depths of the equil
+        region. Returns a DepthProfile with the DepthProfile.CELL_COLUMNS,
+        one entry per given depth.
+
+        Pressures are interpolated linearly between the nodes of a hydrostatic
+        pressure profile with no_nodes nodes, extended to cover all depths.
+        As nodes are placed at the contacts, this is the hydrostatic pressure
+        of the node profile at each depth.
+        """
+
+        depth = np.asarray(depth, dtype=float)
+
+        profile = DepthProfile(len(depth), columns=DepthProfile.CELL_COLUMNS)
+        if len(depth) == 0:
+            return profile
+
+        node_depth, i_ref, node_upward = self.depth_nodes(
+            no_nodes,
+            top=min(self.top_struct, np.min(depth)),
+            bottom=max(self.bottom_struct, np.max(depth)),
+        )
+        node_rs, node_rv = self.rs_rv_at_depth(node_depth)
+        node_gas, node_wat = self.phases(node_depth, node_upward)
+
+        node_pres = self.node_pressure(
+            node_depth, i_ref, node_gas, node_wat, rs=node_rs, rv=node_rv
+        )
+
+        pres = np.interp(depth, node_depth, node_pres)
+
+        rs, rv = self.rs_rv_at_depth(depth)
+
+        pbub, pdew = self.psat_at_depth(depth)
+
+        gas, wat = self.phases(depth, depth <= self.ref_depth)
+        oil = ~(gas | wat)
+
+        # Only the density of the phase present is evaluated in each cell
+        den = np.empty(len(depth))
+        den[gas] = self.pvt_model.calc_deng(pres[gas], rv=rv[gas])
+        den[oil] = self.pvt_model.calc_deno(pres[oil], rs=rs[oil])
+        den[wat] = self.pvt_model.calc_denw(pres[wat])
+
+        profile.set_fluid_type(gas, wat)
+
+        for column, values in (
+            ("DEPTH", depth),
+            ("PRES", pres),
+            ("PSAT", np.where(gas, pdew, pbub)),
+            ("PBUB", pbub),
+            ("PDEW", pdew),
+            ("DEN", den),
+            ("RS", rs),
+            ("RV", rv),
+        ):
+            profile[column] = values
+
+        return profile
+
+    # -----------------------------------------------------------------------------
+    def sweep_contacts(self, gocs, owcs, no_nodes=100, method=None, porv=None):
+        """
+        Evaluates in-place and consistency checks for many candidate
+        contacts at once
+
+        gocs and owcs are broadcast against each other, each pair being one
+        candidate. All candidates are evaluated in one pass, as rows of 2D
+        arrays: each row has no_nodes uniform depth intervals from top to
+        bottom structure, plus nodes at the reference depth and the
+        candidate's contacts. Rs and Rv vs. depth are interpolated once for
+        the shared nodes.
+
+        Returns a pandas.DataFrame with one row per candidate, with the
+        in-place columns of inplace_report (GGIP, OGIP, OOIP, GOIP, see
+        integrate_inplace for method, and porv_inplace for porv) and the
+        counts of pvt_gradient_check (FATAL_ERRORS, ERRORS, WARNINGS).
+        """
+
+        gocs, owcs = np.broadcast_arrays(
+            np.asarray(gocs, dtype=float), np.asarray(owcs, dtype=float)
+        )
+        gocs = gocs.ravel()[:, np.newaxis]
+        owcs = owcs.ravel()[:, np.newaxis]
+        no_cand = len(gocs)
+
+        base = np.union1d(
+            np.linspace(self.top_struct, self.bottom_struct, no_nodes + 1),
+            [self.ref_depth],
+        )
+        base_rs, base_rv = self.rs_rv_at_depth(base)
+
+        # Insert the contacts of each candidate, keeping depth sorted per row
+        depth = np.hstack([np.broadcast_to(base, (no_cand, len(base))), gocs, owcs])
+        order = np.argsort(depth, axis=-1, kind="stable")
+        depth = np.take_along_axis(depth, order, axis=-1)
+
+        contacts_rs, contacts_rv = self.rs_rv_at_depth(np.hstack([gocs, owcs]))
+        rs = np.take_along_axis(
+            np.hstack([np.broadcast_to(base_rs, (no_cand, len(base))), contacts_rs]),
+            order,
+            axis=-1,
+        )
+        rv = np.take_along_axis(
+            np.hstack([np.broadcast_to(base_rv, (no_cand, len(base))), contacts_rv]),
+            order,
+            axis=-1,
+        )
+
+        i_ref = np.count_nonzero(depth < self.ref_depth, axis=-1)
+        upward = np.arange(depth.shape[-1]) <= i_ref[:, np.newaxis]
+        gas, wat = self.phases(depth, upward, goc=gocs, owc=owcs)
+
+        pres = self.node_pressure(depth, i_ref, gas, wat, rs=rs, rv=rv)
+
+        pbub, pdew = self.psat_at_depth(depth)
+        bo = self.pvt_model.calc_bo(pres, rs=rs)
+        bg = self.pvt_model.calc_bg(pres, rv=rv)
+        deno = self.pvt_model.calc_deno(pres, rs=rs)
+        deng = self.pvt_model.calc_deng(pres, rv=rv)
+
+        # In-place, as inplace_report
+        if porv is None:
+            ggip, ogip, ooip, goip = self.integrate_inplace(
+                depth,
+                bo,
+                bg,
+                rs,
+                rv,
+                goc=gocs[:, 0],
+                owc=owcs[:, 0],
+                top=self.top_struct,
+                bottom=self.bottom_struct,
+                method=method,
+            )
+        else:
+            bin_edges, porv_rows = porv
+            ggip, ogip, ooip, goip = self.porv_inplace(
+                depth,
+                bo,
+                bg,
+                rs,
+                rv,
+                goc=gocs[:, 0],
+                owc=owcs[:, 0],
+                bin_edges=bin_edges,
+                porv=porv_rows,
+            )
+
+        no_fatal_errors, no_errors, no_warnings = self.gradient_check_counts(
+            depth,
+            pres,
+            np.where(gas, pdew, pbub),
+            pbub,
+            pdew,
+            deno=deno,
+            deng=deng,
+            top=self.top_struct,
+            goc=gocs[:, 0],
+            woc=owcs[:, 0],
+        )
+
+        return pd.DataFrame(
+            {
+                "GOC": gocs[:, 0],
+                "OWC": owcs[:, 0],
+                "GGIP": ggip,
+                "OGIP": ogip,
+                "OOIP": ooip,
+                "GOIP": goip,
+                "FATAL_ERRORS": no_fatal_errors,
+                "ERRORS": no_errors,
+                "WARNINGS": no_warnings,
+            }
+        )
+
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def gradient_check_counts(
+        depth, pres, psat, pbub, pdew, *, deno, deng, top, goc, woc
+    ):
+        """
+        Returns (no_fatal_errors, no_errors, no_warnings) of the checks in
+        pvt_gradient_check, without messages
+
+        The depth node arrays may have leading dimensions (eg. one row per
+        candidate contacts), with top, goc and woc one value per row.
+        Intervals of zero length (repeated depth nodes) are not checked.
+        """
+
+        tol_pres = 0.1  # Pressure difference tolerance, bar
+        max_psat_grad = 1.0  # Considered to be very high psat gradient, bar/m
+
+        goc = np.asarray(goc, dtype=float)
+        woc = np.asarray(woc, dtype=float)
+
+        # Consistency check at GOC
+        at_goc = (top < goc) & (goc < woc)
+        i = np.argmin(np.abs(depth - goc[..., np.newaxis]), axis=-1)[..., np.newaxis]
+
+        def goc_value(values):
+            return np.take_along_axis(values, i, axis=-1)[..., 0]
+
+        pres_goc = goc_value(pres)
+        no_fatal_errors = at_goc & (goc_value(deno) <= goc_value(deng))
+        no_errors = at_goc & (
+            (goc_value(pbub) > pres_goc + tol_pres)
+            | (goc_value(pdew) > pres_goc + tol_pres)
+        )
+        no_warnings = at_goc & (
+            (goc_value(pbub) + tol_pres < pres_goc)
+            | (goc_value(pdew) + tol_pres < pres_goc)
+        )
+
+        # Check consistency for all depth intervals
+        d = depth[..., 1:]
+        dz = np.diff(depth, axis=-1)
+        dpsat = np.diff(psat, axis=-1)
+        valid = dz > 0.0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dxdz = dpsat / dz
+
+        goc = goc[..., np.newaxis]
+        checks_fatal = (d < goc) & (dpsat < 0.0) | (d > goc) & (dpsat > 0.0)
+        checks_error = psat[..., 1:] > pres[..., 1:]
+        checks_warning = np.abs(dxdz) > max_psat_grad
+
+        no_fatal_errors = no_fatal_errors + np.sum(valid & checks_fatal, axis=-1)
+        no_errors = no_errors + np.sum(valid & checks_error, axis=-1)
+        no_warnings = no_warnings + np.sum(valid & checks_warning, axis=-1)
+
+        return no_fatal_errors, no_errors, no_warnings
 
     # -----------------------------------------------------------------------------
     def plot_depth_tables(self, plot_dir="./diagnostic_plots/"):
@@ -652,10 +1157,12 @@ class ElementFluidDescription:
 
         """
 
+        profile = self.depth_profile
+
         if not os.path.isdir(plot_dir):
             os.makedirs(plot_dir)
 
-        if len(self.res_depth) < 2:
+        if self.depth_profile is None or len(self.depth_profile) < 2:
             raise ValueError("Fluid property depth tables not set")
 
         plt.figure(figsize=(15, 10))
@@ -665,18 +1172,18 @@ class ElementFluidDescription:
         # --------------------------------------------------------------
         plt.subplot(2, 2, 1)
 
-        x_min = min(min(self.res_pres), min(self.res_psat))
-        x_max = max(max(self.res_pres), max(self.res_psat))
+        x_min = min(min(profile.pres), min(profile.psat))
+        x_max = max(max(profile.pres), max(profile.psat))
 
         pdew = [self.pvt_model.calc_pdew(rv) for rv in self.rvvd_rv]
         pbub = [self.pvt_model.calc_pbub(rs) for rs in self.rsvd_rs]
 
         plt.plot(
-            self.res_pres, self.res_depth, "-x", color="grey", label="Pres", linewidth=2
+            profile.pres, profile.depth, "-x", color="grey", label="Pres", linewidth=2
         )
         plt.plot(
-            self.res_psat,
-            self.res_depth,
+            profile.psat,
+            profile.depth,
             "-o",
             color="black",
             label="Psat",
@@ -688,7 +1195,7 @@ class ElementFluidDescription:
         plt.plot([x_min, x_max], [self.goc, self.goc], "r-.", label="GOC", linewidth=3)
         plt.plot([x_min, x_max], [self.owc, self.owc], "b--", label="OWC", linewidth=3)
 
-        plt.ylim(min(self.res_depth), min(self.owc + 10, max(self.res_depth)))
+        plt.ylim(min(profile.depth), min(self.owc + 10, max(profile.depth)))
 
         plt.gca().invert_yaxis()
         plt.legend()
@@ -698,12 +1205,12 @@ class ElementFluidDescription:
         # Fig 1-2: GOR vs depth
         # --------------------------------------------------------------
         plt.subplot(2, 2, 2)
-        x_min = min(min(self.res_gor), min(self.res_gor))
-        x_max = max(max(self.res_gor), max(self.res_gor))
+        x_min = min(min(profile.gor), min(profile.gor))
+        x_max = max(max(profile.gor), max(profile.gor))
         inv_rv = [1 / rv for rv in self.rvvd_rv]
 
         plt.plot(
-            self.res_gor, self.res_depth, "-o", color="black", label="GOR", linewidth=2
+            profile.gor, profile.depth, "-o", color="black", label="GOR", linewidth=2
         )
         plt.plot(
             self.rsvd_rs, self.rsvd_depth, "o", color="green", label="RSVD", linewidth=2
@@ -713,7 +1220,7 @@ class ElementFluidDescription:
         )
         plt.plot([x_min, x_max], [self.goc, self.goc], "r-.", label="GOC", linewidth=3)
         plt.plot([x_min, x_max], [self.owc, self.owc], "b--", label="OWC", linewidth=3)
-        plt.ylim(min(self.res_depth), min(self.owc + 10, max(self.res_depth)))
+        plt.ylim(min(profile.depth), min(self.owc + 10, max(profile.depth)))
 
         plt.gca().invert_yaxis()
         plt.legend()
@@ -761,6 +1268,8 @@ class ElementFluidDescription:
 
         """
 
+        profile = self.depth_profile
+
         print()
         print("------------------------------------------------------------")
         print("Calculated fluid PVT properties vs. depth")
@@ -817,25 +1326,25 @@ class ElementFluidDescription:
 
         vals = tuple(
             zip(
-                self.res_depth,
-                self.res_fluid_type,
-                self.res_pres,
-                self.res_psat,
-                self.res_gor,
-                self.res_den,
-                self.res_pbub,
-                self.res_rs,
-                self.res_deno,
-                self.res_bo,
-                self.res_viso,
-                self.res_pdew,
-                self.res_rv,
-                self.res_deng,
-                self.res_bg,
-                self.res_visg,
-                self.res_denw,
-                self.res_bw,
-                self.res_visw,
+                profile.depth,
+                profile.fluid_type,
+                profile.pres,
+                profile.psat,
+                profile.gor,
+                profile.den,
+                profile.pbub,
+                profile.rs,
+                profile.deno,
+                profile.bo,
+                profile.viso,
+                profile.pdew,
+                profile.rv,
+                profile.deng,
+                profile.bg,
+                profile.visg,
+                profile.denw,
+                profile.bw,
+                profile.visw,
             )
         )
 
@@ -846,14 +1355,42 @@ class ElementFluidDescription:
         print()
 
     # -----------------------------------------------------------------------------
-    def pvt_gradient_check(self):
+    def _log_check(self, level, check, msg, depth=None, **values):
         """
-        Performs a fluid PVT vs depth table consistency check
+        Logs the result of a consistency check, with the check code, depth
+        interval and values as extra items, see ConsistencyReport
+        """
+        self.pvt_logger.log(
+            level,
+            msg,
+            extra={
+                "pvtnum": self.pvtnum,
+                "eqlnum": self.eqlnum,
+                "check": check,
+                "depth": None if depth is None else tuple(float(d) for d in depth),
+                "values": {key: float(value) for key, value in values.items()},
+            },
+        )
 
+    def gradient_violations(self):
         """
-        no_warnings = 0
-        no_errors = 0
-        no_fatal_errors = 0
+        Returns the violations of the fluid PVT vs depth table consistency
+        checks, see pvt_gradient_check, as a pandas.DataFrame with columns:
+
+            - CHECK        : check code, see CHECK_SEVERITY
+            - SEVERITY     : "FATAL", "ERROR" or "WARNING"
+            - NODE         : depth node at the GOC, or at the interval bottom
+            - DEPTH_TOP    : top of the depth interval
+            - DEPTH_BOTTOM : bottom of the depth interval
+
+        The checks are array masks over the depth intervals, ordered as the
+        intervals (GOC checks first), and by check within an interval.
+        """
+
+        profile = self.depth_profile
+        depth = profile.depth
+        psat = profile.psat
+        pres = profile.pres
 
         top = self.top_struct
         goc = self.goc
@@ -863,127 +1400,289 @@ class ElementFluidDescription:
         tol_pres = 0.1  # Pressure difference tolerance, bar
         max_psat_grad = 1.0  # Considered to be very high psat gradient, bar/m
 
+        checks = []
+        nodes = []
+
         # Consistency check at GOC
         if top < goc < woc:
-            delta = [abs(d - goc) for d in self.res_depth]
-            i = delta.index(min(delta))
+            i = int(np.argmin(np.abs(depth - goc)))
+            goc_masks = [
+                profile.deno[i] <= profile.deng[i],
+                profile.pbub[i] > pres[i] + tol_pres
+                or profile.pdew[i] > pres[i] + tol_pres,
+                profile.pbub[i] + tol_pres < pres[i]
+                or profile.pdew[i] + tol_pres < pres[i],
+            ]
+            for check, mask in zip(self.GOC_CHECKS, goc_masks):
+                if mask:
+                    checks.append(check)
+                    nodes.append(i)
+
+        # Check consistency for all depth intervals, except intervals of
+        # zero length (repeated depth nodes), as gradient_check_counts
+        d = depth[1:]
+        dz = np.diff(depth)
+        dpsat = np.diff(psat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dxdz = dpsat / dz
+
+        interval_masks = np.array(
+            [
+                (d < goc) & (dpsat < 0.0),
+                (d > goc) & (dpsat > 0.0),
+                psat[1:] > pres[1:],
+                np.abs(dxdz) > max_psat_grad,
+            ]
+        ) & (dz > 0.0)
+        interval, check_index = np.nonzero(interval_masks.T)
+        checks.extend(np.array(self.INTERVAL_CHECKS)[check_index])
+        nodes.extend(interval + 1)
+
+        nodes = np.asarray(nodes, dtype=int)
+        goc_nodes = np.arange(len(nodes)) < len(nodes) - len(interval)
+
+        return pd.DataFrame(
+            {
+                "CHECK": checks,
+                "SEVERITY": [self.CHECK_SEVERITY[check] for check in checks],
+                "NODE": nodes,
+                "DEPTH_TOP": np.where(goc_nodes, goc, depth[nodes - 1]),
+                "DEPTH_BOTTOM": np.where(goc_nodes, goc, depth[nodes]),
+            },
+            columns=["CHECK", "SEVERITY", "NODE", "DEPTH_TOP", "DEPTH_BOTTOM"],
+        )
+
+    def pvt_gradient_check(self):
+        """
+        Performs a fluid PVT vs depth table consistency check
+
+        Messages are only formatted for the violations, see
+        gradient_violations.
+
+        Returns (no_fatal_errors, no_errors, no_warnings)
+        """
+
+        profile = self.depth_profile
+        max_psat_grad = 1.0  # Considered to be very high psat gradient, bar/m
 
-            # Oil and gas density at GOC
-            if self.res_deno[i] <= self.res_deng[i]:
+        violations = self.gradient_violations()
 
+        for check, i, d_1, d in violations[
+            ["CHECK", "NODE", "DEPTH_TOP", "DEPTH_BOTTOM"]
+        ].itertuples(index=False):
+
+            if check == "GOC_DENSITY":
                 msg = (
                     "Inconcsistent phase densities at GOC:" "{} : {:8.2f}  {} : {:8.2f}"
                 ).format(
                     "Oil density (kg/m3)",
-                    self.res_deno[i],
+                    profile.deno[i],
                     "Gas density (kg/m3)",
-                    self.res_deng[i],
+                    profile.deng[i],
                 )
                 print("\nERROR - ", msg)
-                self.pvt_logger.error(msg, extra={"pvtnum": self.pvtnum})
-                no_fatal_errors += 1
-
-            # Psat > press
-            if (
-                self.res_pbub[i] > self.res_pres[i] + tol_pres
-                or self.res_pdew[i] > self.res_pres[i] + tol_pres
-            ):
+                self._log_check(
+                    logging.ERROR,
+                    check,
+                    msg,
+                    (d_1, d),
+                    deno=profile.deno[i],
+                    deng=profile.deng[i],
+                )
+
+            elif check == "GOC_PSAT_ABOVE_PRES":
                 msg = (
                     "Psat higher than pressure gas-oil-contact:\n"
                     "Res. pressure (bar)   : {:8.2f}\n"
                     "Bubble-point pressure : {:8.2f}\n"
                     "Dew-point pressure    : {:8.2f}\n"
-                ).format(self.res_pres[i], self.res_pbub[i], self.res_pdew[i])
-
+                ).format(profile.pres[i], profile.pbub[i], profile.pdew[i])
                 print("\nERROR - ", msg)
-                self.pvt_logger.error(msg, extra={"pvtnum": self.pvtnum})
-                no_errors += 1
-
-            # undersaturated GOC
-            if (
-                self.res_pbub[i] + tol_pres < self.res_pres[i]
-                or self.res_pdew[i] + tol_pres < self.res_pres[i]
-            ):
+                self._log_check(
+                    logging.ERROR,
+                    check,
+                    msg,
+                    (d_1, d),
+                    pres=profile.pres[i],
+                    pbub=profile.pbub[i],
+                    pdew=profile.pdew[i],
+                )
 
+            elif check == "GOC_UNDERSATURATED":
                 msg = (
                     "Undersaturated gas-oil-contact:\n"
                     "Res. pressure (bar)   : {:8.2f}\n"
                     "Bubble-point pressure : {:8.2f}\n"
                     "Dew-point pressure : {:8.2f}\n"
-                ).format(self.res_pres[i], self.res_pbub[i], self.res_pdew[i])
-
+                ).format(profile.pres[i], profile.pbub[i], profile.pdew[i])
                 print("\nWARNING - ", msg)
-                self.pvt_logger.warning(msg, extra={"pvtnum": self.pvtnum})
-                no_warnings += 1
-
-        # Check consistency for all depth nodes
-        for i in range(1, len(self.res_depth)):
-
-            d_1 = self.res_depth[i - 1]
-            d = self.res_depth[i]
-
-            # if abs(d - goc) < tol_depth:
-            #    next
-
-            # Psat
-            xi_1 = self.res_psat[i - 1]
-            xi = self.res_psat[i]
-            dxdz = (xi - xi_1) / (d - d_1)
-
-            if d < goc and xi < xi_1:
+                self._log_check(
+                    logging.WARNING,
+                    check,
+                    msg,
+                    (d_1, d),
+                    pres=profile.pres[i],
+                    pbub=profile.pbub[i],
+                    pdew=profile.pdew[i],
+                )
 
+            elif check in ("DEWPOINT_NON_MONOTONIC", "BUBBLEPOINT_NON_MONOTONIC"):
+                point = "dew" if check == "DEWPOINT_NON_MONOTONIC" else "bubble"
                 msg = (
-                    "Non-monotinic dew-points " "in depth interval [{:6.1f} - {:6.1f}]"
-                ).format(d_1, d)
-
+                    "Non-monotinic {}-points in depth interval [{:6.1f} - {:6.1f}]"
+                ).format(point, d_1, d)
                 print("\nERROR: ", msg)
-                self.pvt_logger.error(msg, extra={"pvtnum": self.pvtnum})
-
-                no_fatal_errors += 1
-
-            if d > goc and xi > xi_1:
+                self._log_check(
+                    logging.ERROR,
+                    check,
+                    msg,
+                    (d_1, d),
+                    psat_top=profile.psat[i - 1],
+                    psat_bottom=profile.psat[i],
+                )
 
-                msg = (
-                    "Non-monotinic bubble-points "
-                    "in depth interval [{:6.1f} - {:6.1f}]"
-                ).format(d_1, d)
+            else:
+                dxdz = (profile.psat[i] - profile.psat[i - 1]) / (d - d_1)
+                if check == "PSAT_ABOVE_PRES":
+                    msg = (
+                        "Sat. pressure {:4.2f} > res. pressure {:4.2f} "
+                        "in depth interval [{:6.1f} - {:6.1f}]"
+                    ).format(abs(dxdz), max_psat_grad, d_1, d)
+                    print("\nERROR: ", msg)
+                    self._log_check(
+                        logging.ERROR,
+                        check,
+                        msg,
+                        (d_1, d),
+                        psat=profile.psat[i],
+                        pres=profile.pres[i],
+                    )
+                else:
+                    msg = (
+                        "Saturation pressure point gradient {:4.2f} > {:4.2f} "
+                        "in depth interval [{:6.1f} - {:6.1f}]"
+                    ).format(abs(dxdz), max_psat_grad, d_1, d)
+                    print("\nWARNNING: ", msg)
+                    self._log_check(
+                        logging.WARNING,
+                        check,
+                        msg,
+                        (d_1, d),
+                        gradient=dxdz,
+                        max_gradient=max_psat_grad,
+                    )
+
+        severity = violations["SEVERITY"]
+        return (
+            int((severity == "FATAL").sum()),
+            int((severity == "ERROR").sum()),
+            int((severity == "WARNING").sum()),
+        )
 
-                print("\nERROR: ", msg)
-                self.pvt_logger.error(msg, extra={"pvtnum": self.pvtnum})
+    # -----------------------------------------------------------------------------
+    @staticmethod
+    def integrate_inplace(
+        depth, bo, bg, rs, rv, *, goc, owc, top=None, bottom=None, method=None
+    ):
+        """
+        Returns (ggip, ogip, ooip, goip) integrated over the depth nodes, see
+        inplace_report
 
-                no_fatal_errors += 1
+        The gas zone is from top (default the top node) to the GOC and the oil
+        zone from the GOC to the OWC or bottom (default the bottom node).
+        Intervals across a zone boundary are integrated over the part within
+        the zone. method is "trapezoid" (default) or "simpson", see
+        _integrate_zone.
 
-            if xi > self.res_pres[i]:
+        The depth node arrays may have leading dimensions (eg. one row per
+        region or candidate contacts), with goc and owc one value per row.
+        """
 
-                msg = (
-                    "Sat. pressure {:4.2f} > res. pressure {:4.2f} "
-                    "in depth interval [{:6.1f} - {:6.1f}]"
-                ).format(abs(dxdz), max_psat_grad, d_1, d)
+        method = method or "trapezoid"
+        if method not in ("trapezoid", "simpson"):
+            raise ValueError("Unknown integration method: " + str(method))
+
+        depth = np.asarray(depth, dtype=float)
+        goc = np.asarray(goc, dtype=float)[..., np.newaxis]
+        owc = np.asarray(owc, dtype=float)[..., np.newaxis]
+        top = -np.inf if top is None else top
+        bottom = np.inf if bottom is None else bottom
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gas_zone = (
+                top,
+                np.minimum(np.maximum(goc, top), bottom),
+                [1.0 / bg, rv / bg],
+            )
+            oil_zone = (
+                np.maximum(goc, top),
+                np.minimum(owc, bottom),
+                [1.0 / bo, rs / bo],
+            )
 
-                print("\nERROR: ", msg)
-                self.pvt_logger.error(msg, extra={"pvtnum": self.pvtnum})
+        return tuple(
+            _integrate_zone(depth, values, top, bottom, method)
+            for top, bottom, integrands in (gas_zone, oil_zone)
+            for values in integrands
+        )
 
-                no_errors += 1
+    @staticmethod
+    def porv_inplace(depth, bo, bg, rs, rv, *, goc, owc, bin_edges, porv):
+        """
+        Returns pore volume weighted (ggip, ogip, ooip, goip), see
+        inplace_report, from a pore volume vs. depth histogram
+
+        porv is the pore volume per depth bin, bin_edges the bin boundaries.
+        The fluid properties are interpolated from the depth nodes to the bin
+        centres, and each bin is split between the zones at the contacts, as
+        if its pore volume is uniform with depth. The in-place is then a dot
+        product of the zone pore volumes and the properties at the bins.
+
+        The depth node arrays may have leading dimensions (eg. one row per
+        region or candidate contacts), with goc and owc one value per row, and
+        porv one row per row or shared.
+        """
 
-            if abs(dxdz) > max_psat_grad:
+        bin_edges = np.asarray(bin_edges, dtype=float)
+        centres = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+        bin_top = bin_edges[:-1]
+        bin_size = np.diff(bin_edges)
 
-                msg = (
-                    "Saturation pressure point gradient {:4.2f} > {:4.2f} "
-                    "in depth interval [{:6.1f} - {:6.1f}]"
-                ).format(abs(dxdz), max_psat_grad, d_1, d)
+        def above(contact):
+            contact = np.asarray(contact, dtype=float)[..., np.newaxis]
+            return np.clip((contact - bin_top) / bin_size, 0.0, 1.0)
 
-                print("\nWARNNING: ", msg)
-                self.pvt_logger.warning(msg, extra={"pvtnum": self.pvtnum})
+        porv_gas = porv * above(goc)
+        porv_oil = porv * (above(owc) - above(goc))
 
-                no_warnings += 1
+        depth = np.asarray(depth, dtype=float)
+        bo, bg, rs, rv = (
+            _interp_rows(centres, depth, values) for values in (bo, bg, rs, rv)
+        )
 
-        return (no_fatal_errors, no_errors, no_warnings)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = [
+                (porv_gas, 1.0 / bg),
+                (porv_gas, rv / bg),
+                (porv_oil, 1.0 / bo),
+                (porv_oil, rs / bo),
+            ]
+
+        return tuple(
+            np.einsum("...i,...i->...", zone_porv, np.where(zone_porv > 0.0, x, 0.0))
+            for zone_porv, x in terms
+        )
 
-    # -----------------------------------------------------------------------------
-    def inplace_report(self, no_nodes=20):
+    def inplace_report(self, no_nodes=None, porv=None, method=None):
         """
-        Calculate reservoir height weighted in place,
-        as if porevolume is linear with depth
+        Calculate reservoir height weighted in place, by integrating over
+        the depth profile between top and bottom structure, see
+        integrate_inplace. With porv, a pore volume vs. depth histogram
+        (bin_edges, pore volume per bin), the in place is pore volume
+        weighted, see porv_inplace.
+
+        The depth profile is calculated with no_nodes depth nodes if given,
+        or if not calculated yet (20 nodes).
 
         Can be used to quantify potential effects on in-place when RSVD
         and RVVD tables are changed
@@ -997,31 +1696,32 @@ class ElementFluidDescription:
 
         """
 
-        if no_nodes != 20:
-            raise ValueError("no_nodes not implemented")
-
-        ooip = 0.0
-        goip = 0.0
-        ogip = 0.0
-        ggip = 0.0
-
-        for i in range(1, len(self.res_depth)):
-
-            d = self.res_depth[i]
-            dh = d - self.res_depth[i - 1]
+        if no_nodes is not None or self.depth_profile is None:
+            self.calc_fluid_prop_vs_depth(no_nodes=no_nodes or 20)
 
-            bo = self.res_bo[i]
-            rs = self.res_rs[i]
-            bg = self.res_bg[i]
-            rv = self.res_rv[i]
+        profile = self.depth_profile
 
-            if d <= self.goc:
-                ggip += dh / bg
-                ogip += dh * rv / bg
+        columns = [profile.depth, profile.bo, profile.bg, profile.rs, profile.rv]
+        if porv is None:
+            inplace = self.integrate_inplace(
+                *columns,
+                goc=self.goc,
+                owc=self.owc,
+                top=self.top_struct,
+                bottom=self.bottom_struct,
+                method=method,
+            )
+        else:
+            bin_edges, porv_rows = porv
+            inplace = self.porv_inplace(
+                *columns,
+                goc=self.goc,
+                owc=self.owc,
+                bin_edges=bin_edges,
+                porv=porv_rows,
+            )
 
-            elif d <= self.owc:
-                ooip += dh / bo
-                goip += dh * rs / bo
+        ggip, ogip, ooip, goip = (float(value) for value in inplace)
 
         print()
         print("------------------------------------------------------------")
@@ -1046,6 +1746,8 @@ class ElementFluidDescription:
 
         """
 
+        profile = self.depth_profile
+
         new_rsvd_depth = []
         new_rsvd_rs = []
         new_rvvd_depth = []
@@ -1057,57 +1759,57 @@ class ElementFluidDescription:
 
         if goc >= woc:
 
-            i_goc = len(self.res_depth) - 1
+            i_goc = len(profile.depth) - 1
 
-            new_rvvd_depth.append(self.res_depth[-1])
-            new_rvvd_rv.append(self.res_depth[-1])
+            new_rvvd_depth.append(profile.depth[-1])
+            new_rvvd_rv.append(profile.depth[-1])
 
         elif goc >= top:
 
             i_goc = 0
 
-            new_rsvd_depth.append(self.res_depth[0])
-            new_rvvd_rv.append(self.res_depth[0])
+            new_rsvd_depth.append(profile.depth[0])
+            new_rvvd_rv.append(profile.depth[0])
 
         # Correct tables at GOC
         else:
 
-            delta = [abs(d - goc) for d in self.res_depth]
+            delta = [abs(d - goc) for d in profile.depth]
             i_goc = delta.index(min(delta))
 
             new_rvvd_depth.append(goc)
             new_rsvd_depth.append(goc)
 
-            rv = self.res_rv[i_goc]
-            rs = self.res_rs[i_goc]
+            rv = profile.rv[i_goc]
+            rs = profile.rs[i_goc]
 
             # Pbub > press
-            if self.res_pbub[i_goc] > self.res_pres[i_goc]:
+            if profile.pbub[i_goc] > profile.pres[i_goc]:
 
                 print("\nCorrecting pbub higher than pressure gas-oil-contact")
 
-                rs = self.pvt_model.calc_rs(self.res_pres[i_goc])
+                rs = self.pvt_model.calc_rs(profile.pres[i_goc])
 
             # undersaturated psat
-            elif not allow_usat_goc and self.res_psat[i_goc] < self.res_pres[i_goc]:
+            elif not allow_usat_goc and profile.psat[i_goc] < profile.pres[i_goc]:
 
                 print("\nCorrecting undersaturated bub-point at GOC")
 
-                rs = self.pvt_model.calc_rs(self.res_pres[i_goc])
+                rs = self.pvt_model.calc_rs(profile.pres[i_goc])
 
             # Pdew > press
-            if self.res_pdew[i_goc] > self.res_pres[i_goc]:
+            if profile.pdew[i_goc] > profile.pres[i_goc]:
 
                 print("\nCorrecting pdew higher than pressure gas-oil-contact")
 
-                rv = self.pvt_model.calc_rv(self.res_pres[i_goc])
+                rv = self.pvt_model.calc_rv(profile.pres[i_goc])
 
             # undersaturated pdew
-            elif not allow_usat_goc and self.res_pdew[i_goc] < self.res_pres[i_goc]:
+            elif not allow_usat_goc and profile.pdew[i_goc] < profile.pres[i_goc]:
 
                 print("\nCorrecting undersaturated dew-point at GOC")
 
-                rv = self.pvt_model.calc_rv(self.res_pres[i_goc])
+                rv = self.pvt_model.calc_rv(profile.pres[i_goc])
 
             new_rsvd_rs.append(rs)
             new_rvvd_rv.append(rv)
@@ -1115,9 +1817,9 @@ class ElementFluidDescription:
         # For gas RVVD table - traverse upwards from GOC to TOP
         for i in range(i_goc - 1, -1, -1):
 
-            new_rvvd_depth.append(self.res_depth[i])
+            new_rvvd_depth.append(profile.depth[i])
 
-            rv = self.res_rv[i]
+            rv = profile.rv[i]
 
             if rv > new_rvvd_rv[-1]:
 
@@ -1125,11 +1827,11 @@ class ElementFluidDescription:
 
                 rv = new_rvvd_rv[-1]
 
-            if self.res_pdew[i] > self.res_pres[i]:
+            if profile.pdew[i] > profile.pres[i]:
 
                 print("\nCorrecting psat higher than reservoir pressure")
 
-                rv = self.pvt_model.calc_rv(self.res_pres[i_goc])
+                rv = self.pvt_model.calc_rv(profile.pres[i_goc])
 
             new_rvvd_rv.append(rv)
 
@@ -1137,11 +1839,11 @@ class ElementFluidDescription:
         new_rvvd_rv.reverse()
 
         # Oil RSVD table, correct from GOC and downwards
-        for i in range(i_goc + 1, len(self.res_depth)):
+        for i in range(i_goc + 1, len(profile.depth)):
 
-            new_rvvd_depth.append(self.res_depth[i])
+            new_rvvd_depth.append(profile.depth[i])
 
-            rs = self.res_rs[i]
+            rs = profile.rs[i]
 
             if rs > new_rsvd_rs[-1]:
 
@@ -1149,11 +1851,11 @@ class ElementFluidDescription:
 
                 rs = new_rsvd_rs[-1]
 
-            if self.res_pbub[i] > self.res_pres[i]:
+            if profile.pbub[i] > profile.pres[i]:
 
                 print("\nCorrecting psat higher than reservoir pressure")
 
-                rs = self.pvt_model.calc_rs(self.res_pres[i_goc])
+                rs = self.pvt_model.calc_rs(profile.pres[i_goc])
 
             new_rsvd_rs.append(rs)
 
@@ -0,0 +1,178 @@
+"""ensemble module"""
+
+import contextlib
+import io
+import logging
+import multiprocessing
+import pathlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pypvt.field_fluid_description import EQUIL_KEYWORDS, FieldFluidDescription
+from pypvt import region_workers
+
+# Keywords a realisation directory may override
+REALISATION_KEYWORDS = EQUIL_KEYWORDS + ["PVT"]
+
+ENSEMBLE_COLUMNS = [
+    "REALISATION",
+    "EQLNUM",
+    "PVTNUM",
+    "GGIP",
+    "OGIP",
+    "OOIP",
+    "GOIP",
+    "FATAL_ERRORS",
+    "ERRORS",
+    "WARNINGS",
+]
+
+# Base case tables shared by the realisations in a worker process
+_WORKER_CASE_TABLES = {}
+
+
+def realisation_kwfiles(directory):
+    """
+    returns: kwfile_dict of a realisation directory, ie the keyword override
+    files found in it. A file overrides the keyword given by its name up to
+    the first dot, in any case, eg. rsvd.inc, RSVD.INC or pvt.inc.
+    """
+
+    kwfile_dict = {}
+    for path in sorted(pathlib.Path(directory).iterdir()):
+        keyword = path.name.split(".")[0].upper()
+        if not path.is_file() or keyword not in REALISATION_KEYWORDS:
+            continue
+        if keyword in kwfile_dict:
+            raise ValueError(
+                f"More than one {keyword} file in {directory}: "
+                f"{kwfile_dict[keyword].name}, {path.name}"
+            )
+        kwfile_dict[keyword] = path
+
+    return kwfile_dict
+
+
+def _init_worker(case_tables, level):
+    """
+    Process pool initializer, receives the base case tables once per worker.
+    Log records are only collected, to be replayed by the parent process.
+    """
+    _WORKER_CASE_TABLES.clear()
+    _WORKER_CASE_TABLES.update(case_tables)
+
+    field_logger = logging.getLogger(FieldFluidDescription.__module__)
+    field_logger.setLevel(level)
+    field_logger.propagate = False
+
+
+def _evaluate_realisation(case_tables, task):
+    """
+    Evaluates all regions of one realisation, ie the base case tables with
+    the keyword overrides of the realisation
+
+    returns: (rows, log record dicts, printed output). A realisation that
+    can not be set up or evaluated gives no rows.
+    """
+    name, kwfile_dict, no_nodes = task
+
+    rows = []
+    records = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        field = None
+        try:
+            field = FieldFluidDescription(None, kwfile_dict, case_tables=case_tables)
+            for result in field.evaluate(no_nodes=no_nodes):
+                rows.append(
+                    (name, result.eqlnum, result.pvtnum)
+                    + tuple(result.inplace)
+                    + tuple(result.checks)
+                )
+        except (OSError, ValueError, KeyError, IndexError, AssertionError) as err:
+            msg = f"Unable to evaluate realisation {name}: {err}"
+            print("\nERROR - ", msg)
+            rows = []
+        finally:
+            if field is not None:
+                records = field.records_list()
+                field.close()
+
+    return rows, region_workers.record_dicts(records), output.getvalue()
+
+
+def _evaluate_worker(task):
+    """
+    Evaluates one realisation in a worker process
+    """
+    return _evaluate_realisation(_WORKER_CASE_TABLES, task)
+
+
+def evaluate_ensemble(ecl_case, realisations, no_nodes=20, workers=1, cache=None):
+    """
+    Evaluates the in-place report and gradient check of all regions for an
+    ensemble of realisations sharing one base case
+
+    The base case (ecl_case) is read once, and each realisation only reads
+    its own keyword overrides, see realisation_kwfiles. realisations is a
+    list of realisation directories, or a dict of kwfile_dict per
+    realisation name. With workers > 1 the realisations are evaluated in a
+    pool of worker processes, and printed output and log records are
+    replayed in realisation order.
+
+    returns: pandas.DataFrame with one row per realisation and region
+    """
+
+    if workers is None or workers < 1:
+        raise ValueError("Number of workers must be a positive integer")
+
+    if not isinstance(realisations, dict):
+        realisations = {
+            pathlib.Path(directory).name: realisation_kwfiles(directory)
+            for directory in realisations
+        }
+
+    case_tables = FieldFluidDescription.load_case_tables(ecl_case, cache=cache)
+
+    field_logger = logging.getLogger(FieldFluidDescription.__module__)
+    tasks = [
+        (name, kwfile_dict, no_nodes) for name, kwfile_dict in realisations.items()
+    ]
+
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        outputs = [_evaluate_realisation(case_tables, task) for task in tasks]
+    else:
+        with multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(case_tables, field_logger.getEffectiveLevel()),
+        ) as pool:
+            outputs = pool.map(_evaluate_worker, tasks)
+
+    return _collect_outputs(outputs, field_logger if workers > 1 else None)
+
+
+def _collect_outputs(outputs, logger=None):
+    """
+    Replays the printed output, and the log records to logger if given, of
+    the realisations in order
+
+    returns: pandas.DataFrame with the rows of all realisations
+    """
+
+    rows = []
+    for realisation_rows, record_dicts, text in outputs:
+        sys.stdout.write(text)
+        if logger is not None:
+            for record_dict in record_dicts:
+                logger.handle(logging.makeLogRecord(record_dict))
+        rows.extend(realisation_rows)
+
+    df = pd.DataFrame(rows, columns=ENSEMBLE_COLUMNS)
+    for column in ["EQLNUM", "PVTNUM", "FATAL_ERRORS", "ERRORS", "WARNINGS"]:
+        df[column] = df[column].astype(np.int64)
+
+    return df
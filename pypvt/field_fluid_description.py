@@ -3,35 +3,89 @@
 import logging
 
 from typing import List
+from collections import namedtuple
+import multiprocessing
 import sys
 import copy
+import gzip
 
+import numpy as np
 import pandas as pd
 import ecl2df
 
-from pypvt.element_fluid_description import ElementFluidDescription
-from pypvt.bopvt import BoPVT
+from pypvt.element_fluid_description import ElementFluidDescription, partition_equil
+from pypvt.bopvt import BoPVT, partition_pvt
+from pypvt import region_workers
+from pypvt.region_workers import RecordsListHandler
+from pypvt.depth_profile import DepthProfile
+from pypvt.case_cache import case_key
+from pypvt.consistency_report import ConsistencyReport
 
 # pylint: disable=too-many-branches
 # pylint: disable=too-many-locals
+# pylint: disable=too-many-statements
 
 
-# A new handler to store "raw" LogRecords instances
-class RecordsListHandler(logging.Handler):
+# Keywords read by ecl2df.equil
+EQUIL_KEYWORDS = ["EQUIL", "RSVD", "RVVD", "PBVD", "PDVD"]
+
+# Depth bin size (m) of the pore volume vs. depth histogram
+PORV_BIN_SIZE = 1.0
+
+# Output buffer size and table row format of write_equilkws
+WRITE_BUFFER_SIZE = 1024**2
+VD_FORMAT = "  %20.7f %20.7f"
+
+# The partitioned pvt and equil tables and the structure (top, bottom) the
+# regions are built from, with the active regions (eqlnum, pvtnum), ordered as
+# the fluid descriptions, and the regions not selected by eqlnums, see
+# FieldFluidDescription.__init__
+RegionTables = namedtuple(
+    "RegionTables", ["pvt", "equil", "struct", "regions", "unselected"]
+)
+
+
+def _write_equil(fileh, fluids):
     """
-    A handler class which stores LogRecord entries in a list
+    Writes the EQUIL records of the fluids, one line per region. Items not set
+    are defaulted (1*).
     """
 
-    def __init__(self, r_list):
-        """
-        Initiate the handler
-        :param records_list: a list to store the LogRecords entries
-        """
-        self.records_list = r_list
-        super().__init__()
+    items = ["Z", "PRESSURE", "OWC", "PCOWC", "GOC", "PCGOC", "INITRS", "INITRV"]
+    fileh.write("-- " + " ".join(f"{item:>14}" for item in items) + "\n")
+
+    for fluid in fluids:
+        record = fluid.equil_record()
+        values = []
+        for item in items:
+            value = record[item]
+            if value is None or pd.isna(value):
+                values.append(f"{'1*':>14}")
+            elif item in ("INITRS", "INITRV"):
+                values.append(f"{int(value):>14d}")
+            else:
+                values.append(f"{value:14.4f}")
+        fileh.write("   " + " ".join(values) + " /\n")
+
+
+def _write_vd_tables(fileh, keyword, fluids):
+    """
+    Writes the RSVD, RVVD, PBVD or PDVD tables of the fluids, sorted on depth,
+    one table per region. The table rows are formatted in bulk.
+    """
 
-    def emit(self, record):
-        self.records_list.append(record)
+    column = ElementFluidDescription.VD_TABLES[keyword][0]
+    fileh.write(f"--   {'DEPTH':^21} {column:^21} \n")
+
+    for fluid in fluids:
+        values, depth = fluid.vd_table(keyword)
+        if len(depth) == 0:
+            continue
+
+        order = np.argsort(depth, kind="stable")
+        fileh.write(f"-- EQLNUM: {fluid.eqlnum}\n")
+        np.savetxt(fileh, np.column_stack((depth[order], values[order])), fmt=VD_FORMAT)
+        fileh.write("/\n")
 
 
 class FieldFluidDescription:
@@ -40,44 +94,131 @@ class FieldFluidDescription:
     """
 
     @staticmethod
-    def _parse_ecl_case(case_name):
-        eclfiles = ecl2df.EclFiles(case_name)
+    def _load_grid(eclfiles, porv=False):
+        """
+        Loads cell depth (Z), PVTNUM and EQLNUM, and optionally PORV, for the
+        active cells directly from the INIT file into numpy arrays, without
+        building the grid geometry.
+
+        DEPTH is read from the INIT file, falling back to the cell centres of
+        the EGRID. Missing region vectors default to region 1. PORV is given
+        for all cells in the INIT file, and is reduced to the active cells by
+        ACTNUM from the EGRID file.
+
+        returns: pandas.DataFrame with one row per active cell
+        """
+
+        init = eclfiles.get_initfile()
+
+        def init_vector(name, dtype):
+            if not init.has_kw(name):
+                return None
+            return np.array(init.iget_named_kw(name, 0).numpyView(), dtype=dtype)
+
+        depth = init_vector("DEPTH", float)
+        if depth is None:
+            egrid = eclfiles.get_egrid()
+            depth = egrid.export_position(egrid.export_index(active_only=True))[:, 2]
+
+        grid = {"Z": depth}
+        for name in ["PVTNUM", "EQLNUM"]:
+            grid[name] = init_vector(name, int)
+            if grid[name] is None:
+                grid[name] = np.ones(len(depth), dtype=int)
+
+        if porv and init.has_kw("PORV"):
+            porv_all = init_vector("PORV", float)
+            if len(porv_all) == len(depth):
+                grid["PORV"] = porv_all
+            else:
+                egrid_file = eclfiles.get_egridfile()
+                actnum = egrid_file.iget_named_kw("ACTNUM", 0).numpyView()
+                grid["PORV"] = porv_all[np.flatnonzero(actnum > 0)]
+
+        return pd.DataFrame(grid)
+
+    @staticmethod
+    def _equil_from_deck(deck):
+        """
+        Extracts the EQUIL, RSVD, RVVD, PBVD and PDVD tables from a parsed
+        deck, one extraction per keyword present in the deck
+
+        returns: dict of pandas.DataFrame per keyword, as from
+        ecl2df.equil.df(deck, keywords=keyword), empty if not in the deck
+        """
+
+        df_dict = {}
+        for keyword in EQUIL_KEYWORDS:
+            df = pd.DataFrame()
+            if keyword in deck:
+                from_deck = getattr(ecl2df.equil, keyword.lower() + "_fromdeck")
+                df = from_deck(deck)
+            df_dict[keyword] = (
+                pd.DataFrame() if df.empty else df.assign(KEYWORD=keyword)
+            )
+
+        return df_dict
+
+    @staticmethod
+    def _parse_ecl_case(eclfiles, porv=False):
+        """
+        Reads grid, pvt and equil tables of an eclipse case, parsing the
+        deck only once
+        """
         df_dict = {}
         try:
-            df_dict["GRID"] = ecl2df.grid.df(eclfiles)
-        except KeyError:
+            df_dict["GRID"] = FieldFluidDescription._load_grid(eclfiles, porv=porv)
+        except (KeyError, FileNotFoundError):
             print("No grid found, exiting")
             sys.exit()
 
-        df_dict["PVT"] = ecl2df.pvt.df(eclfiles)
-        df_dict["EQUIL"] = ecl2df.equil.df(eclfiles, keywords="EQUIL")
-        df_dict["RSVD"] = ecl2df.equil.df(eclfiles, keywords="RSVD")
-        df_dict["RVVD"] = ecl2df.equil.df(eclfiles, keywords="RVVD")
-        df_dict["PBVD"] = ecl2df.equil.df(eclfiles, keywords="PBVD")
-        df_dict["PDVD"] = ecl2df.equil.df(eclfiles, keywords="PDVD")
+        deck = eclfiles.get_ecldeck()
+
+        df_dict["PVT"] = ecl2df.pvt.df(deck)
+        df_dict.update(FieldFluidDescription._equil_from_deck(deck))
 
         return df_dict
 
     @staticmethod
-    def _kw_from_files(case_name, kw_dict, ntequil):
+    def load_case_tables(ecl_case, cache=None):
+        """
+        returns: dict of the tables (GRID, PVT, EQUIL, ...) read from an
+        eclipse case, from the CaseCache if given and up to date. The pore
+        volume vs. depth histogram of the grid (PORV_BINS) is built once, and
+        cached with the case.
+        """
+        eclkwdf_dict = {}
+        key = None
+        if cache is not None:
+            key = case_key(ecl_case)
+            eclkwdf_dict = cache.get(key) or {}
+
+        if not eclkwdf_dict:
+            eclkwdf_dict = FieldFluidDescription._parse_ecl_case(
+                ecl2df.EclFiles(ecl_case), porv=True
+            )
+            if "PORV" in eclkwdf_dict["GRID"]:
+                eclkwdf_dict["PORV_BINS"] = FieldFluidDescription._porv_histogram(
+                    eclkwdf_dict["GRID"]
+                )
+            if cache is not None:
+                cache.put(key, eclkwdf_dict)
+
+        return eclkwdf_dict
+
+    @staticmethod
+    def _kw_from_files(phases, kw_dict, ntequil):
+        """
+        Reads keywords from separate files, to override the ones of the
+        eclipse case. phases (eg. "oil-water-gas") gives the phases of the
+        case, needed to read the EQUIL keyword.
+        """
         kw_dict_from_file = {}
         for key in kw_dict.keys():
             if key == "EQUIL":
-                eclfiles = ecl2df.EclFiles(case_name)
-                deck = eclfiles.get_ecldeck()
-                fake_data = ""
-                if "OIL" in deck:
-                    fake_data += """
-                    OIL
-                    """
-                if "GAS" in deck:
-                    fake_data += """
-                    GAS
-                    """
-                if "WATER" in deck:
-                    fake_data += """
-                    WATER
-                    """
+                fake_data = "".join(
+                    "\n" + phase.upper() + "\n" for phase in phases.split("-")
+                )
                 with open(kw_dict[key], "r", encoding="utf-8") as fileh:
                     df = ecl2df.equil.df(
                         fake_data + fileh.read(),
@@ -99,7 +240,9 @@ class FieldFluidDescription:
                 )
                 kw_dict_from_file[key] = df
             elif key == "PVT":
-                df = ecl2df.pvt.df(eclfiles)
+                with open(kw_dict[key], "r", encoding="utf-8") as fileh:
+                    df = ecl2df.pvt.df(fileh.read())
+
                 assert "KEYWORD" in df, (
                     "Unable to read " + key + " kw from file: " + str(kw_dict[key])
                 )
@@ -109,33 +252,62 @@ class FieldFluidDescription:
 
         return kw_dict_from_file
 
-    def __init__(self, ecl_case, kwfile_dict):
-        self.fluid_descriptions = list([])
+    def __init__(
+        self, ecl_case, kwfile_dict, cache=None, case_tables=None, eqlnums=None
+    ):
+        """
+        Sets up the fluid descriptions of an eclipse case, with keywords
+        optionally overridden from files (kwfile_dict). With a CaseCache,
+        the tables parsed from the case are cached on disk.
+
+        Tables already read from the case, see load_case_tables, may be given
+        as case_tables instead of ecl_case, to share one parsed base case
+        between many fluid descriptions.
+
+        The fluid description and pvt model of a region are built from the
+        partitioned tables on first access, see fluid_description. With
+        eqlnums, only these equil regions are active. The other regions are
+        still exported by get_df and write_equilkws.
+        """
+        self._fluids = []
+        self._pvt_models = {}
+        self._tables = RegionTables({}, {}, (None, None), [], [])
         self.inactive_fluid_descriptions = list([])
         self.fluid_index = {}
         self.inacive_fluid_index = {}
-
-        self._records_list = []
-        self._pvt_logger = logging.getLogger(__name__)
-        self._pvt_logger.addHandler(RecordsListHandler(self._records_list))
-
-        eclkwdf_dict = {}
+        self.grid = None
+        self.porv_bins = None
+
+        self._records_handler = RecordsListHandler([])
+        self.report = ConsistencyReport()
+        # The records of this field only, from a logger of its own
+        # propagating to the module logger
+        self._pvt_logger = logging.Logger(__name__)
+        self._pvt_logger.parent = logging.getLogger(__name__)
+        self._pvt_logger.addHandler(self._records_handler)
+        self._pvt_logger.addHandler(self.report)
+
+        eclkwdf_dict = dict(case_tables or {})
         if ecl_case:
-            eclkwdf_dict = self._parse_ecl_case(ecl_case)
+            eclkwdf_dict = self.load_case_tables(ecl_case, cache=cache)
 
         if kwfile_dict:
             ntequl = len(eclkwdf_dict["EQUIL"]["EQLNUM"].unique())
+            phases = ecl2df.equil.phases_from_columns(eclkwdf_dict["EQUIL"].columns)
             eclkwdf_dict = {
                 **eclkwdf_dict,
-                **self._kw_from_files(ecl_case, kwfile_dict, ntequl),
+                **self._kw_from_files(phases, kwfile_dict, ntequl),
             }
 
+        self.porv_bins = eclkwdf_dict.get("PORV_BINS")
+
         grid = None
         top_struct = None
         bottom_struct = None
 
         try:
             grid = eclkwdf_dict["GRID"]
+            self.grid = grid
             top_struct = grid["Z"].min()
             bottom_struct = grid["Z"].max()
 
@@ -157,36 +329,51 @@ class FieldFluidDescription:
             print("No equil found, exiting")
             sys.exit()
 
-        fluid_index = 0
-        for pvtnr in pvt["PVTNUM"].unique():
-            pvt_model = BoPVT(pvtnr, pvt_logger=self.logger)
-            pvt_model.init_from_ecl_df(eclkwdf_dict)
-
-            for equilnr in grid[grid["PVTNUM"] == pvtnr]["EQLNUM"].unique():
-                # top_struct = grid[grid["EQLNUM"] == equilnr]["Z"].min()
-                # bottom_struct = grid[grid["EQLNUM"] == equilnr]["Z"].max()
-
-                fluid = ElementFluidDescription(
-                    eqlnum=int(equilnr),
-                    pvtnum=int(pvtnr),
-                    pvt_model=pvt_model,
-                    top_struct=top_struct,
-                    bottom_struct=bottom_struct,
-                    pvt_logger=self.logger,
-                )
-                fluid.init_from_ecl_df(eclkwdf_dict)
-                self.fluid_descriptions.append(fluid)
-                self.fluid_index[int(equilnr)] = fluid_index
-                fluid_index += 1
+        # PVT and equil tables partitioned once on keyword and region, and the
+        # equil regions of each pvt region from one pass over the grid. The
+        # regions are built from the tables when first accessed.
+        self._tables = RegionTables(
+            partition_pvt(pvt),
+            partition_equil(eclkwdf_dict),
+            (top_struct, bottom_struct),
+            [],
+            [],
+        )
+        pvtnums = pd.unique(pvt["PVTNUM"])
+        region_eqlnums = {}
+        for pvtnr, equilnr in grid[["PVTNUM", "EQLNUM"]].drop_duplicates().to_numpy():
+            region_eqlnums.setdefault(pvtnr, []).append(equilnr)
+
+        if eqlnums is not None:
+            eqlnums = {int(eqlnum) for eqlnum in eqlnums}
+            missing = eqlnums - {
+                int(equilnr)
+                for equilnrs in region_eqlnums.values()
+                for equilnr in equilnrs
+            }
+            if missing:
+                raise ValueError(f"No active equil regions: {sorted(missing)}")
+
+        for pvtnr in pvtnums:
+            for equilnr in region_eqlnums.get(pvtnr, []):
+                if eqlnums is not None and int(equilnr) not in eqlnums:
+                    self._tables.unselected.append((int(equilnr), int(pvtnr)))
+                    continue
+                self.fluid_index[int(equilnr)] = len(self._tables.regions)
+                self._tables.regions.append((int(equilnr), int(pvtnr)))
+                self._fluids.append(None)
 
         fluid_index = 0
         inactive_equils = list(
-            set(equil["EQLNUM"].unique()) - set(self.fluid_index.keys())
+            set(equil["EQLNUM"].unique())
+            - {
+                int(equilnr)
+                for equilnrs in region_eqlnums.values()
+                for equilnr in equilnrs
+            }
         )
         for equilnr in inactive_equils:
-            fluid = ElementFluidDescription(
-                eqlnum=int(equilnr), pvtnum=len(pvt["PVTNUM"].unique())
-            )
+            fluid = ElementFluidDescription(eqlnum=int(equilnr), pvtnum=len(pvtnums))
             self.inactive_fluid_descriptions.append(fluid)
             self.inacive_fluid_index[int(equilnr)] = fluid_index
             fluid_index += 1
@@ -195,8 +382,91 @@ class FieldFluidDescription:
     def logger(self):
         return self._pvt_logger
 
+    @property
+    def fluid_descriptions(self):
+        """
+        The fluid descriptions of all active regions, built on access
+        """
+        for index, fluid in enumerate(self._fluids):
+            if fluid is None:
+                self._build_fluid(index)
+        return self._fluids
+
+    @fluid_descriptions.setter
+    def fluid_descriptions(self, fluids):
+        self._fluids = fluids
+
+    def pvt_model(self, pvtnum):
+        """
+        returns: the BoPVT of pvtnum, built from the partitioned pvt tables
+        on first access
+        """
+        if pvtnum not in self._pvt_models:
+            pvt_model = BoPVT(int(pvtnum), pvt_logger=self.logger)
+            pvt_model.init_from_tables(self._tables.pvt)
+            self._pvt_models[pvtnum] = pvt_model
+        return self._pvt_models[pvtnum]
+
+    def fluid_description(self, eqlnum):
+        """
+        returns: the fluid description of the active region eqlnum, built
+        on first access
+        """
+        index = self.fluid_index[eqlnum]
+        if self._fluids[index] is None:
+            self._build_fluid(index)
+        return self._fluids[index]
+
+    def _build_fluid(self, index):
+        """
+        Builds the fluid description of the active region at index
+        """
+        eqlnum, pvtnum = self._tables.regions[index]
+        self._fluids[index] = self._region_fluid(
+            eqlnum, pvtnum, pvt_model=self.pvt_model(pvtnum)
+        )
+
+    def _region_fluid(self, eqlnum, pvtnum, pvt_model=None):
+        """
+        returns: a fluid description of a region from the partitioned tables
+        """
+        top_struct, bottom_struct = self._tables.struct
+
+        fluid = ElementFluidDescription(
+            eqlnum=eqlnum,
+            pvtnum=pvtnum,
+            pvt_model=pvt_model,
+            top_struct=top_struct,
+            bottom_struct=bottom_struct,
+            pvt_logger=self.logger,
+        )
+        fluid.init_from_tables(self._tables.equil)
+        return fluid
+
+    def _export_fluids(self):
+        """
+        returns: the fluid descriptions of all regions, ie the active regions,
+        the regions not selected by eqlnums (without pvt model) and the
+        inactive regions
+        """
+        return (
+            self.fluid_descriptions
+            + [
+                self._region_fluid(eqlnum, pvtnum)
+                for eqlnum, pvtnum in self._tables.unselected
+            ]
+            + self.inactive_fluid_descriptions
+        )
+
     def records_list(self):
-        return self._records_list
+        return self._records_handler.records_list
+
+    def close(self):
+        """
+        Stops collecting log records in records_list and report
+        """
+        self.logger.removeHandler(self._records_handler)
+        self.logger.removeHandler(self.report)
 
     def validate_description(self):
         """
@@ -212,101 +482,423 @@ class FieldFluidDescription:
 
         return True
 
-    def set_owc(self, eqlnum, owc):
-        new_self = copy.deepcopy(self)
-        new_self.fluid_descriptions[self.fluid_index[eqlnum]] = self.fluid_descriptions[
-            self.fluid_index[eqlnum]
-        ].set_owc(owc)
+    def evaluate(self, no_nodes=20, workers=1):
+        """
+        Calculates depth tables, in-place report and gradient check for
+        all active fluid systems (equil regions)
+
+        With workers > 1 the regions are evaluated in a pool of worker
+        processes. Only the pvt tables and the xxVD tables are shipped to
+        the workers, and log records and printed output are replayed in
+        region order, ie the same order as with workers=1. The pvt table
+        range warnings, given once per pvt model, are checked in this
+        process before the workers are started, see
+        region_workers.check_pvt_tables.
+
+        returns: list of region_workers.RegionResult, ordered as
+        self.fluid_descriptions
+        """
+
+        if workers is None or workers < 1:
+            raise ValueError("Number of workers must be a positive integer")
+
+        workers = min(workers, len(self.fluid_descriptions))
+        if workers <= 1:
+            return [
+                region_workers.evaluate_fluid(fluid, no_nodes)
+                for fluid in self.fluid_descriptions
+            ]
+
+        level = self.logger.getEffectiveLevel()
+        checked = [
+            region_workers.check_pvt_tables(fluid, level)
+            for fluid in self.fluid_descriptions
+        ]
+
+        pvt_models = {}
+        for fluid in self.fluid_descriptions:
+            pvt_models[fluid.pvt_model.pvtnum] = fluid.pvt_model
+        pvt_arrays_list = [
+            region_workers.pvt_arrays(model) for model in pvt_models.values()
+        ]
+
+        tasks = [
+            (region_workers.fluid_arrays(fluid), no_nodes, level)
+            for fluid in self.fluid_descriptions
+        ]
+
+        with multiprocessing.Pool(
+            processes=workers,
+            initializer=region_workers.init_worker,
+            initargs=(pvt_arrays_list,),
+        ) as pool:
+            outputs = pool.map(region_workers.evaluate_worker, tasks)
+
+        results = []
+        for fluid, (check_dicts, check_text), (result, record_dicts, text) in zip(
+            self.fluid_descriptions, checked, outputs
+        ):
+            fluid.depth_profile = result.depth_profile
+            sys.stdout.write(check_text + text)
+            for record_dict in check_dicts + record_dicts:
+                self.logger.handle(logging.makeLogRecord(record_dict))
+            results.append(result)
+
+        return results
+
+    def evaluate_cells(self, no_nodes=100, tol_pres=0.0):
+        """
+        Calculates initial pressure, rs, rv, saturation pressure, phase and
+        phase density for all (active) cells in the grid
+
+        The cells are grouped by PVTNUM and EQLNUM, and each group is
+        evaluated with array calls, see
+        ElementFluidDescription.calc_fluid_prop_at_depth. Cells with oil or
+        gas where the saturation pressure exceeds the pressure by more than
+        tol_pres are flagged in the PSAT_ABOVE_PRES column, and counted in a
+        warning per region. Cells of equil regions not active are left NaN.
+
+        returns: pandas.DataFrame with one row per grid cell, indexed as the grid
+        """
+
+        if self.grid is None:
+            raise ValueError("No grid found")
+
+        cells = DepthProfile(len(self.grid), columns=DepthProfile.CELL_COLUMNS)
+        flagged = np.zeros(len(self.grid), dtype=bool)
+        wat_code = DepthProfile.FLUID_TYPES.index("wat")
+        depth = self.grid["Z"].to_numpy(dtype=float)
+
+        groups = self.grid.groupby(["PVTNUM", "EQLNUM"], sort=True).indices
+        for (pvtnum, eqlnum), index in groups.items():
+            if int(eqlnum) not in self.fluid_index:
+                continue
+
+            fluid = self.fluid_description(int(eqlnum))
+            if fluid.pvtnum != pvtnum:
+                fluid = copy.copy(fluid)
+                fluid.pvtnum = int(pvtnum)
+                fluid.pvt_model = self.pvt_model(int(pvtnum))
+
+            region = fluid.calc_fluid_prop_at_depth(depth[index], no_nodes=no_nodes)
+            cells.values[:, index] = region.values
+            cells.fluid_codes[index] = region.fluid_codes
+
+            flagged[index] = (region.fluid_codes != wat_code) & (
+                region.psat > region.pres + tol_pres
+            )
+            no_flagged = np.count_nonzero(flagged[index])
+            if no_flagged > 0:
+                msg = (
+                    f"{no_flagged} of {len(index)} grid cells in EQLNUM {eqlnum} "
+                    "with saturation pressure above pressure"
+                )
+                print("\nWARNING - ", msg)
+                self.logger.warning(
+                    msg,
+                    extra={
+                        "pvtnum": int(pvtnum),
+                        "eqlnum": int(eqlnum),
+                        "check": "CELL_PSAT_ABOVE_PRES",
+                        "values": {"cells": int(no_flagged), "total": len(index)},
+                    },
+                )
+
+        df = cells.to_df()
+        df.index = self.grid.index
+        df.insert(0, "EQLNUM", self.grid["EQLNUM"].to_numpy())
+        df.insert(0, "PVTNUM", self.grid["PVTNUM"].to_numpy())
+        df["PSAT_ABOVE_PRES"] = flagged
+
+        return df
+
+    @staticmethod
+    def _porv_histogram(grid, bin_size=None):
+        """
+        Bins the grid pore volume on depth per PVTNUM and EQLNUM, with one
+        np.bincount over all cells. Bin b covers depths [b, b + 1) * bin_size.
+
+        returns: pandas.DataFrame with PVTNUM, EQLNUM, BIN and PORV for the
+        bins with pore volume
+        """
+
+        bin_size = bin_size or PORV_BIN_SIZE
+
+        bins = np.floor(grid["Z"].to_numpy(dtype=float) / bin_size).astype(np.int64)
+        regions, region_index = np.unique(
+            grid[["PVTNUM", "EQLNUM"]].to_numpy(dtype=np.int64),
+            axis=0,
+            return_inverse=True,
+        )
+        region_index = region_index.ravel()
+
+        bin_min = bins.min()
+        no_bins = bins.max() - bin_min + 1
+        porv = np.bincount(
+            region_index * no_bins + (bins - bin_min),
+            weights=grid["PORV"].to_numpy(dtype=float),
+            minlength=len(regions) * no_bins,
+        )
+
+        nonzero = np.flatnonzero(porv)
+        return pd.DataFrame(
+            {
+                "PVTNUM": regions[nonzero // no_bins, 0],
+                "EQLNUM": regions[nonzero // no_bins, 1],
+                "BIN": nonzero % no_bins + bin_min,
+                "PORV": porv[nonzero],
+            }
+        )
+
+    def porv_histogram(self, eqlnums=None):
+        """
+        returns: (bin_edges, porv), the pore volume vs. depth histogram of the
+        grid, with porv one row per eqlnum in eqlnums (default all active
+        regions), on bins shared by all regions, see _porv_histogram
+        """
+
+        if self.porv_bins is None:
+            raise ValueError("No PORV found in grid")
+
+        if eqlnums is None:
+            eqlnums = list(self.fluid_index)
+
+        bins = self.porv_bins
+        bin_min = bins["BIN"].min() if len(bins) else 0
+        no_bins = bins["BIN"].max() - bin_min + 1 if len(bins) else 1
+        bin_edges = (bin_min + np.arange(no_bins + 1)) * PORV_BIN_SIZE
+
+        row = {eqlnum: i for i, eqlnum in enumerate(eqlnums)}
+        selected = bins[bins["EQLNUM"].isin(row)]
+        porv = np.bincount(
+            selected["EQLNUM"].map(row).to_numpy() * no_bins
+            + (selected["BIN"].to_numpy() - bin_min),
+            weights=selected["PORV"].to_numpy(),
+            minlength=len(eqlnums) * no_bins,
+        ).reshape(len(eqlnums), no_bins)
+
+        return bin_edges, porv
+
+    def inplace(self, porv=False, method=None):
+        """
+        Calculates in-place of all active regions from their depth profiles,
+        integrated together as arrays, see
+        ElementFluidDescription.integrate_inplace. Regions without a depth
+        profile are calculated with 20 depth nodes. With porv, the in-place is
+        weighted by the grid pore volume vs. depth, see porv_histogram and
+        ElementFluidDescription.porv_inplace, otherwise by reservoir height.
+
+        returns: pandas.DataFrame with EQLNUM, PVTNUM, GGIP, OGIP, OOIP and
+        GOIP, one row per active region
+        """
+
+        fluids = self.fluid_descriptions
+        profiles = [
+            fluid.calc_fluid_prop_vs_depth()
+            if fluid.depth_profile is None
+            else fluid.depth_profile
+            for fluid in fluids
+        ]
+        no_nodes = max(len(profile) for profile in profiles)
+
+        # Regions with fewer nodes are padded with zero length intervals
+        def stacked(values_list):
+            return np.vstack(
+                [
+                    np.pad(values, (0, no_nodes - len(values)), mode="edge")
+                    for values in values_list
+                ]
+            )
+
+        columns = [
+            stacked([getattr(profile, column) for profile in profiles])
+            for column in ["depth", "bo", "bg", "rs", "rv"]
+        ]
+        gocs = [fluid.goc for fluid in fluids]
+        owcs = [fluid.owc for fluid in fluids]
+
+        if porv:
+            bin_edges, porv_rows = self.porv_histogram()
+            ggip, ogip, ooip, goip = ElementFluidDescription.porv_inplace(
+                *columns, goc=gocs, owc=owcs, bin_edges=bin_edges, porv=porv_rows
+            )
+        else:
+            ggip, ogip, ooip, goip = ElementFluidDescription.integrate_inplace(
+                *columns,
+                goc=gocs,
+                owc=owcs,
+                top=np.array([[fluid.top_struct] for fluid in fluids], dtype=float),
+                bottom=np.array(
+                    [[fluid.bottom_struct] for fluid in fluids], dtype=float
+                ),
+                method=method,
+            )
+
+        return pd.DataFrame(
+            {
+                "EQLNUM": [fluid.eqlnum for fluid in fluids],
+                "PVTNUM": [fluid.pvtnum for fluid in fluids],
+                "GGIP": ggip,
+                "OGIP": ogip,
+                "OOIP": ooip,
+                "GOIP": goip,
+            }
+        )
+
+    def sweep_contacts(self, eqlnum, gocs, owcs, no_nodes=100, porv=False):
+        """
+        Evaluates in-place and consistency checks of region eqlnum for many
+        candidate contacts in one vectorised pass, see
+        ElementFluidDescription.sweep_contacts. With porv, the in-place is
+        weighted by the grid pore volume vs. depth, see porv_histogram.
+
+        returns: pandas.DataFrame with one row per candidate (GOC, OWC)
+        """
+        fluid = self.fluid_description(eqlnum)
+
+        porv_histogram = None
+        if porv:
+            bin_edges, porv_rows = self.porv_histogram([eqlnum])
+            porv_histogram = (bin_edges, porv_rows[0])
+
+        return fluid.sweep_contacts(gocs, owcs, no_nodes=no_nodes, porv=porv_histogram)
+
+    def _replace_fluid(self, eqlnum, fluid):
+        """
+        returns: a shallow copy of the field with the fluid description of
+        eqlnum replaced. The other regions already built, pvt models, grid
+        and logger are shared with the original. Regions not yet built are
+        built by each field on access.
+        """
+        fluids = self._fluids_copy()
+        fluids[self.fluid_index[eqlnum]] = fluid
+
+        new_self = copy.copy(self)
+        new_self.fluid_descriptions = fluids
         return new_self
 
+    def _fluids_copy(self):
+        """
+        returns: a copy of the list of fluid descriptions, without building
+        the regions not yet accessed
+        """
+        return list(self._fluids)
+
+    def set_owc(self, eqlnum, owc):
+        """
+        returns: a copy of the field with a new OWC in region eqlnum
+        """
+        fluid = self.fluid_description(eqlnum)
+        return self._replace_fluid(eqlnum, fluid.set_owc(owc))
+
     def set_goc(self, eqlnum, goc):
-        new_self = copy.deepcopy(self)
-        new_self.fluid_descriptions[self.fluid_index[eqlnum]] = self.fluid_descriptions[
-            self.fluid_index[eqlnum]
-        ].set_goc(goc)
-        return new_self
+        """
+        returns: a copy of the field with a new GOC in region eqlnum
+        """
+        fluid = self.fluid_description(eqlnum)
+        return self._replace_fluid(eqlnum, fluid.set_goc(goc))
 
     def get_df(self, keyword):
         """
-        return: pandas.df according to the requested keyword
-        supported: equil, rsvd, rvvd, pbvd, pdvd, and the pvt related kws
+        return: pandas.df according to the requested keyword, for all
+        active and inactive regions
+        supported: equil, rsvd, rvvd, pbvd, pdvd
+
+        The table is built in one go from the arrays of all regions.
         """
 
-        dataframe = pd.DataFrame(columns=["EQLNUM", "OWC", "GOC"])
-        for fluid in self.fluid_descriptions:
-            dataframe = pd.merge(
-                left=dataframe, right=fluid.get_df(keyword), how="outer"
-            )
-        for fluid in self.inactive_fluid_descriptions:
-            dataframe = pd.merge(
-                left=dataframe, right=fluid.get_df(keyword), how="outer"
+        fluids = self._export_fluids()
+
+        if keyword == "EQUIL":
+            return pd.DataFrame([fluid.equil_record() for fluid in fluids])
+
+        if keyword in ElementFluidDescription.VD_TABLES:
+            tables = [fluid.vd_table(keyword) for fluid in fluids]
+            lengths = [len(values) for values, _ in tables]
+
+            return pd.DataFrame(
+                {
+                    "KEYWORD": keyword,
+                    "EQLNUM": np.repeat(
+                        [fluid.eqlnum for fluid in fluids], lengths
+                    ).astype(int),
+                    ElementFluidDescription.VD_TABLES[keyword][0]: np.concatenate(
+                        [values for values, _ in tables]
+                    ),
+                    "Z": np.concatenate([depth for _, depth in tables]),
+                }
             )
 
-        return dataframe
+        print("No supprt for keyword:", keyword)
+        return None
 
-    def write_equilkws(self, keywords: List[str], filename: str) -> None:
+    def write_equilkws(
+        self, keywords: List[str], filename: str, compress: bool = None
+    ) -> None:
         """
         Write keywords equil, rsvd, rvvd, pbvd, pdvd to file
 
+        The records are written region by region, sorted on eqlnum, straight
+        from the tables of each region to a buffered file handle.
+
         Args:
             keywords: List of keywords to export.
             filename: Filename to export keywords to
+            compress: Write gzip compressed file, default if filename
+                ends with .gz
 
         Returns:
             None
 
         """
-        comments = {}
-        dframe = None
-        lookup_keywords = ["EQUIL", "RSVD", "RVVD", "PBVD", "PDVD"]
+        if compress is None:
+            compress = str(filename).endswith(".gz")
+
+        fluids = sorted(
+            self._export_fluids(),
+            key=lambda fluid: fluid.eqlnum,
+        )
 
-        for keyword in lookup_keywords:
+        if compress:
+            fileh = gzip.open(filename, "wt", encoding="utf-8")
+        else:
+            fileh = open(filename, "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8")
 
-            if keyword in keywords:
-                if dframe is None:
-                    dframe = self.get_df(keyword)
+        with fileh:
+            for keyword in EQUIL_KEYWORDS:
+                if keyword not in keywords:
+                    continue
+
+                if keyword != "EQUIL" and not any(
+                    fluid.vd_table(keyword)[0].size for fluid in fluids
+                ):
+                    fileh.write(f"-- No {keyword} data\n\n")
+                    continue
+
+                fileh.write(f"{keyword}\n-- {keyword} kw created by pypvt\n")
+                if keyword == "EQUIL":
+                    _write_equil(fileh, fluids)
                 else:
-                    dframe = pd.merge(left=dframe, right=self.get_df(keyword))
-                comments[keyword] = f"{keyword} kw created by pypvt"
+                    _write_vd_tables(fileh, keyword, fluids)
+                fileh.write("\n")
 
-        ecl2df.equil.df2ecl(
-            dframe, keywords=keywords, comments=comments, filename=filename
-        )
+            for keyword in keywords:
+                if keyword not in EQUIL_KEYWORDS:
+                    print("\nWARNING - ", "No supprt for keyword: " + keyword)
 
     def create_consistency_report(self):
-        def filter_records(records, rtype, pvtnum):
-            selection = []
-            for record in records:
-                if (
-                    record.__dict__["levelname"] == rtype
-                    and record.__dict__.get("pvtnum", None) == pvtnum
-                ):
-                    selection.append(record)
-            return selection
-
-        records = self.records_list()
-        print("***********************************************************")
-        print("*****             PVT consistency report               ****")
-        print("*****                                                  ****")
-        print()
-        print(
-            "This model has ",
-            len(self.fluid_descriptions),
-            " active equli regions and ",
-            len(self.inactive_fluid_descriptions),
-            " inactive",
+        """
+        Prints the consistency report of all active regions, see
+        ConsistencyReport.render
+        """
+        self.report.render(
+            [(fluid.eqlnum, fluid.pvtnum) for fluid in self.fluid_descriptions],
+            no_inactive=len(self.inactive_fluid_descriptions),
         )
-        print()
-        for fluid in self.fluid_descriptions:
-            print("***********************************************************")
-            print("EQUIL nr: ", fluid.eqlnum, " PVTNUM:", fluid.pvtnum)
-
-            warnings = filter_records(records, "WARNING", fluid.pvtnum)
-            print("WARNINGS: ", len(warnings))
-            for record in warnings:
-                print("  ", record.__dict__["msg"])
-
-            errors = filter_records(records, "ERROR", fluid.pvtnum)
-            print("ERRORS: ", len(errors))
-            for record in errors:
-                print("  ", record.__dict__["msg"])
+
+    def write_consistency_report(self, filename):
+        """
+        Writes the consistency report entries as JSON lines, or as Parquet
+        if the filename ends with .parquet
+        """
+        self.report.write(filename)
@@ -0,0 +1,212 @@
+""" Search indices of the black-oil PVT tables, and their interpolation """
+
+from collections import namedtuple
+
+import numpy as np
+
+# pylint: disable=invalid-name
+# pylint: disable=too-many-locals
+
+# =============================================================================
+
+# Saturated PVTO index: one entry per Rs node, with offsets[i]:offsets[i+1]
+# giving the rows of node i (saturated row first) in the pres/bo/viso columns.
+# pres_key is the search key of the pres column, see _segment_key.
+PvtoIndex = namedtuple(
+    "PvtoIndex",
+    [
+        "rs",
+        "pbub",
+        "bo",
+        "viso",
+        "offsets",
+        "pres_tab",
+        "bo_tab",
+        "viso_tab",
+        "pres_key",
+    ],
+)
+
+
+# Saturated and undersaturated PVTG index. Saturated properties are given per
+# dew-point node (pdew, rv, 1/Bg and 1/(Bg*Visg)), also ordered by rv for
+# dew-point lookups. The wet-gas branch of pressure node i (p_nodes) is given
+# by rows offsets[i]:offsets[i+1] of the rv/inv_bg/inv_bv columns, ascending
+# in rv. rv_key is the search key of the rv column, see _segment_key.
+PvtgIndex = namedtuple(
+    "PvtgIndex",
+    [
+        "pdew",
+        "rv",
+        "inv_bg",
+        "inv_bv",
+        "rv_sorted",
+        "pdew_sorted",
+        "p_nodes",
+        "offsets",
+        "rv_tab",
+        "inv_bg_tab",
+        "inv_bv_tab",
+        "rv_key",
+    ],
+)
+
+
+def _readonly(arr, dtype=float):
+    """Returns a contiguous copy of arr flagged as read-only"""
+    arr = np.array(arr, dtype=dtype)
+    arr.setflags(write=False)
+    return arr
+
+
+def build_pvto_index(pvto):
+    """
+    Builds the saturated PVTO index from a PVTO array (RS, pres, Bo, Viso)
+
+    Rows are grouped per Rs node (keeping table order within each node),
+    so that the saturated properties are the first row of each node and
+    the undersaturated branch of node i is rows offsets[i]:offsets[i+1].
+    """
+
+    table = np.asarray(pvto, dtype=float)
+    table = table[np.argsort(table[:, 0], kind="stable")]
+
+    rs_tab, starts = np.unique(table[:, 0], return_index=True)
+
+    offsets = _readonly(np.append(starts, len(table)), dtype=int)
+    pres_tab = _readonly(table[:, 1])
+
+    return PvtoIndex(
+        rs=_readonly(rs_tab),
+        pbub=_readonly(table[starts, 1]),
+        bo=_readonly(table[starts, 2]),
+        viso=_readonly(table[starts, 3]),
+        offsets=offsets,
+        pres_tab=pres_tab,
+        bo_tab=_readonly(table[:, 2]),
+        viso_tab=_readonly(table[:, 3]),
+        pres_key=_segment_key(offsets, pres_tab),
+    )
+
+
+def build_pvtg_index(pvtg):
+    """
+    Builds the PVTG index from a PVTG array (pres, rv, Bg, Visg)
+
+    The saturated table is the first row of each pressure node, skipping
+    nodes with an rv already in the table. The wet-gas branches are sorted
+    on rv within each pressure node.
+    """
+
+    table = np.asarray(pvtg, dtype=float)
+
+    first_rows = np.flatnonzero(np.r_[True, table[1:, 0] != table[:-1, 0]])
+    _, first_rv = np.unique(table[first_rows, 1], return_index=True)
+    sat = table[first_rows[np.sort(first_rv)]]
+    by_rv = np.argsort(sat[:, 1], kind="stable")
+
+    table = table[np.lexsort((table[:, 1], table[:, 0]))]
+    p_nodes, starts = np.unique(table[:, 0], return_index=True)
+    offsets = _readonly(np.append(starts, len(table)), dtype=int)
+    rv_tab = _readonly(table[:, 1])
+
+    return PvtgIndex(
+        pdew=_readonly(sat[:, 0]),
+        rv=_readonly(sat[:, 1]),
+        inv_bg=_readonly(1.0 / sat[:, 2]),
+        inv_bv=_readonly(1.0 / (sat[:, 2] * sat[:, 3])),
+        rv_sorted=_readonly(sat[by_rv, 1]),
+        pdew_sorted=_readonly(sat[by_rv, 0]),
+        p_nodes=_readonly(p_nodes),
+        offsets=offsets,
+        rv_tab=rv_tab,
+        inv_bg_tab=_readonly(1.0 / table[:, 2]),
+        inv_bv_tab=_readonly(1.0 / (table[:, 2] * table[:, 3])),
+        rv_key=_segment_key(offsets, rv_tab),
+    )
+
+
+def to_output(arr):
+    """Returns 0-d arrays as scalars, and other arrays as is"""
+    arr = np.asarray(arr)
+    return arr[()] if arr.ndim == 0 else arr
+
+
+def outlier(x, x_tab):
+    """Returns the entry of x furthest outside the table interval of x_tab"""
+    x = np.ravel(x)
+    excess = np.maximum(x - np.max(x_tab), np.min(x_tab) - x)
+    return x[np.argmax(excess)]
+
+
+def bracket(x, x_tab):
+    """
+    Returns (lower, upper, weight) for linear interpolation of x in the
+    ascending table x_tab, using constant extrapolation as np.interp, ie
+
+        y = (1 - weight) * y_tab[lower] + weight * y_tab[upper]
+    """
+
+    x = np.asarray(x, dtype=float)
+    n = len(x_tab)
+
+    lower = np.clip(np.searchsorted(x_tab, x, side="right") - 1, 0, max(n - 2, 0))
+    upper = np.minimum(lower + 1, n - 1)
+
+    dx = x_tab[upper] - x_tab[lower]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(dx > 0.0, (x - x_tab[lower]) / dx, 0.0)
+
+    return lower, upper, np.clip(weight, 0.0, 1.0)
+
+
+def _segment_key(offsets, x_tab):
+    """
+    Returns (key_tab, x_min, scale), a globally ascending search key of the
+    table segments x_tab[offsets[k]:offsets[k + 1]], each ascending, made
+    from the segment number and x scaled to [0, 1], see segment_interp.
+    Built once per table, with the PVT index.
+    """
+
+    x_min = float(np.min(x_tab))
+    scale = float(np.max(x_tab)) - x_min
+    if scale <= 0.0:
+        scale = 1.0
+
+    row_segment = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    return _readonly(2.0 * row_segment + (x_tab - x_min) / scale), x_min, scale
+
+
+def segment_interp(x, segment, y_tab, *, offsets, x_tab, segment_key):
+    """
+    Returns linear interpolation of each x within its own table segment,
+    ie x_tab[offsets[k]:offsets[k + 1]] for k = segment, using constant
+    extrapolation as np.interp.
+
+    The segments must be ascending in x_tab. The bracketing rows are found
+    with one binary search (np.searchsorted) on the precomputed key of the
+    table, see _segment_key.
+    """
+
+    x = np.asarray(x, dtype=float)
+    segment = np.asarray(segment)
+
+    start = offsets[segment]
+    end = offsets[segment + 1]
+
+    key_tab, x_min, scale = segment_key
+    key = 2.0 * segment + np.clip((x - x_min) / scale, 0.0, 1.0)
+
+    # First row in the segment with x_tab > x
+    lo = np.clip(np.searchsorted(key_tab, key, side="right"), start, end)
+
+    lower = np.clip(lo - 1, start, np.maximum(end - 2, start))
+    upper = np.minimum(lower + 1, end - 1)
+
+    dx = x_tab[upper] - x_tab[lower]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(dx > 0.0, (x - x_tab[lower]) / dx, 0.0)
+    weight = np.clip(weight, 0.0, 1.0)
+
+    return (1.0 - weight) * y_tab[lower] + weight * y_tab[upper]
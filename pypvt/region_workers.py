@@ -0,0 +1,164 @@
+"""Evaluation of the fluid regions of a field in worker processes"""
+
+import logging
+
+from collections import namedtuple
+import contextlib
+import io
+
+from pypvt.element_fluid_description import ElementFluidDescription
+from pypvt.bopvt import BoPVT
+
+
+# A new handler to store "raw" LogRecords instances
+class RecordsListHandler(logging.Handler):
+    """
+    A handler class which stores LogRecord entries in a list
+    """
+
+    def __init__(self, r_list):
+        """
+        Initiate the handler
+        :param records_list: a list to store the LogRecords entries
+        """
+        self.records_list = r_list
+        super().__init__()
+
+    def emit(self, record):
+        self.records_list.append(record)
+
+
+# Per region evaluation result, see FieldFluidDescription.evaluate
+RegionResult = namedtuple(
+    "RegionResult", ["eqlnum", "pvtnum", "depth_profile", "inplace", "checks"]
+)
+
+# PVT models rebuilt once per worker process, keyed on pvtnum
+_WORKER_PVT_MODELS = {}
+
+
+def pvt_arrays(pvt_model):
+    """
+    returns: the compact constructor arguments of a BoPVT (numpy arrays and
+    scalars) to be shipped to worker processes
+    """
+    return {
+        "pvtnum": pvt_model.pvtnum,
+        "sdeno": pvt_model.sdeno,
+        "pvto_arr": pvt_model.pvto,
+        "sdeng": pvt_model.sdeng,
+        "pvtg_arr": pvt_model.pvtg,
+        "sdenw": pvt_model.sdenw,
+        "pvtw_arr": pvt_model.pvtw,
+        "usat_interpolation": pvt_model.USAT_INTERPOLATION,
+        "warnings": (pvt_model.calc_rs_warning, pvt_model.calc_pbub_warning),
+    }
+
+
+def fluid_arrays(fluid):
+    """
+    returns: the contacts, reference conditions and xxVD tables of an
+    ElementFluidDescription, without its pvt model, logger, results and
+    memoised curves
+    """
+    return {
+        key: value
+        for key, value in vars(fluid).items()
+        if key not in ("pvt_model", "pvt_logger", "depth_profile", "_psat_curves")
+    }
+
+
+def init_worker(pvt_arrays_list):
+    """
+    Process pool initializer, rebuilds the pvt models of the field
+    """
+    _WORKER_PVT_MODELS.clear()
+    for model_arrays in pvt_arrays_list:
+        model_arrays = dict(model_arrays)
+        usat_interpolation = model_arrays.pop("usat_interpolation")
+        warnings = model_arrays.pop("warnings")
+        pvt_model = BoPVT(**model_arrays)
+        pvt_model.set_USAT_INTERPOLATION(usat_interpolation)
+        pvt_model.calc_rs_warning, pvt_model.calc_pbub_warning = warnings
+        _WORKER_PVT_MODELS[pvt_model.pvtnum] = pvt_model
+
+
+def check_pvt_tables(fluid, level):
+    """
+    Builds the saturation pressure curves of a fluid system, logging the
+    pvt table range warnings given once per pvt model, see
+    ElementFluidDescription.psat_curves. Run in the parent process before
+    the regions are shipped to worker processes, so the warnings are given
+    once per pvt model, by the same region as with one process.
+
+    returns: (log record dicts, printed output)
+    """
+    records = []
+    logger = logging.Logger(__name__, level=level)
+    logger.addHandler(RecordsListHandler(records))
+
+    pvt_logger = fluid.pvt_model.pvt_logger
+    fluid.pvt_model.pvt_logger = logger
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            fluid.psat_curves()
+    finally:
+        fluid.pvt_model.pvt_logger = pvt_logger
+
+    return record_dicts(records), output.getvalue()
+
+
+def evaluate_fluid(fluid, no_nodes):
+    """
+    Depth tables, in-place report and gradient check for one fluid system
+
+    returns: RegionResult
+    """
+    profile = fluid.calc_fluid_prop_vs_depth(no_nodes=no_nodes)
+    inplace = fluid.inplace_report()
+    checks = fluid.pvt_gradient_check()
+
+    return RegionResult(fluid.eqlnum, fluid.pvtnum, profile, inplace, checks)
+
+
+def evaluate_worker(task):
+    """
+    Evaluates one region in a worker process
+
+    Log records and printed output are collected and returned with the
+    result, to be replayed in region order by the parent process.
+    """
+    region_arrays, no_nodes, level = task
+
+    records = []
+    logger = logging.Logger(__name__, level=level)
+    logger.addHandler(RecordsListHandler(records))
+
+    pvt_model = _WORKER_PVT_MODELS[region_arrays["pvtnum"]]
+    pvt_model.pvt_logger = logger
+
+    fluid = ElementFluidDescription(pvt_model=pvt_model, pvt_logger=logger)
+    fluid.__dict__.update(region_arrays)
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = evaluate_fluid(fluid, no_nodes)
+
+    return result, record_dicts(records), output.getvalue()
+
+
+def record_dicts(records):
+    """
+    returns: log records as picklable dicts, to be replayed with
+    logging.makeLogRecord
+    """
+    dicts = []
+    for record in records:
+        record_dict = dict(record.__dict__)
+        record_dict["msg"] = record.getMessage()
+        record_dict["args"] = None
+        record_dict["exc_info"] = None
+        dicts.append(record_dict)
+
+    return dicts
@@ -58,6 +58,6 @@ setup(
     install_requires=REQUIREMENTS,
     setup_requires=SETUP_REQUIREMENTS,
     tests_require=TESTS_REQUIRES,
-    extras_require={"tests": TESTS_REQUIRES},
+    extras_require={"tests": TESTS_REQUIRES, "parquet": ["pyarrow"]},
     use_scm_version=True,
 )
@@ -3,9 +3,10 @@
 import pathlib
 
 import numpy as np
+import pytest
 import ecl2df
 
-from pypvt.bopvt import BoPVT
+from pypvt.bopvt import BoPVT, partition_pvt
 
 # pylint: disable=invalid-name
 # pylint: disable=too-many-arguments
@@ -14,6 +15,7 @@ from pypvt.bopvt import BoPVT
 # pylint: disable=too-many-branches
 # pylint: disable=too-many-statements
 # pylint: disable=raise-missing-from
+# pylint: disable=protected-access
 
 # from pypvt import BoPVT
 
@@ -118,6 +120,39 @@ def test_pvto():
     assert np.isclose(pvt_model.calc_deno(p, pbub=pbub), deno)
 
 
+def test_pvto_index():
+    """Test the saturated PVTO index built when the PVTO table is set"""
+
+    pvt_models = init_from_ecl_df()
+
+    pvt_model = pvt_models[0]
+    pvto_index = pvt_model._pvto_index
+
+    rs_tab = np.unique(pvt_model.pvto[:, 0])
+    assert np.allclose(pvto_index.rs, rs_tab)
+    assert len(pvto_index.offsets) == len(rs_tab) + 1
+    assert pvto_index.offsets[-1] == len(pvt_model.pvto)
+
+    assert np.isclose(pvto_index.pbub[0], 20.0)
+    assert np.isclose(pvto_index.bo[0], 1.06694)
+    assert np.isclose(pvto_index.viso[0], 14.4325)
+
+    rows = slice(pvto_index.offsets[1], pvto_index.offsets[2])
+    assert np.isclose(pvto_index.pres_tab[rows][0], 84.4)
+    assert np.isclose(pvto_index.bo_tab[rows][-1], 1.10321)
+
+    assert not pvto_index.rs.flags.writeable
+
+    # Search key of the undersaturated rows, ascending over all Rs nodes
+    key_tab, _, _ = pvto_index.pres_key
+    assert np.all(np.diff(key_tab) > 0.0)
+    assert not key_tab.flags.writeable
+
+    # Resetting the table rebuilds the index
+    pvt_model.pvto = pvt_model.pvto[pvt_model.pvto[:, 0] > 20.0]
+    assert np.isclose(pvt_model._pvto_index.rs[0], 41.617)
+
+
 def test_pvtg():
     """Test BoPVT gas properties calculations"""
 
@@ -204,6 +239,124 @@ def test_pvtg():
     assert np.isclose(pvt_model.calc_visg(p, pdew=250), visg)
 
 
+def test_pvtg_index():
+    """Test the PVTG index built when the PVTG table is set"""
+
+    pvt_models = init_from_ecl_df()
+
+    pvt_model = pvt_models[0]
+    pvtg_index = pvt_model._pvtg_index
+
+    assert np.allclose(pvtg_index.p_nodes, np.unique(pvt_model.pvtg[:, 0]))
+    assert pvtg_index.offsets[-1] == len(pvt_model.pvtg)
+    assert np.isclose(pvtg_index.pdew[0], 20.0)
+    assert np.isclose(pvtg_index.rv[0], 0.0000182145)
+    assert np.all(np.diff(pvtg_index.rv_sorted) > 0.0)
+
+    # Wet-gas branches are ascending in rv
+    rows = slice(pvtg_index.offsets[2], pvtg_index.offsets[3])
+    assert np.allclose(pvtg_index.rv_tab[rows], [0.0, 0.0000088615, 0.0000318405])
+    key_tab, _, _ = pvtg_index.rv_key
+    assert np.all(np.diff(key_tab) > 0.0)
+
+    # rv is clamped to the branch rv range
+    p = 148.9
+    assert np.isclose(pvt_model.calc_bg(p, rv=0.0), 0.007395)
+    assert np.isclose(pvt_model.calc_bg(p, rv=1.0e-3), pvt_model.calc_bg(p))
+
+    # Single-row branches (one pressure node) are constant in rv
+    pvt_model.pvtg = np.array(
+        [
+            [100.0, 0.0001, 0.0100, 0.020],
+            [200.0, 0.0002, 0.0050, 0.025],
+            [200.0, 0.0000, 0.0052, 0.024],
+        ]
+    )
+    inv_bg2 = 0.5 * (1.0 / 0.0050 + 1.0 / 0.0052)
+    inv_bg = np.interp(150.0, [100.0, 200.0], [1.0 / 0.0100, inv_bg2])
+    assert np.isclose(pvt_model.calc_bg(150.0, rv=0.0001), 1.0 / inv_bg)
+
+
+def test_array_api():
+    """Test that BoPVT calculators accept and return arrays"""
+
+    pvt_models = init_from_ecl_df()
+
+    pvt_model = pvt_models[1]
+
+    pres = np.array([200.0, 300.0, 350.0, 390.0])
+    rs = np.array([150.0, 60.0, 100.0, 200.0])
+    rv = np.array([0.0001, 0.0002, 0.00005, 0.0001])
+
+    for func, kwargs in [
+        (pvt_model.calc_bo, {}),
+        (pvt_model.calc_bo, {"rs": rs}),
+        (pvt_model.calc_viso, {"rs": rs}),
+        (pvt_model.calc_deno, {"rs": rs}),
+        (pvt_model.calc_bg, {}),
+        (pvt_model.calc_bg, {"rv": rv}),
+        (pvt_model.calc_visg, {"rv": rv}),
+        (pvt_model.calc_deng, {"rv": rv}),
+        (pvt_model.calc_bw, {}),
+        (pvt_model.calc_denw, {}),
+        (pvt_model.calc_visw, {}),
+    ]:
+        values = func(pres, **kwargs)
+        assert values.shape == pres.shape
+
+        for i, p in enumerate(pres):
+            scalar_kwargs = {key: val[i] for key, val in kwargs.items()}
+            assert np.isclose(values[i], func(p, **scalar_kwargs))
+
+    assert np.allclose(pvt_model.calc_pbub(rs), [pvt_model.calc_pbub(x) for x in rs])
+    assert np.allclose(pvt_model.calc_pdew(rv), [pvt_model.calc_pdew(x) for x in rv])
+
+    # Saturated entries (bubble-point above pressure) use saturated values
+    pbub = pvt_model.calc_pbub(rs)
+    sat = pbub >= pres
+    assert sat.any()
+    assert np.allclose(
+        pvt_model.calc_bo(pres, rs=rs)[sat], pvt_model.calc_bo(pres[sat])
+    )
+
+
+def test_usat_interpolation():
+    """Test bilinear undersaturated PVTO interpolation options"""
+
+    pvt_models = init_from_ecl_df()
+
+    pvt_model = pvt_models[1]
+
+    # On an Rs node, both options follow the undersaturated branch
+    rs = 175.419
+    x = [342.2, 392.5, 406.7, 471.1, 535.6, 600.0]
+    y = [1.47418, 1.46085, 1.45738, 1.44285, 1.43012, 1.41885]
+    bo = np.interp(500.0, x, y)
+    assert np.isclose(pvt_model.calc_bo(500.0, rs=rs), bo)
+
+    pvt_model.set_USAT_INTERPOLATION("offset")
+    assert np.isclose(pvt_model.calc_bo(500.0, rs=rs), bo)
+
+    # Between Rs nodes, the branches are shifted to the same offset above
+    # their bubble-points
+    rs = 190.0
+    weight = (rs - 175.419) / (209.677 - 175.419)
+    pbub = pvt_model.calc_pbub(rs)
+    dp = 500.0 - pbub
+    x2 = [392.5, 406.7, 471.1, 535.6, 600.0]
+    y2 = [1.55249, 1.54824, 1.53057, 1.51519, 1.50165]
+    bo = (1.0 - weight) * np.interp(342.2 + dp, x, y) + weight * np.interp(
+        392.5 + dp, x2, y2
+    )
+    assert np.isclose(pvt_model.calc_bo(500.0, rs=rs), bo)
+
+    # ... and reduce to the saturated value at the bubble-point
+    assert np.isclose(pvt_model.calc_bo(pbub + 1.0e-9, rs=rs), pvt_model.calc_bo(pbub))
+
+    with pytest.raises(ValueError):
+        pvt_model.set_USAT_INTERPOLATION("spline")
+
+
 def test_pvtw():
     """Test BoPVT water properties calculations"""
 
@@ -227,8 +380,39 @@ def test_pvtw():
     assert np.isclose(pvt_model.calc_denw(p), denw)
 
 
+def test_init_from_tables():
+    """Test BoPVT set up from the partitioned PVT tables"""
+
+    pvt_txt = (TESTDATA / "pvt").read_text(encoding="utf-8", errors="ignore")
+    tables = partition_pvt(ecl2df.pvt.df(pvt_txt))
+
+    assert sorted(tables) == [
+        (keyword, pvtnum)
+        for keyword in ["DENSITY", "PVTG", "PVTO", "PVTW"]
+        for pvtnum in [1, 2]
+    ]
+
+    for pvt_model in init_from_ecl_df():
+        from_tables = BoPVT(pvt_model.pvtnum)
+        from_tables.init_from_tables(tables)
+
+        for table in ["pvto", "pvtg", "pvtw", "sdeno", "sdeng", "sdenw"]:
+            assert np.array_equal(
+                getattr(from_tables, table), getattr(pvt_model, table)
+            )
+        assert from_tables.pvto.flags["C_CONTIGUOUS"]
+
+    with pytest.raises(ValueError):
+        BoPVT(3).init_from_tables(tables)
+
+
 if __name__ == "__main__":
 
     test_pvto()
+    test_pvto_index()
     test_pvtg()
+    test_pvtg_index()
+    test_array_api()
+    test_usat_interpolation()
     test_pvtw()
+    test_init_from_tables()
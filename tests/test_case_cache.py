@@ -0,0 +1,131 @@
+"""Test case_cache"""
+
+import os
+import pathlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pypvt import CaseCache
+from pypvt.case_cache import case_files, case_key
+
+TESTDATA = pathlib.Path(__file__).resolve().parent / "data"
+
+
+def test_main():
+    pass
+
+
+def write_deck(path):
+    """
+    Writes a DATA file including an RSVD file directly, and an RVVD file
+    through a nested include with a PATHS alias
+    """
+
+    (path / "include").mkdir()
+    (path / "CASE.DATA").write_text(
+        "PATHS\n 'INC' 'include' /\n/\n"
+        "-- INCLUDE\n-- 'commented.inc' /\n"
+        "INCLUDE\n 'include/rsvd.inc' /\n"
+        "INCLUDE\n-- comment\n  nested.inc  /\n",
+        encoding="utf-8",
+    )
+    (path / "nested.inc").write_text("INCLUDE\n '$INC/rvvd.inc' /\n", encoding="utf-8")
+    (path / "include" / "rsvd.inc").write_text(
+        (TESTDATA / "rsvd").read_text(encoding="utf-8"), encoding="utf-8"
+    )
+    (path / "include" / "rvvd.inc").write_text(
+        (TESTDATA / "rvvd").read_text(encoding="utf-8"), encoding="utf-8"
+    )
+
+
+def test_case_files():
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir).resolve()
+        write_deck(path)
+
+        assert case_files(path / "CASE") == [
+            path / "CASE.DATA",
+            path / "include" / "rsvd.inc",
+            path / "nested.inc",
+            path / "include" / "rvvd.inc",
+            path / "CASE.EGRID",
+            path / "CASE.INIT",
+        ]
+
+
+def test_case_key():
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir)
+        write_deck(path)
+
+        key = case_key(path / "CASE.DATA")
+        assert case_key(path / "CASE.DATA") == key
+        assert case_key(path / "CASE.DATA", porv=True) != key
+
+        # Editing a nested include changes the key
+        rvvd = path / "include" / "rvvd.inc"
+        stat = rvvd.stat()
+        os.utime(rvvd, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+        assert case_key(path / "CASE.DATA") != key
+
+
+def test_put_get():
+
+    df_dict = {
+        "GRID": pd.DataFrame(
+            {"Z": [2000.0, 2010.5], "PVTNUM": [1, 2], "EQLNUM": [1, 1]}
+        ),
+        "RSVD": pd.DataFrame(
+            {"Z": [2000.0, 2100.0], "RS": [100.0, 120.0], "KEYWORD": ["RSVD"] * 2}
+        ),
+        "PBVD": pd.DataFrame(),
+    }
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CaseCache(tmpdir)
+        assert cache.get("key") is None
+
+        cache.put("key", df_dict)
+        cached = cache.get("key")
+
+        assert sorted(cached) == sorted(df_dict)
+        assert cached["PBVD"].empty
+        for name in ["GRID", "RSVD"]:
+            assert list(cached[name].columns) == list(df_dict[name].columns)
+            for col in df_dict[name]:
+                assert np.array_equal(cached[name][col], df_dict[name][col])
+        assert cached["GRID"]["PVTNUM"].dtype.kind == "i"
+
+
+def test_evict():
+
+    df_dict = {"GRID": pd.DataFrame({"Z": np.linspace(0.0, 1.0, 1000)})}
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = CaseCache(tmpdir)
+        cache.put("first", df_dict)
+        cache.max_size = 2.5 * cache.size("first")
+
+        cache.put("second", df_dict)
+        os.utime(cache.cache_dir / "first", (0, 0))
+        os.utime(cache.cache_dir / "second", (1, 1))
+
+        # Using the first entry makes the second the least recently used
+        cache.get("first")
+        cache.put("third", df_dict)
+
+        assert cache.get("first") is not None
+        assert cache.get("second") is None
+        assert cache.get("third") is not None
+
+
+if __name__ == "__main__":
+    test_main()
+    test_case_files()
+    test_case_key()
+    test_put_get()
+    test_evict()
@@ -1,12 +1,15 @@
 """Test element_fluid_description"""
 
+import logging
 import pathlib
 
 import numpy as np
+import pytest
 import pandas as pd
 import ecl2df
 
-from pypvt import ElementFluidDescription
+from pypvt import ElementFluidDescription, BoPVT, DepthProfile
+from pypvt.element_fluid_description import partition_equil
 
 TESTDATA = pathlib.Path(__file__).resolve().parent / "data"
 
@@ -79,6 +82,35 @@ def test_init_from_ecl_df():
     assert np.isclose(description.goc, 0)
 
 
+def test_intpol():
+
+    xt = np.array([1000.0, 1100.0, 1100.0, 1300.0])
+    yt = np.array([[100.0, 120.0, 140.0, 150.0], [0.0, 1.0, 2.0, 4.0]])
+    x = np.array([[900.0, 1000.0, 1050.0], [1200.0, 1300.0, 1400.0]])
+
+    intpol = ElementFluidDescription.intpol
+    for row in yt:
+        assert np.allclose(intpol(x, xt, row), np.interp(x, xt, row))
+        assert np.allclose(
+            intpol(x, xt[::-1], row[::-1], order="descending"),
+            intpol(x, xt, row),
+        )
+
+    # One bracket shared by all y-tables
+    bracket = ElementFluidDescription.interp_bracket(x, xt, extpol_opt="linear")
+    shared = intpol(x, xt, yt, bracket=bracket)
+    assert shared.shape == (2,) + x.shape
+    assert np.allclose(shared[0], [[80.0, 100.0, 110.0], [145.0, 150.0, 155.0]])
+    assert np.allclose(shared[1], intpol(x, xt, yt[1], extpol_opt="linear"))
+
+    assert np.isclose(intpol(1050.0, xt, yt[0]), 110.0)
+    assert np.isclose(intpol(1500.0, [1000.0], [3.0], extpol_opt="linear"), 3.0)
+
+    for kwargs in [{"extpol_opt": "error"}, {"extpol_opt": "cubic"}, {"order": "?"}]:
+        with pytest.raises(ValueError):
+            intpol(x, xt, yt[0], **kwargs)
+
+
 def test_init_equil_from_df():
 
     txt = (TESTDATA / "DATA").read_text(encoding="utf-8", errors="ignore")
@@ -201,12 +233,365 @@ def test_get_df():
     assert df["RV"][1] == df_out["RV"][1]
 
 
+def init_fluid_description(top_struct=2000.0, bottom_struct=2700.0):
+    """Returns a fluid description of EQLNUM 1 with a gas cap and an oil zone"""
+
+    data_txt = (TESTDATA / "DATA").read_text(encoding="utf-8", errors="ignore")
+
+    equil_txt = (TESTDATA / "equil").read_text(encoding="utf-8", errors="ignore")
+    equil_df = ecl2df.equil.df(data_txt + equil_txt, keywords="EQUIL")
+
+    rsvd_txt = (TESTDATA / "rsvd").read_text(encoding="utf-8", errors="ignore")
+    rsvd_df = ecl2df.equil.df(data_txt + rsvd_txt, keywords="RSVD")
+
+    rvvd_txt = (TESTDATA / "rvvd").read_text(encoding="utf-8", errors="ignore")
+    rvvd_df = ecl2df.equil.df(data_txt + rvvd_txt, keywords="RVVD")
+
+    pvt_txt = (TESTDATA / "pvt").read_text(encoding="utf-8", errors="ignore")
+    pvt_df = ecl2df.pvt.df(data_txt + pvt_txt)
+
+    pvt_model = BoPVT(1)
+    pvt_model.init_from_ecl_df({"PVT": pvt_df})
+
+    description = ElementFluidDescription(
+        1,
+        1,
+        pvt_model=pvt_model,
+        top_struct=top_struct,
+        bottom_struct=bottom_struct,
+    )
+    description.init_from_ecl_df(
+        {
+            "EQUIL": equil_df,
+            "RSVD": rsvd_df,
+            "RVVD": rvvd_df,
+            "PBVD": pd.DataFrame(),
+            "PDVD": pd.DataFrame(),
+        }
+    )
+
+    description.rsvd_rs = np.array([100.0, 120.0])
+    description.rvvd_rv = np.array([0.0001, 0.0003])
+    description.goc = 2300.0
+    description.owc = 2600.0
+
+    return description
+
+
+def test_depth_nodes():
+
+    description = ElementFluidDescription(1, 1, top_struct=2000.0, bottom_struct=2400.0)
+    description.ref_depth = 2250.0
+    description.goc = 2170.0
+    description.owc = 2330.0
+
+    depth, i_ref, upward = description.depth_nodes(no_nodes=4)
+    assert np.array_equal(depth, [1970.0, 2070.0, 2170.0, 2250.0, 2330.0, 2430.0])
+    assert i_ref == 3
+    assert np.array_equal(upward, depth <= description.ref_depth)
+
+    # Fine grid where rounding puts the step from the GOC node within one
+    # step of the GOC: the GOC is a node once, and the next node is above it
+    description.bottom_struct = 2780.0
+    description.ref_depth = 2210.4
+    description.goc = 2008.6
+    description.owc = 2830.0
+    delta_d = (2780.0 - 2000.0) / 1912
+
+    depth, _, _ = description.depth_nodes(no_nodes=1912)
+    assert np.all(np.diff(depth) > 0.0)
+    i_goc = list(depth).index(description.goc)
+    assert list(depth).count(description.goc) == 1
+    assert np.isclose(depth[i_goc - 1], description.goc - delta_d)
+
+
+def test_calc_fluid_prop_vs_depth():
+
+    description = init_fluid_description()
+    profile = description.calc_fluid_prop_vs_depth(no_nodes=20)
+    assert profile is description.depth_profile
+
+    depth = profile.depth
+    pres = profile.pres
+    den = profile.den
+    fluid_type = profile.fluid_type
+
+    assert np.all(np.diff(depth) > 0.0)
+    assert description.goc in depth
+    assert description.owc in depth
+
+    i_ref = list(depth).index(description.ref_depth)
+    assert np.isclose(pres[i_ref], description.ref_press)
+
+    # Node pressures satisfy the hydrostatic recurrence away from the reference
+    grad = 0.0981 / 1000.0
+    dz = np.diff(depth)
+    assert np.allclose(
+        pres[i_ref + 1 :], pres[i_ref:-1] + grad * den[i_ref:-1] * dz[i_ref:]
+    )
+    assert np.allclose(
+        pres[:i_ref], pres[1 : i_ref + 1] - grad * den[1 : i_ref + 1] * dz[:i_ref]
+    )
+
+    assert set(fluid_type[depth < description.goc]) == {"gas"}
+    assert set(fluid_type[(depth > description.goc) & (depth < description.owc)]) == {
+        "oil"
+    }
+    assert set(fluid_type[depth > description.owc]) == {"wat"}
+
+    # Fine depth grids
+    fine = description.calc_fluid_prop_vs_depth(no_nodes=2000)
+    assert len(fine) > 2000
+    assert np.isclose(
+        np.interp(2100.0, fine.depth, fine.pres),
+        np.interp(2100.0, depth, pres),
+        atol=0.5,
+    )
+
+
+def test_psat_curves():
+
+    description = init_fluid_description()
+    depth = np.linspace(description.top_struct - 100.0, description.bottom_struct, 500)
+
+    pbub, pdew = description.psat_at_depth(depth)
+    rs = description.intpol(depth, description.rsvd_depth, description.rsvd_rs)
+    rv = description.intpol(depth, description.rvvd_depth, description.rvvd_rv)
+    assert np.allclose(pbub, description.pvt_model.calc_pbub(rs))
+    assert np.allclose(pdew, description.pvt_model.calc_pdew(rv))
+
+    # Memoised until a table is replaced
+    curves = description.psat_curves()
+    assert description.psat_curves() is curves
+    assert description.set_goc(2300.0).psat_curves() is curves
+
+    description.rsvd_rs = description.rsvd_rs * 0.5
+    assert description.psat_curves() is not curves
+    pbub, _ = description.psat_at_depth(depth)
+    assert np.allclose(pbub, description.pvt_model.calc_pbub(rs * 0.5))
+
+
+def test_depth_profile_to_df():
+
+    description = init_fluid_description()
+    profile = description.calc_fluid_prop_vs_depth(no_nodes=20)
+    no_nodes = len(profile)
+
+    # Results are reset, not appended to, on recalculation
+    description.calc_fluid_prop_vs_depth(no_nodes=20)
+    assert len(description.depth_profile) == no_nodes
+
+    profile = description.depth_profile
+    df = profile.to_df()
+    assert list(df.columns) == ["DEPTH", "FLUID_TYPE"] + DepthProfile.COLUMNS[1:]
+    assert len(df) == no_nodes
+    assert df["FLUID_TYPE"].dtype.name == "category"
+    assert list(df["FLUID_TYPE"]) == list(profile.fluid_type)
+    assert np.shares_memory(df["DEPTH"].to_numpy(), profile.depth)
+    assert np.array_equal(df["RS"].to_numpy(), profile.rs, equal_nan=True)
+
+
+def test_set_contacts():
+
+    description = init_fluid_description()
+    description.calc_fluid_prop_vs_depth()
+
+    new_description = description.set_owc(2650.0).set_goc(2350.0)
+
+    assert (new_description.goc, new_description.owc) == (2350.0, 2650.0)
+    assert (description.goc, description.owc) == (2300.0, 2600.0)
+
+    # Pvt model and tables are shared, results are not
+    assert new_description.pvt_model is description.pvt_model
+    assert new_description.rsvd_rs is description.rsvd_rs
+    assert new_description.depth_profile is None
+    assert description.depth_profile is not None
+
+
+def test_gradient_check_counts():
+
+    description = init_fluid_description()
+    description.pvt_logger = logging.getLogger("test_gradient_check_counts")
+    profile = description.calc_fluid_prop_vs_depth(no_nodes=200)
+
+    counts = description.gradient_check_counts(
+        profile.depth,
+        profile.pres,
+        profile.psat,
+        profile.pbub,
+        profile.pdew,
+        deno=profile.deno,
+        deng=profile.deng,
+        top=description.top_struct,
+        goc=description.goc,
+        woc=description.owc,
+    )
+    assert tuple(counts) == description.pvt_gradient_check()
+
+
+def test_gradient_violations():
+
+    description = init_fluid_description()
+    description.pvt_logger = logging.getLogger("test_gradient_violations")
+    description.calc_fluid_prop_vs_depth(no_nodes=200)
+
+    violations = description.gradient_violations()
+    assert len(violations) > 0
+    assert set(violations["CHECK"]) <= set(description.CHECK_SEVERITY)
+    assert (violations["DEPTH_BOTTOM"] >= violations["DEPTH_TOP"]).all()
+
+    severity = violations["SEVERITY"]
+    assert description.pvt_gradient_check() == (
+        (severity == "FATAL").sum(),
+        (severity == "ERROR").sum(),
+        (severity == "WARNING").sum(),
+    )
+
+    # GOC at the datum, with a repeated node at the contact, where psat
+    # steps. Zero length intervals are not checked, as in sweep_contacts.
+    at_datum = description.set_goc(description.ref_depth)
+    profile = at_datum.calc_fluid_prop_vs_depth(no_nodes=20)
+    i = int(np.argmin(np.abs(profile.depth - at_datum.goc)))
+    repeated = DepthProfile(len(profile) + 1)
+    repeated.values = np.insert(profile.values, i, profile.values[:, i], axis=1)
+    repeated.fluid_codes = np.insert(profile.fluid_codes, i, profile.fluid_codes[i])
+    repeated["PSAT"][i] += 50.0
+    at_datum.depth_profile = repeated
+
+    violations = at_datum.gradient_violations()
+    intervals = violations[violations["CHECK"].isin(description.INTERVAL_CHECKS)]
+    assert (intervals["DEPTH_BOTTOM"] > intervals["DEPTH_TOP"]).all()
+
+    severity = violations["SEVERITY"]
+    counts = ElementFluidDescription.gradient_check_counts(
+        repeated.depth,
+        repeated.pres,
+        repeated.psat,
+        repeated.pbub,
+        repeated.pdew,
+        deno=repeated.deno,
+        deng=repeated.deng,
+        top=at_datum.top_struct,
+        goc=at_datum.goc,
+        woc=at_datum.owc,
+    )
+    assert tuple(counts) == (
+        (severity == "FATAL").sum(),
+        (severity == "ERROR").sum(),
+        (severity == "WARNING").sum(),
+    )
+
+
+def test_inplace_report():
+
+    description = init_fluid_description()
+    description.pvt_logger = logging.getLogger("test_inplace_report")
+
+    fine = description.inplace_report(no_nodes=2000)
+    for no_nodes in [20, 137]:
+        for method in ["trapezoid", "simpson"]:
+            assert np.allclose(
+                description.inplace_report(no_nodes=no_nodes, method=method),
+                fine,
+                rtol=1.0e-4,
+            )
+
+    with pytest.raises(ValueError):
+        description.inplace_report(method="rectangle")
+
+    # Zones are clipped to the structure, for contacts outside it
+    depth = np.linspace(1900.0, 2300.0, 5)
+    ones = np.ones(5)
+    for goc, owc, expected in [
+        (2400.0, 2500.0, [200.0, 200.0, 0.0, 0.0]),
+        (1800.0, 1900.0, [0.0, 0.0, 0.0, 0.0]),
+        (1950.0, 2100.0, [0.0, 0.0, 100.0, 100.0]),
+    ]:
+        inplace = ElementFluidDescription.integrate_inplace(
+            depth, ones, ones, ones, ones, goc=goc, owc=owc, top=2000.0, bottom=2200.0
+        )
+        assert np.allclose(inplace, expected)
+
+
+def test_sweep_contacts():
+
+    description = init_fluid_description()
+    gocs = np.array([2250.0, 2300.0, 2350.0])
+    owcs = np.array([2550.0, 2600.0, 2650.0])
+
+    sweep = description.sweep_contacts(gocs, owcs, no_nodes=500)
+    assert np.array_equal(sweep["GOC"], gocs)
+    assert np.array_equal(sweep["OWC"], owcs)
+
+    # Candidates are evaluated independently
+    single = description.sweep_contacts(gocs[1], owcs[1], no_nodes=500)
+    assert np.allclose(single.iloc[0], sweep.iloc[1])
+
+    # In-place as from the depth profile of the same contacts
+    description.calc_fluid_prop_vs_depth(no_nodes=500)
+    inplace = description.inplace_report()
+    assert np.allclose(
+        sweep.loc[1, ["GGIP", "OGIP", "OOIP", "GOIP"]].to_numpy(dtype=float),
+        inplace,
+        rtol=0.01,
+    )
+
+    # A higher GOC gives less gas and more oil
+    assert np.all(np.diff(sweep["GGIP"]) > 0.0)
+    assert np.all(np.diff(sweep["OOIP"]) < 0.0)
+
+
+def test_init_from_tables():
+    """Test equil set up from the tables partitioned on EQLNUM"""
+
+    data_txt = (TESTDATA / "DATA").read_text(encoding="utf-8", errors="ignore")
+    df_dict = {}
+    for keyword in ["EQUIL", "RSVD", "RVVD", "PBVD", "PDVD"]:
+        txt = (TESTDATA / keyword.lower()).read_text(encoding="utf-8", errors="ignore")
+        df_dict[keyword] = ecl2df.equil.df(data_txt + txt, keywords=keyword)
+
+    tables = partition_equil(df_dict)
+    assert sorted({keyword for keyword, _ in tables}) == sorted(df_dict)
+
+    for eqlnum in df_dict["EQUIL"]["EQLNUM"].unique():
+        description = ElementFluidDescription(int(eqlnum), 1)
+        description.init_equil_from_df(df_dict["EQUIL"])
+        description.init_rsvd_from_df(df_dict["RSVD"])
+        description.init_rvvd_from_df(df_dict["RVVD"])
+        description.init_pbvd_from_df(df_dict["PBVD"])
+        description.init_pdvd_from_df(df_dict["PDVD"])
+
+        from_tables = ElementFluidDescription(int(eqlnum), 1)
+        from_tables.init_from_tables(tables)
+
+        assert from_tables.equil_record() == description.equil_record()
+        for keyword in ElementFluidDescription.VD_TABLES:
+            for expected, table in zip(
+                description.vd_table(keyword), from_tables.vd_table(keyword)
+            ):
+                assert np.array_equal(table, expected)
+
+    with pytest.raises(ValueError):
+        ElementFluidDescription(99, 1).init_from_tables(tables)
+
+
 if __name__ == "__main__":
     test_main()
     test_init_from_ecl_df()
+    test_init_from_tables()
+    test_intpol()
     test_init_equil_from_df()
     test_init_rsvd_from_df()
     test_init_rvvd_from_df()
     test_init_pbvd_from_df()
     test_init_pdvd_from_df()
     test_get_df()
+    test_depth_nodes()
+    test_calc_fluid_prop_vs_depth()
+    test_psat_curves()
+    test_depth_profile_to_df()
+    test_set_contacts()
+    test_gradient_check_counts()
+    test_gradient_violations()
+    test_inplace_report()
+    test_sweep_contacts()
@@ -0,0 +1,150 @@
+"""Test ensemble"""
+
+import contextlib
+import io
+import pathlib
+import tempfile
+
+import opm.io
+import pandas as pd
+
+from pypvt import FieldFluidDescription
+from pypvt.ensemble import evaluate_ensemble, realisation_kwfiles
+from tests.test_field_fluid_description import write_ecl_case
+
+TESTDATA = pathlib.Path(__file__).resolve().parent / "data"
+
+RSVD_OVERRIDE = """RSVD
+ 1500 150.0
+ 4000 150.0  /
+ 1500 150.0
+ 4000 150.0  /
+"""
+
+
+def test_main():
+    pass
+
+
+def write_ensemble(tmpdir):
+    """
+    Writes a base case and three realisation directories, the last two with
+    an RSVD override
+    """
+
+    eclbase = str(pathlib.Path(tmpdir) / "CASE")
+    write_ecl_case(eclbase)
+
+    directories = []
+    for i in range(3):
+        directory = pathlib.Path(tmpdir) / f"realisation-{i}"
+        directory.mkdir()
+        if i > 0:
+            (directory / "rsvd.inc").write_text(RSVD_OVERRIDE, encoding="utf-8")
+        directories.append(directory)
+
+    return eclbase, directories
+
+
+def test_realisation_kwfiles():
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        directory = pathlib.Path(tmpdir)
+        (directory / "RSVD.INC").write_text(RSVD_OVERRIDE, encoding="utf-8")
+        (directory / "pvt.inc").write_text("", encoding="utf-8")
+        (directory / "notes.txt").write_text("", encoding="utf-8")
+        assert realisation_kwfiles(directory) == {
+            "PVT": directory / "pvt.inc",
+            "RSVD": directory / "RSVD.INC",
+        }
+
+        (directory / "rsvd.inc").write_text(RSVD_OVERRIDE, encoding="utf-8")
+        try:
+            realisation_kwfiles(directory)
+            assert False, "Expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_evaluate_ensemble():
+
+    parsed = []
+    parse = opm.io.Parser.parse
+
+    def counting_parse(parser, *args, **kwargs):
+        parsed.append(args[0])
+        return parse(parser, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase, directories = write_ensemble(tmpdir)
+
+        opm.io.Parser.parse = counting_parse
+        try:
+            df = evaluate_ensemble(eclbase + ".DATA", directories)
+        finally:
+            opm.io.Parser.parse = parse
+
+        # The base case is parsed once for all realisations
+        assert len(parsed) == 1
+
+        names = [directory.name for directory in directories]
+        assert list(df["REALISATION"].unique()) == names
+
+        base = FieldFluidDescription(eclbase + ".DATA", {})
+        results = base.evaluate()
+        base.close()
+        first = df[df["REALISATION"] == names[0]]
+        assert list(first["EQLNUM"]) == [result.eqlnum for result in results]
+        assert list(first["OOIP"]) == [result.inplace[2] for result in results]
+
+        # Overridden RSVD changes in-place, equal overrides give equal results
+        second, third = [
+            df[df["REALISATION"] == name].reset_index(drop=True) for name in names[1:]
+        ]
+        assert list(second["OOIP"]) != list(first["OOIP"])
+        pd.testing.assert_frame_equal(
+            second.drop(columns="REALISATION"), third.drop(columns="REALISATION")
+        )
+
+        parallel = evaluate_ensemble(eclbase + ".DATA", directories, workers=2)
+        pd.testing.assert_frame_equal(parallel, df)
+
+
+def test_realisation_failure():
+
+    closed = []
+    evaluate = FieldFluidDescription.evaluate
+    close = FieldFluidDescription.close
+
+    def failing_evaluate(field, *args, **kwargs):
+        raise ValueError("No convergence")
+
+    def counting_close(field):
+        closed.append(field)
+        close(field)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase, directories = write_ensemble(tmpdir)
+
+        FieldFluidDescription.evaluate = failing_evaluate
+        FieldFluidDescription.close = counting_close
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                df = evaluate_ensemble(eclbase + ".DATA", directories)
+        finally:
+            FieldFluidDescription.evaluate = evaluate
+            FieldFluidDescription.close = close
+
+    # Failed realisations are reported and skipped, and always closed
+    assert df.empty
+    assert len(closed) == len(directories)
+    for directory in directories:
+        assert f"Unable to evaluate realisation {directory.name}" in output.getvalue()
+
+
+if __name__ == "__main__":
+    test_main()
+    test_realisation_kwfiles()
+    test_evaluate_ensemble()
+    test_realisation_failure()
@@ -0,0 +1,530 @@
+"""Test field_fluid_description"""
+
+# pylint: disable=protected-access
+
+import contextlib
+import gzip
+import io
+import logging
+import pathlib
+import tempfile
+
+import numpy as np
+import pytest
+import pandas as pd
+import ecl2df
+import opm.io
+from ecl import EclDataType
+from ecl.eclfile import EclKW, FortIO, openFortIO
+from ecl.grid import EclGridGenerator
+
+from pypvt import FieldFluidDescription, CaseCache
+
+TESTDATA = pathlib.Path(__file__).resolve().parent / "data"
+
+
+def test_main():
+    pass
+
+
+def init_field_description():
+    """
+    Returns a field description with two equil regions, set up from the test
+    data tables with a grid of 36 cells per region, without eclipse files
+    """
+
+    data_txt = (TESTDATA / "DATA").read_text(encoding="utf-8", errors="ignore")
+
+    equil_txt = (TESTDATA / "equil").read_text(encoding="utf-8", errors="ignore")
+    rsvd_txt = (TESTDATA / "rsvd").read_text(encoding="utf-8", errors="ignore")
+    rvvd_txt = (TESTDATA / "rvvd").read_text(encoding="utf-8", errors="ignore")
+    pvt_txt = (TESTDATA / "pvt").read_text(encoding="utf-8", errors="ignore")
+
+    # Contacts and RSVD of the regions
+    equil = ecl2df.equil.df(data_txt + equil_txt, keywords="EQUIL")
+    equil["GOC"] = [2300.0, 2480.0]
+    equil["OWC"] = [2600.0, 2600.0]
+    rsvd = ecl2df.equil.df(data_txt + rsvd_txt, keywords="RSVD")
+    rsvd["RS"] = [100.0, 120.0, 150.0, 120.0]
+
+    grid = pd.DataFrame(
+        {
+            "Z": np.tile(np.linspace(2100.0, 2800.0, 36), 2),
+            "PVTNUM": np.repeat([1, 2], 36),
+            "EQLNUM": np.repeat([1, 2], 36),
+            "PORV": np.full(72, 1000.0),
+        }
+    )
+
+    case_tables = {
+        "GRID": grid,
+        "PORV_BINS": FieldFluidDescription._porv_histogram(grid),
+        "PVT": ecl2df.pvt.df(pvt_txt),
+        "EQUIL": equil,
+        "RSVD": rsvd,
+        "RVVD": ecl2df.equil.df(data_txt + rvvd_txt, keywords="RVVD"),
+        "PBVD": pd.DataFrame(),
+        "PDVD": pd.DataFrame(),
+    }
+
+    return FieldFluidDescription(None, {}, case_tables=case_tables)
+
+
+def test_evaluate_parallel():
+
+    serial = init_field_description()
+    parallel = init_field_description()
+
+    # Both regions share one pvt model, with RSVD above the PVTO table
+    for field in (serial, parallel):
+        shared = field.fluid_description(1)
+        fluid = field.fluid_description(2)
+        fluid.pvtnum = shared.pvtnum
+        fluid.pvt_model = shared.pvt_model
+        fluid.rsvd_rs = np.array([500.0, 500.0])
+
+    results = {}
+    texts = {}
+    for field, workers in ((serial, 1), (parallel, 2)):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            results[workers] = field.evaluate(no_nodes=20, workers=workers)
+        texts[workers] = output.getvalue()
+    serial_results, parallel_results = results[1], results[2]
+
+    assert [res.eqlnum for res in parallel_results] == [1, 2]
+    for res_s, res_p, fluid in zip(
+        serial_results, parallel_results, parallel.fluid_descriptions
+    ):
+        assert fluid.depth_profile is res_p.depth_profile
+        assert np.array_equal(
+            res_s.depth_profile.values, res_p.depth_profile.values, equal_nan=True
+        )
+        assert list(res_s.depth_profile.fluid_type) == list(
+            res_p.depth_profile.fluid_type
+        )
+        assert res_s.inplace == res_p.inplace
+        assert res_s.checks == res_p.checks
+
+    def summary(records):
+        return [(rec.levelname, rec.pvtnum, rec.getMessage()) for rec in records]
+
+    assert len(serial.records_list()) > 0
+    assert summary(parallel.records_list()) == summary(serial.records_list())
+    assert parallel.report.entries == serial.report.entries
+    assert texts[2] == texts[1]
+
+    for field in (serial, parallel):
+        assert len(field.report.to_df().query("CHECK == 'RS_OUTSIDE_TABLE'")) == 1
+        assert field.fluid_descriptions[0].pvt_model.calc_pbub_warning
+
+    with pytest.raises(ValueError):
+        serial.evaluate(workers=0)
+
+
+def test_consistency_report():
+
+    field = init_field_description()
+    results = field.evaluate(no_nodes=20)
+
+    for result in results:
+        no_errors = result.checks[0] + result.checks[1]
+        entries = field.report.select(result.pvtnum, result.eqlnum, "ERROR")
+        assert len(entries) == no_errors
+        assert all(entry["CHECK"] for entry in entries)
+        assert len(field.report.select(result.pvtnum, result.eqlnum, "WARNING")) == (
+            result.checks[2]
+        )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jsonl = pathlib.Path(tmpdir) / "report.jsonl"
+        parquet = pathlib.Path(tmpdir) / "report.parquet"
+        field.write_consistency_report(jsonl)
+        field.write_consistency_report(parquet)
+
+        df = pd.read_json(jsonl, lines=True)
+        assert len(df) == len(field.report.entries)
+        assert list(df["CHECK"]) == [entry["CHECK"] for entry in field.report.entries]
+        pd.testing.assert_frame_equal(pd.read_parquet(parquet), field.report.to_df())
+
+
+def test_evaluate_cells():
+
+    field = init_field_description()
+    cells = field.evaluate_cells(no_nodes=100)
+
+    assert len(cells) == len(field.grid)
+    assert list(cells["EQLNUM"]) == list(field.grid["EQLNUM"])
+    assert np.array_equal(cells["DEPTH"], field.grid["Z"])
+
+    for fluid in field.fluid_descriptions:
+        region = cells[cells["EQLNUM"] == fluid.eqlnum]
+        depth = region["DEPTH"].to_numpy()
+
+        # Same pressure as a fine depth profile over the grid depths
+        fluid.top_struct = depth.min()
+        fluid.bottom_struct = depth.max()
+        profile = fluid.calc_fluid_prop_vs_depth(no_nodes=100)
+        assert np.allclose(
+            region["PRES"], np.interp(depth, profile.depth, profile.pres)
+        )
+
+        assert set(region["FLUID_TYPE"][depth < fluid.goc]) == {"gas"}
+        assert set(region["FLUID_TYPE"][depth > fluid.owc]) == {"wat"}
+
+        oil = (region["FLUID_TYPE"] == "oil").to_numpy()
+        assert np.allclose(
+            region["DEN"][oil],
+            fluid.pvt_model.calc_deno(region["PRES"][oil], rs=region["RS"][oil]),
+        )
+
+    hydrocarbon = (cells["FLUID_TYPE"] != "wat").to_numpy()
+    flagged = hydrocarbon & (cells["PSAT"] > cells["PRES"]).to_numpy()
+    assert np.array_equal(cells["PSAT_ABOVE_PRES"], flagged)
+    assert flagged.any()
+    assert len(field.records_list()) > 0
+
+
+def test_inplace():
+
+    field = init_field_description()
+    field.fluid_descriptions[1].calc_fluid_prop_vs_depth(no_nodes=50)
+
+    df = field.inplace(method="simpson")
+    assert list(df["EQLNUM"]) == [1, 2]
+    for fluid, row in zip(field.fluid_descriptions, df.itertuples()):
+        assert np.allclose(
+            [row.GGIP, row.OGIP, row.OOIP, row.GOIP],
+            fluid.inplace_report(method="simpson"),
+        )
+
+    # About 1000 m3 of pore volume per 20 m of depth
+    weighted = field.inplace(porv=True)
+    assert np.allclose(weighted["OOIP"], 50.0 * field.inplace()["OOIP"], rtol=0.05)
+
+
+def test_porv_histogram():
+
+    field = init_field_description()
+    field.grid["PORV"] = np.arange(72, dtype=float)
+    field.porv_bins = FieldFluidDescription._porv_histogram(field.grid)
+
+    bin_edges, porv = field.porv_histogram()
+    assert porv.shape == (2, len(bin_edges) - 1)
+    assert np.allclose(porv.sum(axis=1), [np.arange(36).sum(), np.arange(36, 72).sum()])
+
+    field.porv_bins = FieldFluidDescription._porv_histogram(field.grid, bin_size=0.5)
+    assert np.allclose(
+        field.porv_bins.groupby("EQLNUM")["PORV"].sum(), porv.sum(axis=1)
+    )
+
+    # Pore volume weighted sweep, as the in-place of the region
+    fluid = field.fluid_descriptions[0]
+    field.porv_bins = FieldFluidDescription._porv_histogram(field.grid)
+    sweep = field.sweep_contacts(1, fluid.goc, fluid.owc, no_nodes=200, porv=True)
+    fluid.calc_fluid_prop_vs_depth(no_nodes=200)
+    inplace = field.inplace(porv=True)
+    assert np.allclose(
+        sweep[["GGIP", "OGIP", "OOIP", "GOIP"]].to_numpy(dtype=float),
+        inplace.loc[0, ["GGIP", "OGIP", "OOIP", "GOIP"]].to_numpy(dtype=float),
+        rtol=1.0e-3,
+    )
+
+
+def test_set_contacts():
+
+    field = init_field_description()
+    new_field = field.set_owc(2, 2650.0).set_goc(2, 2500.0)
+
+    old_fluid, new_fluid = [
+        fld.fluid_descriptions[fld.fluid_index[2]] for fld in (field, new_field)
+    ]
+    assert (new_fluid.goc, new_fluid.owc) == (2500.0, 2650.0)
+    assert (old_fluid.goc, old_fluid.owc) == (2480.0, 2600.0)
+    assert new_fluid.pvt_model is old_fluid.pvt_model
+
+    # Other regions built before the copy, grid and logging are shared
+    assert new_field.grid is field.grid
+    assert new_field.records_list() is field.records_list()
+    other, new_other = field.fluid_descriptions[0], new_field.fluid_descriptions[0]
+    assert new_other is not other
+    assert (new_other.goc, new_other.owc) == (other.goc, other.owc)
+    assert new_other.pvt_model is other.pvt_model
+    assert field.set_goc(2, 2500.0).fluid_descriptions[0] is other
+
+
+def test_get_df():
+
+    field = init_field_description()
+
+    df = field.get_df("EQUIL")
+    assert list(df["EQLNUM"]) == [fluid.eqlnum for fluid in field.fluid_descriptions]
+
+    df = field.get_df("RSVD")
+    for fluid in field.fluid_descriptions:
+        region = df[df["EQLNUM"] == fluid.eqlnum]
+        assert np.array_equal(region["RS"], fluid.rsvd_rs)
+        assert np.array_equal(region["Z"], fluid.rsvd_depth)
+    assert (df["KEYWORD"] == "RSVD").all()
+
+
+def test_write_equilkws():
+
+    field = init_field_description()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for filename in ("equil.inc", "equil.inc.gz"):
+            filename = str(pathlib.Path(tmpdir) / filename)
+            field.write_equilkws(["EQUIL", "RSVD", "PDVD"], filename)
+
+            opener = gzip.open if filename.endswith(".gz") else open
+            with opener(filename, "rt") as fileh:
+                deck = "OIL\nWATER\nGAS\nDISGAS\n" + fileh.read()
+
+            for keyword, columns in (
+                ("EQUIL", ["EQLNUM", "Z", "PRESSURE", "OWC", "GOC"]),
+                ("RSVD", ["EQLNUM", "Z", "RS"]),
+            ):
+                df = ecl2df.equil.df(deck, keywords=keyword, ntequl=2)
+                pd.testing.assert_frame_equal(
+                    df[columns],
+                    field.get_df(keyword)[columns],
+                    check_dtype=False,
+                )
+
+
+def test_sweep_contacts():
+
+    field = init_field_description()
+    sweep = field.sweep_contacts(2, [2450.0, 2500.0], 2600.0)
+
+    assert list(sweep["GOC"]) == [2450.0, 2500.0]
+    assert list(sweep["OWC"]) == [2600.0, 2600.0]
+    assert sweep["GGIP"].iloc[1] > sweep["GGIP"].iloc[0]
+
+
+def write_grid_files(eclbase):
+    """
+    Writes a 2x3x4 EGRID with three inactive cells, and an INIT file with
+    PORV, DEPTH, PVTNUM and EQLNUM
+    """
+
+    actnum = EclKW("ACTNUM", 24, EclDataType.ECL_INT)
+    for i in range(24):
+        actnum[i] = 0 if i in (0, 5, 17) else 1
+
+    grid = EclGridGenerator.create_rectangular(
+        (2, 3, 4), (100.0, 100.0, 10.0), actnum=actnum
+    )
+    grid.save_EGRID(eclbase + ".EGRID")
+
+    no_active = grid.getNumActive()
+    porv = EclKW("PORV", 24, EclDataType.ECL_FLOAT)
+    depth = EclKW("DEPTH", no_active, EclDataType.ECL_FLOAT)
+    pvtnum = EclKW("PVTNUM", no_active, EclDataType.ECL_INT)
+    eqlnum = EclKW("EQLNUM", no_active, EclDataType.ECL_INT)
+    for i in range(24):
+        porv[i] = 100.0 * i * actnum[i]
+    for i in range(no_active):
+        depth[i] = grid.get_xyz(active_index=i)[2]
+        pvtnum[i] = 1
+        eqlnum[i] = 1 + i % 2
+
+    with openFortIO(eclbase + ".INIT", mode=FortIO.WRITE_MODE) as fortio:
+        for keyword in [porv, depth, pvtnum, eqlnum]:
+            keyword.fwrite(fortio)
+
+
+def test_load_grid():
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase = str(pathlib.Path(tmpdir) / "CASE")
+        write_grid_files(eclbase)
+
+        eclfiles = ecl2df.EclFiles(eclbase + ".DATA")
+        grid = FieldFluidDescription._load_grid(eclfiles, porv=True)
+        grid_df = ecl2df.grid.df(eclfiles)
+
+        assert list(grid.columns) == ["Z", "PVTNUM", "EQLNUM", "PORV"]
+        assert len(grid) == 21
+        assert np.allclose(grid["Z"], grid_df["Z"])
+        assert np.array_equal(grid["PVTNUM"], grid_df["PVTNUM"])
+        assert np.array_equal(grid["EQLNUM"], grid_df["EQLNUM"])
+        assert np.allclose(grid["PORV"], grid_df["PORV"])
+
+        grid = FieldFluidDescription._load_grid(eclfiles)
+        assert "PORV" not in grid
+
+
+def write_ecl_case(eclbase):
+    """
+    Writes a DATA file from the test data, with EGRID and INIT files
+    """
+
+    (pathlib.Path(eclbase + ".DATA")).write_text(
+        "".join(
+            (TESTDATA / name).read_text(encoding="utf-8", errors="ignore")
+            for name in ["DATA", "pvt", "equil", "rsvd", "rvvd"]
+        ),
+        encoding="utf-8",
+    )
+    write_grid_files(eclbase)
+
+
+def test_parse_ecl_case_once():
+
+    parsed = []
+    parse = opm.io.Parser.parse
+
+    def counting_parse(parser, *args, **kwargs):
+        parsed.append(args[0])
+        return parse(parser, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase = str(pathlib.Path(tmpdir) / "CASE")
+        write_ecl_case(eclbase)
+
+        opm.io.Parser.parse = counting_parse
+        try:
+            field = FieldFluidDescription(
+                eclbase + ".DATA",
+                {"EQUIL": TESTDATA / "equil", "PVT": TESTDATA / "pvt"},
+            )
+        finally:
+            opm.io.Parser.parse = parse
+
+        assert parsed == [eclbase + ".DATA"]
+        assert [fluid.eqlnum for fluid in field.fluid_descriptions] == [1, 2]
+
+        deck = ecl2df.EclFiles(eclbase + ".DATA").get_ecldeck()
+        df_dict = FieldFluidDescription._equil_from_deck(deck)
+        for keyword in ["EQUIL", "RSVD", "RVVD", "PBVD", "PDVD"]:
+            expected = ecl2df.equil.df(deck, keywords=keyword)
+            assert df_dict[keyword].equals(expected), keyword
+        assert df_dict["PBVD"].empty
+
+
+def test_cached_ecl_case():
+
+    parsed = []
+    parse = opm.io.Parser.parse
+
+    def counting_parse(parser, *args, **kwargs):
+        parsed.append(args[0])
+        return parse(parser, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase = str(pathlib.Path(tmpdir) / "CASE")
+        write_ecl_case(eclbase)
+        cache = CaseCache(pathlib.Path(tmpdir) / "cache")
+
+        opm.io.Parser.parse = counting_parse
+        try:
+            fields = [
+                FieldFluidDescription(eclbase + ".DATA", {}, cache=cache)
+                for _ in range(2)
+            ]
+        finally:
+            opm.io.Parser.parse = parse
+
+        assert len(parsed) == 1
+
+        for fluid, cached in zip(
+            fields[0].fluid_descriptions, fields[1].fluid_descriptions
+        ):
+            assert (fluid.eqlnum, fluid.pvtnum) == (cached.eqlnum, cached.pvtnum)
+            assert (fluid.ref_depth, fluid.ref_press) == (
+                cached.ref_depth,
+                cached.ref_press,
+            )
+            assert (fluid.goc, fluid.owc) == (cached.goc, cached.owc)
+            assert np.array_equal(fluid.rsvd_rs, cached.rsvd_rs)
+            assert np.array_equal(fluid.pvt_model.pvto, cached.pvt_model.pvto)
+            assert np.array_equal(fluid.pvt_model.pvtg, cached.pvt_model.pvtg)
+        assert fields[0].grid.equals(fields[1].grid)
+        assert fields[0].porv_bins.equals(fields[1].porv_bins)
+        assert fields[0].porv_bins["PORV"].sum() == fields[0].grid["PORV"].sum()
+
+
+def test_lazy_regions():
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase = str(pathlib.Path(tmpdir) / "CASE")
+        write_ecl_case(eclbase)
+        case_tables = FieldFluidDescription.load_case_tables(eclbase + ".DATA")
+
+        field = FieldFluidDescription(None, {}, case_tables=case_tables)
+        assert field.fluid_index == {1: 0, 2: 1}
+        assert field._fluids == [None, None]
+
+        fluid = field.fluid_description(2)
+        assert fluid.eqlnum == 2
+        assert field._fluids[0] is None
+        assert field.fluid_descriptions[1] is fluid
+        assert field.fluid_descriptions[0].pvt_model is fluid.pvt_model
+        field.close()
+
+        full_df = field.get_df("EQUIL")
+        full_file = pathlib.Path(tmpdir) / "full.inc"
+        field.write_equilkws(["EQUIL", "RSVD"], full_file)
+
+        field = FieldFluidDescription(None, {}, case_tables=case_tables, eqlnums=[2])
+        assert field.fluid_index == {2: 0}
+
+        # Regions not selected are still exported
+        pd.testing.assert_frame_equal(
+            field.get_df("EQUIL").sort_values("EQLNUM", ignore_index=True), full_df
+        )
+        filtered_file = pathlib.Path(tmpdir) / "filtered.inc"
+        field.write_equilkws(["EQUIL", "RSVD"], filtered_file)
+        assert filtered_file.read_text() == full_file.read_text()
+        assert [fluid.eqlnum for fluid in field.evaluate(no_nodes=10)] == [2]
+        cells = field.evaluate_cells(no_nodes=10)
+        assert cells.loc[cells["EQLNUM"] == 1, "PRES"].isna().all()
+        assert cells.loc[cells["EQLNUM"] == 2, "PRES"].notna().all()
+        field.close()
+
+        with pytest.raises(ValueError):
+            FieldFluidDescription(None, {}, case_tables=case_tables, eqlnums=[9])
+
+
+def test_field_logger():
+
+    module_logger = logging.getLogger(FieldFluidDescription.__module__)
+    handlers = list(module_logger.handlers)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        eclbase = str(pathlib.Path(tmpdir) / "CASE")
+        write_ecl_case(eclbase)
+        case_tables = FieldFluidDescription.load_case_tables(eclbase + ".DATA")
+
+        fields = [
+            FieldFluidDescription(None, {}, case_tables=case_tables) for _ in range(2)
+        ]
+        fields[0].evaluate(no_nodes=10)
+        assert len(fields[0].records_list()) > 0
+        assert fields[1].records_list() == []
+        assert fields[1].report.entries == []
+
+        with pytest.raises(ValueError):
+            FieldFluidDescription(None, {}, case_tables=case_tables, eqlnums=[9])
+
+    assert module_logger.handlers == handlers
+
+
+if __name__ == "__main__":
+    test_main()
+    test_evaluate_parallel()
+    test_consistency_report()
+    test_evaluate_cells()
+    test_inplace()
+    test_porv_histogram()
+    test_set_contacts()
+    test_get_df()
+    test_write_equilkws()
+    test_sweep_contacts()
+    test_load_grid()
+    test_parse_ecl_case_once()
+    test_cached_ecl_case()
+    test_lazy_regions()
+    test_field_logger()